@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+# 日历年长度：CAGR 按首末时间戳的日历跨度年化，与 bar 频率无关
+DAYS_PER_YEAR = 365.25
+
+ArrayLike = Union[float, np.ndarray]
+
+
+def span_days(first: pd.Timestamp, last: pd.Timestamp) -> float:
+    """Calendar days (fractional) between the first and last timestamp of a series."""
+    return (pd.Timestamp(last) - pd.Timestamp(first)) / pd.Timedelta(days=1)
+
+
+def cagr_exponent(days: float) -> float:
+    """Power that annualises a total return earned over ``days`` calendar days (NaN for an empty span)."""
+    return DAYS_PER_YEAR / days if days > 0 else float("nan")
+
+
+def cagr(total_return: ArrayLike, days: float) -> ArrayLike:
+    """Compound annual growth rate of ``total_return`` earned over ``days`` calendar days.
+
+    Uses ``np.power`` with overflow ignored, so a very short span (e.g. a
+    few hours of minute bars) gives ``inf`` rather than raising
+    ``OverflowError``; works element-wise on arrays of total returns.
+    """
+    with np.errstate(over="ignore", invalid="ignore"):
+        result = np.power(1 + np.asarray(total_return, dtype=np.float64), cagr_exponent(days)) - 1
+    return float(result) if result.ndim == 0 else result
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.backtest.metrics import cagr, span_days
+from core.strategies.momentum import MomentumConfig, SimpleMomentumBacktester
+
+METRICS = ("sharpe", "cagr", "max_drawdown")
+# 单批重采样矩阵（样本数 × 收益长度，float64）的字节上限
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+EULER_GAMMA = 0.5772156649015329
+_NORMAL = NormalDist()
+
+
+def batch_metrics(returns: np.ndarray, annual_periods: int, days: float) -> Dict[str, np.ndarray]:
+    """Sharpe, CAGR and max drawdown of every row of a 2D return matrix spanning ``days`` calendar days.
+
+    Same definitions as ``SimpleMomentumBacktester.performance`` (ddof=1
+    volatility, ``1e-8`` guard, drawdown from the first equity value, CAGR
+    from ``core.backtest.metrics.cagr``).
+    """
+    mean = returns.mean(axis=1)
+    volatility = returns.std(axis=1, ddof=1) * annual_periods**0.5
+    equity = np.cumprod(1 + returns, axis=1)
+    peak = np.maximum.accumulate(equity, axis=1)
+    return {
+        "sharpe": mean * annual_periods / (volatility + 1e-8),
+        "cagr": cagr(equity[:, -1] - 1, days),
+        "max_drawdown": ((equity - peak) / peak).min(axis=1),
+    }
+
+
+def probabilistic_sharpe(returns: np.ndarray, benchmark: float = 0.0) -> float:
+    """Probability that the true per-period Sharpe exceeds ``benchmark`` (Bailey & López de Prado).
+
+    Corrects the Sharpe standard error for sample length, skewness and kurtosis.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    n = len(returns)
+    std = returns.std(ddof=1)
+    if n < 3 or std == 0:
+        return float("nan")
+    sr = returns.mean() / std
+    z = (returns - returns.mean()) / returns.std()
+    skew = (z**3).mean()
+    kurtosis = (z**4).mean()
+    denom = 1 - skew * sr + (kurtosis - 1) / 4 * sr**2
+    if denom <= 0:
+        return float("nan")
+    return _NORMAL.cdf((sr - benchmark) * (n - 1) ** 0.5 / denom**0.5)
+
+
+def expected_max_sharpe(trial_sharpes: Sequence[float]) -> float:
+    """Expected maximum per-period Sharpe of ``len(trial_sharpes)`` unskilled trials with their variance."""
+    trials = np.asarray(trial_sharpes, dtype=np.float64)
+    n = len(trials)
+    if n < 2:
+        return 0.0
+    return float(
+        trials.std(ddof=1)
+        * ((1 - EULER_GAMMA) * _NORMAL.inv_cdf(1 - 1 / n) + EULER_GAMMA * _NORMAL.inv_cdf(1 - 1 / (n * np.e)))
+    )
+
+
+def deflated_sharpe(returns: np.ndarray, trial_sharpes: Sequence[float]) -> float:
+    """Deflated Sharpe ratio of the selected strategy of a parameter sweep.
+
+    ``trial_sharpes`` are the per-period (not annualised) Sharpes of every
+    configuration tried, the selected one included; the benchmark is the
+    Sharpe the best of that many unskilled trials would reach by chance.
+    """
+    return probabilistic_sharpe(returns, expected_max_sharpe(trial_sharpes))
+
+
+@dataclass
+class SignificanceReport:
+    """Observed metrics, resampled confidence intervals and significance of one return series."""
+
+    samples: int
+    block: int
+    confidence: float
+    observed: Dict[str, float]
+    intervals: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    # 随机符号检验：收益符号随机化后 Sharpe 不低于实际值的比例（原假设：无择时能力）
+    sharpe_p_value: float = float("nan")
+    probabilistic_sharpe: float = float("nan")
+    deflated_sharpe: Optional[float] = None
+
+    def describe(self) -> str:
+        lines = [f"Resamples: {self.samples} (block bootstrap, block={self.block}, {self.confidence:.0%} CI)"]
+        for name in METRICS:
+            low, high = self.intervals.get(name, (float("nan"), float("nan")))
+            lines.append(f"{name}: {self.observed[name]:.4g} [{low:.4g}, {high:.4g}]")
+        lines.append(f"Sharpe p-value (random sign): {self.sharpe_p_value:.4f}")
+        lines.append(f"Probabilistic Sharpe (>0): {self.probabilistic_sharpe:.2%}")
+        if self.deflated_sharpe is not None:
+            lines.append(f"Deflated Sharpe: {self.deflated_sharpe:.2%}")
+        return "\n".join(lines)
+
+
+class SignificanceTester:
+    """Batched resampling of a strategy return series.
+
+    Resamples are generated as 2D index/sign matrices and evaluated with
+    ``batch_metrics`` in one NumPy pass per chunk; chunks are sized so a
+    matrix stays under ``chunk_bytes``. ``days`` is the calendar span of the
+    series, used for CAGR as in ``performance`` (resamples keep the span).
+    """
+
+    def __init__(
+        self,
+        returns: np.ndarray,
+        days: float,
+        annual_periods: int = 252,
+        seed: Optional[int] = None,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    ) -> None:
+        self.returns = np.asarray(returns, dtype=np.float64)
+        if len(self.returns) < 2:
+            raise ValueError("收益序列过短，无法重采样")
+        self.days = days
+        self.annual_periods = annual_periods
+        self.rng = np.random.default_rng(seed)
+        self.chunk_bytes = chunk_bytes
+
+    @classmethod
+    def from_backtester(cls, backtester: SimpleMomentumBacktester, **kwargs) -> "SignificanceTester":
+        df = backtester.prepare_features()
+        days = span_days(df["timestamp"].iloc[0], df["timestamp"].iloc[-1])
+        return cls(
+            df["strategy_returns"].to_numpy(dtype=np.float64),
+            days,
+            annual_periods=backtester.config.annual_trading_days,
+            **kwargs,
+        )
+
+    def observed(self) -> Dict[str, float]:
+        metrics = batch_metrics(self.returns[None, :], self.annual_periods, self.days)
+        return {name: float(values[0]) for name, values in metrics.items()}
+
+    def default_block(self) -> int:
+        # 常用经验值：块长约为 n^(1/3)
+        return max(1, int(round(len(self.returns) ** (1 / 3))))
+
+    def block_bootstrap(self, samples: int, block: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Metrics of ``samples`` circular block-bootstrap resamples (keeps autocorrelation within blocks)."""
+        n = len(self.returns)
+        block = min(block or self.default_block(), n)
+        blocks = -(-n // block)
+        offsets = np.arange(block)
+
+        def draw(size: int) -> np.ndarray:
+            starts = self.rng.integers(0, n, size=(size, blocks))
+            idx = (starts[:, :, None] + offsets).reshape(size, -1)[:, :n] % n
+            return self.returns[idx]
+
+        return self._evaluate(samples, draw)
+
+    def random_sign(self, samples: int) -> Dict[str, np.ndarray]:
+        """Metrics of ``samples`` resamples with each return's sign flipped at random."""
+        n = len(self.returns)
+
+        def draw(size: int) -> np.ndarray:
+            signs = self.rng.integers(0, 2, size=(size, n), dtype=np.int8) * 2 - 1
+            return self.returns * signs
+
+        return self._evaluate(samples, draw)
+
+    def report(
+        self,
+        samples: int = 2000,
+        block: Optional[int] = None,
+        confidence: float = 0.95,
+        trial_sharpes: Optional[Sequence[float]] = None,
+    ) -> SignificanceReport:
+        """Block-bootstrap CIs, random-sign p-value of Sharpe, PSR and (with a sweep) the deflated Sharpe."""
+        observed = self.observed()
+        boot = self.block_bootstrap(samples, block)
+        tail = (1 - confidence) / 2
+        # 取样本分位点而不插值，避免 inf 之间插值得到 NaN
+        intervals = {
+            name: tuple(float(q) for q in np.nanquantile(boot[name], [tail, 1 - tail], method="inverted_cdf"))
+            for name in METRICS
+        }
+        signed = self.random_sign(samples)["sharpe"]
+        # 加一平滑，p 值不为 0
+        p_value = (np.count_nonzero(signed >= observed["sharpe"]) + 1) / (samples + 1)
+        return SignificanceReport(
+            samples=samples,
+            block=min(block or self.default_block(), len(self.returns)),
+            confidence=confidence,
+            observed=observed,
+            intervals=intervals,
+            sharpe_p_value=float(p_value),
+            probabilistic_sharpe=probabilistic_sharpe(self.returns),
+            deflated_sharpe=deflated_sharpe(self.returns, trial_sharpes) if trial_sharpes is not None else None,
+        )
+
+    def _chunks(self, samples: int) -> Iterator[int]:
+        per_chunk = max(1, self.chunk_bytes // (len(self.returns) * 8 * 3))
+        for start in range(0, samples, per_chunk):
+            yield min(per_chunk, samples - start)
+
+    def _evaluate(self, samples: int, draw) -> Dict[str, np.ndarray]:
+        parts = [batch_metrics(draw(size), self.annual_periods, self.days) for size in self._chunks(samples)]
+        return {name: np.concatenate([p[name] for p in parts]) for name in METRICS}
+
+
+def sweep_sharpes(
+    data: pd.DataFrame, windows: Sequence[Tuple[int, int]], config: Optional[MomentumConfig] = None
+) -> pd.DataFrame:
+    """Sharpe of each ``(short, long)`` window pair; ``sharpe_per_period`` feeds ``deflated_sharpe``."""
+    base = config or MomentumConfig()
+    rows = []
+    for short, long in windows:
+        if short >= long:
+            continue
+        cfg = MomentumConfig(short_window=short, long_window=long, annual_trading_days=base.annual_trading_days)
+        returns = SimpleMomentumBacktester(data, cfg).prepare_features()["strategy_returns"].to_numpy(dtype=np.float64)
+        std = returns.std(ddof=1)
+        volatility = std * cfg.annual_trading_days**0.5
+        rows.append(
+            {
+                "short_window": short,
+                "long_window": long,
+                "sharpe_per_period": returns.mean() / std if std > 0 else float("nan"),
+                "sharpe": returns.mean() * cfg.annual_trading_days / (volatility + 1e-8),
+            }
+        )
+    return pd.DataFrame(rows)
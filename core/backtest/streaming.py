@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.backtest.metrics import cagr, span_days
+from core.data.storage import DEFAULT_STREAM_BATCH_ROWS, LocalParquetStore
+from core.strategies.momentum import MomentumConfig, SimpleMomentumBacktester
+
+logger = logging.getLogger(__name__)
+
+STREAM_COLUMNS = ["timestamp", "close"]
+
+
+@dataclass
+class StreamState:
+    """Running metrics of the strategy returns seen so far (Chan et al. merge for mean/variance)."""
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    equity: float = 1.0
+    peak: float = -np.inf
+    max_drawdown: float = 0.0
+    first: Optional[pd.Timestamp] = None
+    last: Optional[pd.Timestamp] = None
+
+    def update(self, returns: np.ndarray, timestamps: pd.Series) -> None:
+        n = len(returns)
+        if n == 0:
+            return
+        chunk_mean = float(returns.mean())
+        chunk_m2 = float(((returns - chunk_mean) ** 2).sum())
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.m2 += chunk_m2 + delta * delta * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+        # 净值与峰值跨批延续；峰值从第一根 bar 的净值开始（与内存版 cummax 一致）
+        cumulative = self.equity * np.cumprod(1 + returns)
+        running_peak = np.maximum.accumulate(np.maximum(cumulative, self.peak))
+        self.max_drawdown = min(self.max_drawdown, float(((cumulative - running_peak) / running_peak).min()))
+        self.peak = float(running_peak[-1])
+        self.equity = float(cumulative[-1])
+        if self.first is None:
+            self.first = timestamps.iloc[0]
+        self.last = timestamps.iloc[-1]
+
+    def performance(self, config: MomentumConfig) -> dict:
+        if self.count == 0:
+            raise ValueError("没有可计算收益的 bar（数据不足 2 行）")
+        total_return = self.equity - 1
+        std = (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else float("nan")
+        volatility = std * (config.annual_trading_days ** 0.5)
+        return {
+            "total_return": total_return,
+            "cagr": cagr(total_return, span_days(self.first, self.last)),
+            "sharpe": (self.mean * config.annual_trading_days) / (volatility + 1e-8),
+            "max_drawdown": self.max_drawdown,
+            "signal_count": self.count,
+        }
+
+
+class StreamingMomentumBacktester:
+    """Out-of-core ``SimpleMomentumBacktester`` over a symbol's stored bars.
+
+    Partitions are read ``batch_rows`` rows at a time (``timestamp`` and
+    ``close`` only); with ``start``/``end`` the store skips partitions and
+    row groups outside the window, and the ``long_window`` bars before
+    ``start`` seed the rolling windows. Each batch is prefixed with the last ``long_window``
+    bars of the previous one and run through the in-memory
+    ``prepare_features``, so rolling means, returns and the lagged signal
+    are computed exactly as on the full frame; the carried rows are then
+    dropped. Equity, drawdown peak and return moments are carried in
+    ``StreamState``, giving the same metrics as the in-memory version with
+    memory bounded by one batch.
+    """
+
+    def __init__(
+        self,
+        store: LocalParquetStore,
+        symbol: str,
+        freq: str = "1m",
+        config: Optional[MomentumConfig] = None,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+        batch_rows: int = DEFAULT_STREAM_BATCH_ROWS,
+    ) -> None:
+        self.config = config or MomentumConfig()
+        if self.config.short_window >= self.config.long_window:
+            raise ValueError("short_window must be smaller than long_window")
+        self.store = store
+        self.symbol = symbol
+        self.freq = freq
+        self.start = pd.Timestamp(start) if start is not None else None
+        self.end = pd.Timestamp(end) if end is not None else None
+        self.batch_rows = batch_rows
+
+    def batches(self) -> Iterator[pd.DataFrame]:
+        """Stored bars in ``[start, end]`` as DataFrames of at most ``batch_rows`` rows."""
+        tables = self.store.iter_tables(
+            self.symbol, self.freq, columns=STREAM_COLUMNS, batch_rows=self.batch_rows, start=self.start, end=self.end
+        )
+        for table in tables:
+            if table.num_rows:
+                yield table.to_pandas()
+
+    def warmup(self) -> pd.DataFrame:
+        """The last ``long_window`` bars before ``start`` (empty without ``start``).
+
+        Year partitions are read backwards from ``start`` only until enough
+        bars are found, so the first in-window bar gets the same moving
+        averages, return and signal as on the full history.
+        """
+        rows = self.config.long_window
+        if self.start is None:
+            return pd.DataFrame(columns=STREAM_COLUMNS)
+        before = _utc(self.start) - pd.Timedelta(1, "ns")
+        parts = []
+        found = 0
+        for year in reversed([y for y in self.store.years(self.symbol, self.freq) if y <= before.year]):
+            tail = pd.DataFrame(columns=STREAM_COLUMNS)
+            year_start = pd.Timestamp(year=year, month=1, day=1, tz="UTC")
+            for table in self.store.iter_tables(
+                self.symbol, self.freq, columns=STREAM_COLUMNS, batch_rows=self.batch_rows, start=year_start, end=before
+            ):
+                df = table.to_pandas()
+                tail = pd.concat([tail, df], ignore_index=True).iloc[-rows:] if len(tail) else df.iloc[-rows:]
+            if len(tail):
+                parts.insert(0, tail)
+                found += len(tail)
+            if found >= rows:
+                break
+        if not parts:
+            return pd.DataFrame(columns=STREAM_COLUMNS)
+        return pd.concat(parts, ignore_index=True).iloc[-rows:].reset_index(drop=True)
+
+    def run(self) -> StreamState:
+        state = StreamState()
+        # start 之前的 bar 只用于均线/收益的预热，不计入指标
+        carry = self.warmup()
+        for batch in self.batches():
+            frame = pd.concat([carry, batch], ignore_index=True) if len(carry) else batch.reset_index(drop=True)
+            features = SimpleMomentumBacktester(frame, self.config).prepare_features()
+            features = features[features.index >= len(carry)]
+            state.update(features["strategy_returns"].to_numpy(dtype=np.float64), features["timestamp"])
+            carry = frame.iloc[-self.config.long_window :]
+        return state
+
+    def performance(self) -> dict:
+        return self.run().performance(self.config)
+
+
+def backtest_symbols(
+    store: LocalParquetStore,
+    symbols: Iterable[str],
+    freq: str = "1m",
+    config: Optional[MomentumConfig] = None,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    workers: int = 4,
+    batch_rows: int = DEFAULT_STREAM_BATCH_ROWS,
+) -> pd.DataFrame:
+    """Streaming metrics of many symbols (one row each; failures carry ``error``)."""
+
+    def run(symbol: str) -> dict:
+        try:
+            tester = StreamingMomentumBacktester(store, symbol, freq, config, start, end, batch_rows)
+            return {"symbol": symbol, **tester.performance(), "error": ""}
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Streaming backtest failed for %s %s", symbol, freq)
+            return {"symbol": symbol, "error": str(exc)}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return pd.DataFrame(list(pool.map(run, symbols)))
+
+
+def _utc(value: pd.Timestamp) -> pd.Timestamp:
+    return value.tz_localize("UTC") if value.tzinfo is None else value.tz_convert("UTC")
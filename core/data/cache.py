@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import pyarrow as pa
+
+Signature = Tuple[int, int]
+CacheKey = Tuple[str, Optional[Tuple[str, ...]]]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    entries: int = 0
+    bytes: int = 0
+    max_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def describe(self) -> str:
+        return (
+            f"hits={self.hits} misses={self.misses} hit_rate={self.hit_rate:.1%} stale={self.stale} "
+            f"evictions={self.evictions} invalidations={self.invalidations} entries={self.entries} "
+            f"bytes={self.bytes / 1e6:.1f}MB/{self.max_bytes / 1e6:.0f}MB"
+        )
+
+
+def file_signature(path: Path) -> Optional[Signature]:
+    """``(mtime_ns, size)`` of a file, or None when it does not exist."""
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class PartitionCache:
+    """Thread-safe LRU of partition tables bounded by total Arrow buffer bytes.
+
+    Entries are keyed by path and column projection and carry the file's
+    ``(mtime_ns, size)`` at read time; a lookup whose current signature
+    differs is a miss (the file was replaced by another process). Writers in
+    this process call ``invalidate`` after replacing a file. Cached tables
+    are immutable Arrow tables, so they are shared without copying.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, Tuple[Signature, pa.Table, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = CacheStats(max_bytes=max_bytes)
+
+    def get(self, path: Path, columns: Optional[Sequence[str]], signature: Optional[Signature]) -> Optional[pa.Table]:
+        path_key = str(path)
+        with self._lock:
+            for key in ((path_key, _columns_key(columns)), (path_key, None)):
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[0] != signature:
+                    self._drop(key)
+                    self._stats.stale += 1
+                    continue
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                table = entry[1]
+                # 全列缓存可直接投影出所需列（零拷贝）
+                return table.select(list(columns)) if key[1] is None and columns is not None else table
+            self._stats.misses += 1
+            return None
+
+    def put(self, path: Path, columns: Optional[Sequence[str]], signature: Optional[Signature], table: pa.Table) -> None:
+        if signature is None:
+            return
+        size = table.get_total_buffer_size()
+        if size > self.max_bytes:
+            return
+        key = (str(path), _columns_key(columns))
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (signature, table, size)
+            self._stats.bytes += size
+            while self._stats.bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+                self._stats.evictions += 1
+
+    def invalidate(self, path: Path) -> None:
+        path_key = str(path)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == path_key]:
+                self._drop(key)
+                self._stats.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stats.bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**{**self._stats.__dict__, "entries": len(self._entries)})
+
+    def _drop(self, key: CacheKey) -> None:
+        _, _, size = self._entries.pop(key)
+        self._stats.bytes -= size
+
+
+def _columns_key(columns: Optional[Sequence[str]]) -> Optional[Tuple[str, ...]]:
+    return None if columns is None else tuple(columns)
@@ -5,11 +5,19 @@ from pathlib import Path
 
 import pandas as pd
 
+from core.data.fileio import write_parquet_atomic
+
 logger = logging.getLogger(__name__)
 
 
 class TradingCalendarCache:
-    """Cache trading days to reduce重复查询。"""
+    """Cache trading days to reduce重复查询。
+
+    Trading days are labelled by their exchange-local date at UTC midnight
+    (``2024-01-02`` -> ``2024-01-02 00:00 UTC``), stored in a ``trade_date``
+    column. Older caches (``date`` column, shifted by the UTC offset) are
+    ignored and refetched.
+    """
 
     def __init__(self, base_dir: Path, provider_name: str) -> None:
         self.path = Path(base_dir) / "_calendar" / f"{provider_name}.parquet"
@@ -45,23 +53,27 @@ class TradingCalendarCache:
         cal = cal[(cal >= start) & (cal <= end)]
         return cal
 
+    def cached(self) -> pd.DatetimeIndex:
+        """Trading days already in the cache, without contacting the provider."""
+        cal = self._load()
+        return cal if cal is not None else pd.DatetimeIndex([], tz="UTC")
+
     def _load(self) -> pd.DatetimeIndex | None:
         if self._calendar is not None:
             return self._calendar
         if self.path.exists():
             df = pd.read_parquet(self.path)
-            if "date" in df:
+            if "trade_date" in df:
                 try:
-                    self._calendar = self._to_index(df["date"])
+                    self._calendar = self._to_index(df["trade_date"])
                     return self._calendar
                 except Exception:  # noqa: BLE001
                     logger.exception("Failed to load cached calendar %s, will refetch", self.path)
         return pd.DatetimeIndex([], tz="UTC")
 
     def _save(self, calendar: pd.DatetimeIndex) -> None:
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        df = pd.DataFrame({"date": calendar})
-        df.to_parquet(self.path, index=False)
+        df = pd.DataFrame({"trade_date": calendar})
+        write_parquet_atomic(df, self.path)
         self._calendar = calendar
 
     @staticmethod
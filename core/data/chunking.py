@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from core.data.provider import LimitsConfig
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChunkStats:
+    calls: int = 0
+    rows: int = 0
+    truncations: int = 0
+    errors: int = 0
+
+
+class AdaptiveChunker:
+    """Chunk size (in trading days) derived from a row budget and adapted at runtime.
+
+    The ceiling is ``max_rows_per_call * safety / rows_per_day`` (or
+    ``max_days`` when the provider limit is unknown). The current size starts
+    at the ceiling to minimise calls, shrinks multiplicatively on errors and
+    slow responses, and is capped further whenever a response is truncated:
+    it hits the row limit, or (limit unknown) the fetcher confirms a short
+    response via ``record_truncation``. Fast responses grow it back towards
+    the ceiling.
+    """
+
+    def __init__(self, limits: LimitsConfig, rows_per_day: int, max_days: Optional[int] = None) -> None:
+        self.limits = limits
+        self.rows_per_day = max(1, int(rows_per_day))
+        self.min_days = max(1, limits.min_chunk_days)
+        ceiling = max_days or limits.max_chunk_days
+        if limits.max_rows_per_call > 0:
+            ceiling = min(ceiling, int(limits.max_rows_per_call * limits.safety // self.rows_per_day))
+        self.ceiling = max(self.min_days, ceiling)
+        self.size = self.ceiling
+        self.stats = ChunkStats()
+        self._lock = threading.Lock()
+
+    def next_size(self) -> int:
+        with self._lock:
+            return self.size
+
+    def is_truncated(self, rows: int) -> bool:
+        cap = self.limits.max_rows_per_call
+        return cap > 0 and rows >= cap
+
+    def record_success(self, days: int, rows: int, latency: float, truncated: bool = False) -> None:
+        with self._lock:
+            self.stats.calls += 1
+            self.stats.rows += rows
+            if truncated:
+                self._shrink(days)
+            else:
+                target = self.limits.target_latency_seconds
+                if target > 0 and latency > target:
+                    self.size = max(self.min_days, int(self.size * target / latency))
+                elif days >= self.size and (target <= 0 or latency < target / 2):
+                    self.size = min(self.ceiling, self.size * 2)
+            logger.debug(
+                "Chunk feedback days=%s rows=%s latency=%.2fs truncated=%s -> size=%s ceiling=%s",
+                days,
+                rows,
+                latency,
+                truncated,
+                self.size,
+                self.ceiling,
+            )
+
+    def record_truncation(self, days: int) -> None:
+        """A response of ``days`` trading days turned out truncated after it was recorded as a success."""
+        with self._lock:
+            self._shrink(days)
+            logger.debug("Chunk truncation confirmed days=%s -> size=%s ceiling=%s", days, self.size, self.ceiling)
+
+    def _shrink(self, days: int) -> None:
+        self.stats.truncations += 1
+        # 实际行密度高于预估（或限额更严），收紧上限
+        self.ceiling = max(self.min_days, min(self.ceiling, days // 2))
+        self.size = min(self.size, self.ceiling)
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.stats.calls += 1
+            self.stats.errors += 1
+            self.size = max(self.min_days, self.size // 2)
@@ -3,7 +3,9 @@ from __future__ import annotations
 import yaml
 from pathlib import Path
 
-from core.data.provider import ProviderConfig, RetryConfig, ThrottleConfig
+from core.data.provider import LimitsConfig, ProviderConfig, RetryConfig, ThrottleConfig
+from core.data.sessions import SessionSchedule
+from core.data.storage import LocalParquetStore, StorageConfig
 
 
 def load_raw_config(path: Path) -> dict:
@@ -11,6 +13,9 @@ def load_raw_config(path: Path) -> dict:
         return yaml.safe_load(f) or {}
 
 
+_PROVIDER_KEYS = {"username", "password", "base_dir", "timezone", "throttle", "retry", "limits"}
+
+
 def build_provider_config(raw: dict, provider_name: str) -> ProviderConfig:
     providers = raw.get("providers", {})
     if provider_name not in providers:
@@ -18,6 +23,7 @@ def build_provider_config(raw: dict, provider_name: str) -> ProviderConfig:
     cfg = providers[provider_name]
     throttle_cfg = cfg.get("throttle", {}) or {}
     retry_cfg = cfg.get("retry", {}) or {}
+    limits_cfg = cfg.get("limits", {}) or {}
     return ProviderConfig(
         username=cfg.get("username"),
         password=cfg.get("password"),
@@ -31,4 +37,42 @@ def build_provider_config(raw: dict, provider_name: str) -> ProviderConfig:
             max_attempts=int(retry_cfg.get("max_attempts", 3)),
             backoff_seconds=float(retry_cfg.get("backoff_seconds", 1.0)),
         ),
+        limits=LimitsConfig(
+            max_rows_per_call=int(limits_cfg.get("max_rows_per_call", 0)),
+            target_latency_seconds=float(limits_cfg.get("target_latency_seconds", 5.0)),
+            safety=float(limits_cfg.get("safety", 0.9)),
+            min_chunk_days=int(limits_cfg.get("min_chunk_days", 1)),
+            max_chunk_days=int(limits_cfg.get("max_chunk_days", 366 * 5)),
+        ),
+        options={k: v for k, v in cfg.items() if k not in _PROVIDER_KEYS},
+    )
+
+
+def build_storage_config(raw: dict) -> StorageConfig:
+    cfg = raw.get("storage", {}) or {}
+    fmt = cfg.get("format", "parquet")
+    if fmt != "parquet":
+        raise ValueError(f"不支持的存储格式: {fmt}")
+    level = cfg.get("compression_level")
+    row_group_size = cfg.get("row_group_size")
+    return StorageConfig(
+        compression=cfg.get("compression", "snappy"),
+        compression_level=int(level) if level is not None else None,
+        dictionary=cfg.get("dictionary", True),
+        drop_partition_columns=bool(cfg.get("drop_partition_columns", False)),
+        price_dtype=str(cfg.get("price_dtype", "float64")),
+        row_group_size=int(row_group_size) if row_group_size else None,
+        cross_section=bool(cfg.get("cross_section", False)),
+        cache_mb=int(cfg.get("cache_mb", 0) or 0),
+        derived={str(base): [str(t) for t in targets or []] for base, targets in (cfg.get("derived") or {}).items()},
+    )
+
+
+def build_store(raw: dict, provider_cfg: ProviderConfig) -> LocalParquetStore:
+    """Store for a provider's ``base_dir`` with the shared ``storage:`` options."""
+    return LocalParquetStore(
+        provider_cfg.base_dir,
+        timezone=provider_cfg.timezone,
+        options=build_storage_config(raw),
+        schedule=SessionSchedule.from_config(provider_cfg),
     )
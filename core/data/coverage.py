@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.data.fileio import file_lock, write_parquet_atomic
+from core.data.sessions import SessionSchedule
+
+logger = logging.getLogger(__name__)
+
+COMPLETE = "complete"
+PARTIAL = "partial"
+EMPTY = "empty"
+
+
+class CoverageIndex:
+    """Per-trade-date bar coverage of one intraday symbol/freq.
+
+    Kept at ``base_dir/_coverage/freq=<freq>/symbol=<symbol>.parquet``. Each
+    row stores a packed bitmask over the session bar grid, so merging repeated
+    fetches is a bitwise OR and bar counts stay exact. ``final`` marks past
+    days whose full session was fetched (a response reached its close), so
+    legitimately short days (suspensions, half days) are not requested again.
+    """
+
+    def __init__(self, base_dir: Path, symbol: str, freq: str, schedule: SessionSchedule) -> None:
+        self.path = Path(base_dir) / "_coverage" / f"freq={freq}" / f"symbol={symbol}.parquet"
+        self.symbol = symbol
+        self.freq = freq
+        self.schedule = schedule
+        self.grid = schedule.bar_offsets(freq)
+        self.expected = len(self.grid)
+        self._masks: Dict[pd.Timestamp, np.ndarray] = {}
+        self._final: Dict[pd.Timestamp, bool] = {}
+        self._loaded = False
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self) -> "CoverageIndex":
+        if self._loaded:
+            return self
+        self._loaded = True
+        if not self.path.exists():
+            return self
+        try:
+            self._merge_file()
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to read coverage %s, will rebuild", self.path)
+        return self
+
+    def bootstrap(self, frame: pd.DataFrame) -> None:
+        """Seed coverage from data already in the store (first run after upgrade)."""
+        if frame.empty or "timestamp" not in frame:
+            return
+        logger.info("Building %s coverage for %s from %s stored rows", self.freq, self.symbol, len(frame))
+        self.add(frame["timestamp"])
+
+    def add(
+        self,
+        timestamps: Iterable,
+        fetched_days: Iterable[pd.Timestamp] = (),
+        now: Optional[pd.Timestamp] = None,
+        served_through: Optional[pd.Timestamp] = None,
+    ) -> None:
+        """Merge the bars of one response; ``fetched_days`` were requested for a full session.
+
+        A requested day is finalised once its session has ended and the
+        response is known to cover it: the last returned bar is at or after
+        the session close, or the caller vouches for the window up to
+        ``served_through`` (an empty answer to a request whose window had
+        already closed, e.g. trailing suspensions or a delisting). Days past
+        the last bar of a non-empty response are left open, since the
+        provider may have cut it short; the fetcher requests them again.
+        """
+        self.load()
+        stamps = pd.DatetimeIndex(timestamps)
+        if stamps.tz is None:
+            stamps = stamps.tz_localize("UTC")
+        days, pos = self.schedule.bar_positions(stamps, self.freq)
+        on_grid = pos >= 0
+        if not on_grid.all():
+            logger.debug("%s %s: %s bars outside session grid ignored", self.symbol, self.freq, int((~on_grid).sum()))
+        days, pos = days[on_grid], pos[on_grid]
+        if len(days):
+            uniq, inverse = np.unique(days.tz_localize(None).to_numpy(), return_inverse=True)
+            block = np.zeros((len(uniq), self.expected), dtype=bool)
+            block[inverse, pos] = True
+            for value, bits in zip(uniq, block):
+                day = pd.Timestamp(value).tz_localize("UTC")
+                prev = self._masks.get(day)
+                self._masks[day] = bits if prev is None else (prev | bits)
+
+        now = pd.Timestamp.now(tz=self.schedule.timezone) if now is None else pd.Timestamp(now)
+        # 返回结果只能证明最后一根 bar 之前的交易日已取全；调用方确认已收盘的空请求区间同样视为取全
+        ends = ([stamps.max()] if len(stamps) else []) + ([pd.Timestamp(served_through)] if served_through is not None else [])
+        through = min(now, max(ends)) if ends else None
+        for day in fetched_days:
+            day = self._label(day)
+            self._masks.setdefault(day, np.zeros(self.expected, dtype=bool))
+            # 当日会话未结束时不能认定为完整，留给盘中 top-up
+            if through is not None and self.schedule.day_bounds(day)[1] <= through:
+                self._final[day] = True
+
+    def bars(self, day: pd.Timestamp) -> int:
+        mask = self.load()._masks.get(self._label(day))
+        return 0 if mask is None else int(mask.sum())
+
+    def status(self, day: pd.Timestamp) -> str:
+        bars = self.bars(day)
+        if bars >= self.expected:
+            return COMPLETE
+        return PARTIAL if bars else EMPTY
+
+    def is_final(self, day: pd.Timestamp) -> bool:
+        return self.load()._final.get(self._label(day), False)
+
+    def incomplete_days(self, trade_days: Iterable[pd.Timestamp]) -> List[pd.Timestamp]:
+        """Trade days that still need fetching (not complete and not finalised)."""
+        self.load()
+        result = []
+        for day in trade_days:
+            day = self._label(day)
+            if self.status(day) != COMPLETE and not self._final.get(day, False):
+                result.append(day)
+        return result
+
+    def last_bar(self, day: pd.Timestamp) -> Optional[pd.Timestamp]:
+        """UTC timestamp of the latest stored bar of a day (top-up start point)."""
+        mask = self.load()._masks.get(self._label(day))
+        if mask is None or not mask.any():
+            return None
+        last_pos = int(np.flatnonzero(mask)[-1])
+        local_day = self.schedule.day_bounds(day)[0].normalize()
+        return (local_day + self.grid[last_pos]).tz_convert("UTC")
+
+    def summary(self) -> pd.DataFrame:
+        self.load()
+        days = sorted(self._masks)
+        return pd.DataFrame(
+            {
+                "trade_date": pd.DatetimeIndex(days, tz="UTC") if days else pd.DatetimeIndex([], tz="UTC"),
+                "bars": [int(self._masks[d].sum()) for d in days],
+                "expected": self.expected,
+                "status": [self.status(d) for d in days],
+                "final": [self._final.get(d, False) for d in days],
+            }
+        )
+
+    def save(self) -> None:
+        """Persist coverage, OR-ing in bits another process saved since we loaded."""
+        self.load()
+        with file_lock(self.path):
+            if self.path.exists():
+                try:
+                    self._merge_file()
+                except Exception:  # noqa: BLE001
+                    logger.exception("Failed to merge coverage %s, overwriting", self.path)
+            self._write()
+
+    def _merge_file(self) -> None:
+        df = pd.read_parquet(self.path)
+        for day, mask, final in zip(pd.DatetimeIndex(df["trade_date"]), df["mask"], df["final"]):
+            bits = np.unpackbits(np.frombuffer(mask, dtype=np.uint8))[: self.expected].astype(bool)
+            prev = self._masks.get(day)
+            self._masks[day] = bits if prev is None else (prev | bits)
+            self._final[day] = self._final.get(day, False) or bool(final)
+
+    def _write(self) -> None:
+        days = sorted(self._masks)
+        df = pd.DataFrame(
+            {
+                "trade_date": pd.DatetimeIndex(days, tz="UTC") if days else pd.DatetimeIndex([], tz="UTC"),
+                "bars": np.array([self._masks[d].sum() for d in days], dtype="int32"),
+                "expected": np.full(len(days), self.expected, dtype="int32"),
+                "final": [self._final.get(d, False) for d in days],
+                "mask": [np.packbits(self._masks[d]).tobytes() for d in days],
+            }
+        )
+        write_parquet_atomic(df, self.path)
+
+    @staticmethod
+    def _label(day: pd.Timestamp) -> pd.Timestamp:
+        ts = pd.Timestamp(day)
+        if ts.tzinfo is None:
+            ts = ts.tz_localize("UTC")
+        else:
+            ts = ts.tz_convert("UTC")
+        return ts.normalize()
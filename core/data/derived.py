@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from core.data.sessions import DAILY_FREQS, PERIOD_FREQS, SessionSchedule, freq_minutes
+
+# 派生 bar 的聚合方式
+AGGREGATIONS = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum", "turnover": "sum"}
+
+
+def check_derivation(base_freq: str, target: str) -> None:
+    """Raise ``ValueError`` unless ``target`` bars can be aggregated from ``base_freq`` bars."""
+    if target in PERIOD_FREQS:
+        if base_freq not in DAILY_FREQS:
+            raise ValueError(f"{target} 只能由日线派生: {base_freq}")
+        return
+    minutes = freq_minutes(target)
+    base_minutes = freq_minutes(base_freq)
+    if minutes is None or base_minutes is None or minutes <= base_minutes or minutes % base_minutes:
+        raise ValueError(f"无法由 {base_freq} 派生 {target}")
+
+
+def _local_days(trade_date: np.ndarray) -> np.ndarray:
+    """``YYYYMMDD`` ints -> ``datetime64[D]``."""
+    years = trade_date // 10000
+    months = trade_date // 100 % 100
+    days = trade_date % 100
+    month_start = (years - 1970) * 12 + (months - 1)
+    return month_start.astype("datetime64[M]").astype("datetime64[D]") + (days - 1).astype("timedelta64[D]")
+
+
+class BarAggregator:
+    """Aggregate base bars into derived freqs by bucket.
+
+    Intraday targets (``5m``/``30m``/``60m``...) bucket each base bar by the
+    first target bar end at or after it on the session grid, so buckets
+    never straddle the lunch break and keep the residual bar of uneven
+    sessions. ``1w``/``1mo`` bucket daily bars by local calendar week
+    (Monday-based) or month. Buckets have fixed labels, so re-aggregating a
+    bucket after more base bars arrive replaces the previous row:
+
+    - intraday: the target bar's end time;
+    - ``1w``: Friday of the week, ``1mo``: last calendar day of the month,
+      both at exchange-local midnight like daily bars.
+    """
+
+    def __init__(self, schedule: SessionSchedule) -> None:
+        self.schedule = schedule
+
+    def bucket_keys(self, table: pa.Table, base_freq: str, target: str) -> np.ndarray:
+        """Bucket id of every row (-1 for base bars off the session grid)."""
+        check_derivation(base_freq, target)
+        trade_date = table.column("trade_date").to_numpy().astype(np.int64)
+        if target in PERIOD_FREQS:
+            days = _local_days(trade_date).astype(np.int64)
+            if target == "1w":
+                # 1970-01-01 为周四：(days + 3) % 7 为周一起算的星期序号
+                return days - (days + 3) % 7
+            return trade_date // 100
+        timestamps = table.column("timestamp").to_pandas()
+        _, base_pos = self.schedule.bar_positions(timestamps, base_freq)
+        base_offsets = self.schedule.bar_offsets(base_freq).to_numpy()
+        grid = self.schedule.bar_offsets(target).to_numpy()
+        pos = np.searchsorted(grid, base_offsets[np.maximum(base_pos, 0)], side="left")
+        return np.where(base_pos >= 0, trade_date * 10000 + pos, -1)
+
+    def bucket_labels(self, keys: np.ndarray, target: str) -> pd.DatetimeIndex:
+        """UTC timestamps of bucket ids from ``bucket_keys``."""
+        if target == "1w":
+            local = (keys + 4).astype("datetime64[D]")
+        elif target == "1mo":
+            months = (keys // 100 - 1970) * 12 + keys % 100 - 1
+            local = (months + 1).astype("datetime64[M]").astype("datetime64[D]") - np.timedelta64(1, "D")
+        else:
+            local = _local_days(keys // 10000) + self.schedule.bar_offsets(target).to_numpy()[keys % 10000]
+        return pd.DatetimeIndex(local).tz_localize(self.schedule.timezone).tz_convert("UTC")
+
+    def bucket_window(self, keys: np.ndarray, target: str) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """UTC span (with a day of slack) holding every base bar of the given buckets."""
+        keys = keys[keys >= 0]
+        if target == "1w":
+            first = keys.min().astype("datetime64[D]")
+            last = (keys.max() + 7).astype("datetime64[D]")
+        elif target == "1mo":
+            first = _local_days(np.array([keys.min() * 100 + 1]))[0]
+            last = _local_days(np.array([keys.max() * 100 + 1]))[0] + np.timedelta64(31, "D")
+        else:
+            first = _local_days(np.array([keys.min() // 10000]))[0]
+            last = _local_days(np.array([keys.max() // 10000]))[0] + np.timedelta64(1, "D")
+        pad = pd.Timedelta(days=1)
+        return pd.Timestamp(first, tz="UTC") - pad, pd.Timestamp(last, tz="UTC") + pad
+
+    def aggregate(self, table: pa.Table, base_freq: str, target: str) -> pa.Table:
+        """Derived bars of a timestamp-sorted v2 table (each bucket is computed from the rows given)."""
+        keys = self.bucket_keys(table, base_freq, target)
+        keep = keys >= 0
+        if not keep.all():
+            table = table.filter(pa.array(keep))
+            keys = keys[keep]
+        if table.num_rows == 0:
+            return pa.table({"timestamp": pa.array([], type=pa.timestamp("ns", tz="UTC"))})
+        starts = np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+        ends = np.concatenate((starts[1:], [len(keys)])) - 1
+        labels = pa.array(self.bucket_labels(keys[starts], target)).cast(pa.timestamp("ns", tz="UTC"))
+        columns = {"timestamp": labels}
+        for name, how in AGGREGATIONS.items():
+            if name not in table.column_names:
+                continue
+            values = table.column(name).cast(pa.float64()).fill_null(np.nan).to_numpy()
+            if how == "first":
+                result = values[starts]
+            elif how == "last":
+                result = values[ends]
+            elif how == "max":
+                result = np.fmax.reduceat(values, starts)
+            elif how == "min":
+                result = np.fmin.reduceat(values, starts)
+            else:
+                result = np.add.reduceat(np.nan_to_num(values), starts)
+                # 整个桶都缺失时保持为空，而不是 0
+                result[np.add.reduceat(np.isfinite(values).astype(np.int64), starts) == 0] = np.nan
+            columns[name] = pa.array(result, type=pa.float64())
+        return pa.table(columns)
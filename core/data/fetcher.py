@@ -1,17 +1,30 @@
 from __future__ import annotations
 
 import logging
+import threading
+import time
+from collections import deque
 from dataclasses import dataclass
-from typing import Iterable, List, Optional, Sequence
+from typing import Dict, Iterable, List, Optional, Sequence
 
+import numpy as np
 import pandas as pd
 
 from core.data.calendar import TradingCalendarCache
+from core.data.chunking import AdaptiveChunker
+from core.data.coverage import CoverageIndex
+from core.data.journal import BackfillJournal
 from core.data.provider import DataProvider
+from core.data.schema import trade_date_ints
+from core.data.sessions import SessionSchedule, freq_minutes
 from core.data.storage import LocalParquetStore
+from core.data.tables import timestamps
 
 logger = logging.getLogger(__name__)
 
+# 未配置 provider 行数上限时，分钟线默认每片 3 个交易日
+DEFAULT_MINUTE_CHUNK_DAYS = 3
+
 
 @dataclass
 class FetchResult:
@@ -29,14 +42,19 @@ class MarketFetcher:
         self,
         provider: DataProvider,
         store: LocalParquetStore,
-        chunk_days: int = 366,
-        chunk_minutes: int = 3 * 24 * 60,
+        chunk_days: Optional[int] = None,
+        chunk_minutes: Optional[int] = None,
+        schedule: Optional[SessionSchedule] = None,
     ) -> None:
         self.provider = provider
         self.store = store
+        # 显式指定时作为分片上限；否则由 provider 的 limits.max_rows_per_call 推导
         self.chunk_days = chunk_days
-        self.minute_chunk_days = max(1, int(chunk_minutes // (24 * 60))) if chunk_minutes else 1
+        self.minute_chunk_days = max(1, int(chunk_minutes // (24 * 60))) if chunk_minutes else None
         self.calendar_cache = TradingCalendarCache(store.base_dir, provider.name)
+        self.schedule = schedule or SessionSchedule.from_config(provider.config)
+        self._chunkers: Dict[str, AdaptiveChunker] = {}
+        self._chunkers_lock = threading.Lock()
 
     def fetch_symbol(
         self,
@@ -45,7 +63,16 @@ class MarketFetcher:
         end: pd.Timestamp,
         freq: str = "1d",
         use_missing_ranges: bool = True,
+        topup: bool = False,
     ) -> FetchResult:
+        """Fetch missing data for one symbol.
+
+        Daily bars are diffed against the trading calendar; intraday bars use the
+        per-day ``CoverageIndex`` so only incomplete days are requested. With
+        ``topup`` partially covered days are extended from their last stored
+        bar instead of being refetched whole (intraday refresh). Consecutive
+        missing trading days are requested in chunks sized by ``AdaptiveChunker``.
+        """
         start_utc = self._to_utc(start)
         end_utc = self._to_utc(end)
 
@@ -59,50 +86,141 @@ class MarketFetcher:
             logger.info("No trading days for %s in range %s -> %s, skipping", symbol, start_utc.date(), end_utc.date())
             return FetchResult(symbol=symbol, fetched_rows=0, missing_ranges=0, skipped=True)
 
-        if freq_norm in ("1d", "d", "day", "daily"):
-            try:
+        daily = freq_minutes(freq_norm) is None
+        coverage: Optional[CoverageIndex] = None
+        topup_starts: Dict[pd.Timestamp, pd.Timestamp] = {}
+        try:
+            if daily:
                 missing_dates = (
                     self._missing_trade_dates(symbol, trade_days) if use_missing_ranges else list(trade_days)
                 )
-            except Exception as exc:  # noqa: BLE001
-                logger.exception("Failed to compute missing dates for %s", symbol)
-                return FetchResult(symbol=symbol, fetched_rows=0, missing_ranges=0, error=str(exc))
-
-            if not missing_dates:
-                logger.info("No missing dates for %s (freq=%s), skipping", symbol, freq_norm)
-                return FetchResult(symbol=symbol, fetched_rows=0, missing_ranges=0, skipped=True)
-            ranges = self._chunk_dates(missing_dates, self.chunk_days)
-        else:
-            # 分钟线按交易日分片，避免跨周末/节假日
-            ranges = self._chunk_dates(list(trade_days), self.minute_chunk_days)
+            else:
+                coverage = self._coverage(symbol, freq_norm)
+                missing_dates = coverage.incomplete_days(trade_days) if use_missing_ranges else list(trade_days)
+                if topup:
+                    for day in missing_dates:
+                        last_bar = coverage.last_bar(day)
+                        if last_bar is not None:
+                            topup_starts[day] = last_bar + pd.Timedelta(seconds=1)
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Failed to compute missing dates for %s", symbol)
+            return FetchResult(symbol=symbol, fetched_rows=0, missing_ranges=0, error=str(exc))
 
-        missing_count = len(ranges)
+        if not missing_dates:
+            logger.info("No missing dates for %s (freq=%s), skipping", symbol, freq_norm)
+            return FetchResult(symbol=symbol, fetched_rows=0, missing_ranges=0, skipped=True)
 
+        chunker = self.chunker(freq_norm)
+        day_pos = {d: i for i, d in enumerate(trade_days.normalize())}
+        # 起点被覆盖的交易日（top-up 或截断续拉）单独请求
+        starts = dict(topup_starts)
+        queue = deque(sorted(set(missing_dates)))
+        attempts = 0
+        max_attempts = max(1, self.provider.config.retry.max_attempts)
+        # 未触及行数上限却没覆盖到请求区间末尾的分片：续拉的起始日 -> 原分片天数
+        suspects: Dict[pd.Timestamp, int] = {}
+        requests = 0
         fetched_rows = 0
         try:
-            for r_start, r_end in ranges:
+            while queue:
+                chunk = [queue.popleft()]
+                if chunk[0] not in starts:
+                    size = chunker.next_size()
+                    while (
+                        queue
+                        and len(chunk) < size
+                        and queue[0] not in starts
+                        and day_pos.get(queue[0], -2) - day_pos.get(chunk[-1], -4) == 1
+                    ):
+                        chunk.append(queue.popleft())
+                req_start, req_end = self._request_bounds(chunk[0], chunk[-1])
+                if chunk[0] in starts:
+                    req_start = starts[chunk[0]].tz_convert(self.schedule.timezone)
                 logger.info(
                     "Fetching %s %s range %s -> %s",
                     symbol,
                     freq_norm,
-                    r_start.date(),
-                    r_end.date(),
-                )
-                df = self.provider.get_price(
-                    symbol,
-                    start=r_start.to_pydatetime(),
-                    end=r_end.to_pydatetime(),
-                    freq=freq,
+                    req_start,
+                    req_end,
                 )
-                if df.empty:
-                    logger.info("Empty result for %s %s range %s -> %s", symbol, freq_norm, r_start.date(), r_end.date())
+                requests += 1
+                started = time.monotonic()
+                try:
+                    table = self.provider.get_price_table(
+                        symbol,
+                        start=req_start.to_pydatetime(),
+                        end=req_end.to_pydatetime(),
+                        freq=freq,
+                    )
+                except Exception:  # noqa: BLE001
+                    chunker.record_error()
+                    attempts += 1
+                    if attempts >= max_attempts:
+                        raise
+                    backoff = self.provider.config.retry.backoff_seconds * 2 ** (attempts - 1)
+                    logger.warning(
+                        "Fetch attempt %s/%s failed for %s %s, retrying in %.1fs with chunk<=%s days",
+                        attempts,
+                        max_attempts,
+                        symbol,
+                        freq_norm,
+                        backoff,
+                        chunker.next_size(),
+                        exc_info=True,
+                    )
+                    queue.extendleft(reversed(chunk))
+                    time.sleep(backoff)
                     continue
-                self.store.upsert(symbol, freq_norm, df)
-                fetched_rows += len(df)
-            return FetchResult(symbol=symbol, fetched_rows=fetched_rows, missing_ranges=missing_count)
+                attempts = 0
+                rows = table.num_rows
+                truncated = chunker.is_truncated(rows)
+                chunker.record_success(len(chunk), rows, time.monotonic() - started, truncated=truncated)
+                starts.pop(chunk[0], None)
+                suspect_days = suspects.pop(chunk[0], None)
+                if suspect_days is not None and rows:
+                    # 续拉仍有数据，说明上一次返回被 provider 静默截断
+                    chunker.record_truncation(suspect_days)
+                    logger.warning(
+                        "Response for %s %s before %s was truncated below the configured row limit",
+                        symbol,
+                        freq_norm,
+                        chunk[0].date(),
+                    )
+
+                finished = chunk
+                served_through = None
+                bar_times = timestamps(table) if rows else pd.DatetimeIndex([], tz="UTC")
+                if not rows:
+                    logger.info("Empty result for %s %s range %s -> %s", symbol, freq_norm, chunk[0].date(), chunk[-1].date())
+                    # 已收盘区间返回空：停牌、退市或半日市收尾，整段认定为已取全，避免每次重跑重复请求
+                    if req_end <= pd.Timestamp.now(tz=self.schedule.timezone):
+                        served_through = req_end
+                else:
+                    self.store.upsert(symbol, freq_norm, table)
+                    fetched_rows += rows
+                    short = not truncated and self._falls_short(bar_times, chunk, daily, req_end)
+                    if truncated or short:
+                        finished, rest = self._split_truncated(bar_times, chunk, daily, starts)
+                        if short and rest:
+                            suspects[rest[0]] = len(chunk)
+                        logger.log(
+                            logging.WARNING if truncated else logging.INFO,
+                            "%s response for %s %s (%s rows), refetching from %s",
+                            "Truncated" if truncated else "Short",
+                            symbol,
+                            freq_norm,
+                            rows,
+                            rest[0].date() if rest else "-",
+                        )
+                        queue.extendleft(reversed(rest))
+                if coverage is not None:
+                    days = [d for d in finished if d not in topup_starts]
+                    coverage.add(bar_times, fetched_days=days, served_through=served_through)
+                    coverage.save()
+            return FetchResult(symbol=symbol, fetched_rows=fetched_rows, missing_ranges=requests)
         except Exception as exc:  # noqa: BLE001
-            logger.exception("Fetch failed for %s %s ranges=%s", symbol, freq_norm, ranges)
-            return FetchResult(symbol=symbol, fetched_rows=fetched_rows, missing_ranges=missing_count, error=str(exc))
+            logger.exception("Fetch failed for %s %s after %s requests", symbol, freq_norm, requests)
+            return FetchResult(symbol=symbol, fetched_rows=fetched_rows, missing_ranges=requests, error=str(exc))
 
     def fetch_symbols(
         self,
@@ -111,15 +229,34 @@ class MarketFetcher:
         end: pd.Timestamp,
         freq: str = "1d",
         use_missing_ranges: bool = True,
+        journal: Optional[BackfillJournal] = None,
+        topup: bool = False,
     ) -> List[FetchResult]:
+        """Fetch symbols sequentially; with a journal each outcome is persisted for resume.
+
+        Runs inside ``store.batch()``, so the daily cross-section files are
+        written once for the whole list rather than once per symbol.
+        """
         results: List[FetchResult] = []
-        for sym in symbols:
-            results.append(self.fetch_symbol(sym, start, end, freq=freq, use_missing_ranges=use_missing_ranges))
+        with self.store.batch():
+            for sym in symbols:
+                started = time.monotonic()
+                result = self.fetch_symbol(
+                    sym, start, end, freq=freq, use_missing_ranges=use_missing_ranges, topup=topup
+                )
+                results.append(result)
+                if journal is not None:
+                    journal.record(result, time.monotonic() - started)
+                    logger.info("Run %s progress: %s", journal.run_id, journal.progress().describe())
         return results
 
     def list_securities(self, types: Optional[Sequence[str]] = None) -> pd.DataFrame:
         return self.provider.list_securities(types=types)
 
+    def trade_days(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DatetimeIndex:
+        """Trade-date labels in [start, end], from the calendar cache (refreshed from the provider if needed)."""
+        return self._get_trade_days(self._to_utc(start), self._to_utc(end))
+
     def _get_trade_days(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DatetimeIndex:
         return self.calendar_cache.get(
             loader=lambda s, e: self.provider.get_trade_days(s.to_pydatetime(), e.to_pydatetime()),
@@ -128,40 +265,78 @@ class MarketFetcher:
         )
 
     def _missing_trade_dates(self, symbol: str, trade_days: pd.DatetimeIndex) -> List[pd.Timestamp]:
-        existing = self.store.load(symbol, "1d")
-        existing_dates = pd.Index([])
-        if not existing.empty and "timestamp" in existing:
-            ts = pd.to_datetime(existing["timestamp"])
-            if ts.dt.tz is None:
-                ts = ts.dt.tz_localize("UTC")
-            else:
-                ts = ts.dt.tz_convert("UTC")
-            existing_dates = ts.dt.normalize()
         expected_dates = trade_days.normalize()
-        missing = sorted(set(expected_dates) - set(existing_dates))
-        return list(missing)
-
-    def _chunk_dates(self, dates: Iterable[pd.Timestamp], max_days: int) -> List[tuple[pd.Timestamp, pd.Timestamp]]:
-        dates_sorted = sorted(pd.to_datetime(list(dates)))
-        if not dates_sorted:
-            return []
-        dates_sorted = [self._to_utc(d).normalize() for d in dates_sorted]
-        ranges: List[tuple[pd.Timestamp, pd.Timestamp]] = []
-        start = dates_sorted[0]
-        prev = start
-        count = 1
-        for current in dates_sorted[1:]:
-            contiguous = (current - prev) <= pd.Timedelta(days=1)
-            if contiguous and count < max_days:
-                count += 1
-                prev = current
-                continue
-            ranges.append((start, prev))
-            start = current
-            prev = current
-            count = 1
-        ranges.append((start, prev))
-        return ranges
+        existing = self.store.load_table(symbol, "1d", columns=["trade_date"])
+        if existing is None:
+            return list(expected_dates)
+        # 整数 YYYYMMDD 比较，无需解析时间戳
+        stored = existing.column("trade_date").to_numpy()
+        return list(expected_dates[~np.isin(trade_date_ints(expected_dates), stored)])
+
+    def coverage(self, symbol: str, freq: str) -> CoverageIndex:
+        """Per-day coverage of an intraday symbol/freq (bootstrapped from the store if absent)."""
+        return self._coverage(symbol, freq.lower())
+
+    def _coverage(self, symbol: str, freq_norm: str) -> CoverageIndex:
+        coverage = CoverageIndex(self.store.base_dir, symbol, freq_norm, self.schedule)
+        if not coverage.exists():
+            coverage.bootstrap(self.store.load(symbol, freq_norm))
+        return coverage.load()
+
+    def _request_bounds(self, r_start: pd.Timestamp, r_end: pd.Timestamp) -> tuple[pd.Timestamp, pd.Timestamp]:
+        """Exchange-local request window covering whole sessions of the trade-date labels."""
+        return self.schedule.day_bounds(r_start)[0], self.schedule.day_bounds(r_end)[1]
+
+    def chunker(self, freq: str) -> AdaptiveChunker:
+        """Shared per-freq chunk sizer; learned sizes carry over between symbols."""
+        freq_norm = freq.lower()
+        with self._chunkers_lock:
+            chunker = self._chunkers.get(freq_norm)
+            if chunker is None:
+                limits = self.provider.config.limits
+                if freq_minutes(freq_norm) is None:
+                    max_days = self.chunk_days
+                else:
+                    max_days = self.minute_chunk_days
+                    if max_days is None and limits.max_rows_per_call <= 0:
+                        max_days = DEFAULT_MINUTE_CHUNK_DAYS
+                chunker = AdaptiveChunker(limits, self.schedule.expected_bars(freq_norm), max_days=max_days)
+                self._chunkers[freq_norm] = chunker
+            return chunker
+
+    def _falls_short(
+        self, bar_times: pd.DatetimeIndex, chunk: List[pd.Timestamp], daily: bool, req_end: pd.Timestamp
+    ) -> bool:
+        """Whether a response stops before the end of a request window whose session has already ended.
+
+        Independent of ``limits.max_rows_per_call``, so a provider that
+        truncates below the configured (or unknown) limit is still caught. A
+        genuine suspension at the end of the window costs one extra, empty
+        request.
+        """
+        if req_end > pd.Timestamp.now(tz=self.schedule.timezone):
+            return False
+        last_ts = bar_times.max()
+        if daily:
+            return self.schedule.trade_dates([last_ts])[0] < chunk[-1]
+        return last_ts < req_end
+
+    def _split_truncated(
+        self,
+        bar_times: pd.DatetimeIndex,
+        chunk: List[pd.Timestamp],
+        daily: bool,
+        starts: Dict[pd.Timestamp, pd.Timestamp],
+    ) -> tuple[List[pd.Timestamp], List[pd.Timestamp]]:
+        """Split a truncated chunk into finished days and days to request again."""
+        last_ts = bar_times.max()
+        last_day = self.schedule.trade_dates([last_ts])[0]
+        if daily or last_ts >= self.schedule.day_bounds(last_day)[1]:
+            # 日线一天一行、或分钟线已到收盘，最后返回的那天已完整
+            return [d for d in chunk if d <= last_day], [d for d in chunk if d > last_day]
+        # 分钟线最后一天可能只拿到一部分，从最后一根 bar 之后续拉
+        starts[last_day] = last_ts + pd.Timedelta(seconds=1)
+        return [d for d in chunk if d < last_day], [d for d in chunk if d >= last_day]
 
     @staticmethod
     def _to_utc(value: pd.Timestamp) -> pd.Timestamp:
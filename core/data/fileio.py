@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import uuid
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+
+try:  # POSIX only; on other platforms locks degrade to no-ops
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+TMP_SUFFIX = ".tmp"
+LOCK_SUFFIX = ".lock"
+
+# POSIX 记录锁按进程持有，同进程的线程之间另用线程锁互斥；
+# 弱引用字典：没有线程持有或等待时条目自动回收，长驻进程不会随路径数增长
+_thread_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+_thread_locks_guard = threading.Lock()
+
+
+def tmp_path(path: Path) -> Path:
+    """Hidden per-writer temp file next to ``path`` (same directory, so rename is atomic)."""
+    path = Path(path)
+    return path.with_name(f".{path.name}.{uuid.uuid4().hex}{TMP_SUFFIX}")
+
+
+def is_tmp_file(path: Path) -> bool:
+    name = Path(path).name
+    return name.startswith(".") and name.endswith(TMP_SUFFIX)
+
+
+@contextmanager
+def atomic_path(path: Path) -> Iterator[Path]:
+    """Yield a temp path to write; it replaces ``path`` only if the block succeeds.
+
+    Readers therefore see either the old or the new file, never a partial one.
+    The temp file is fsynced before the rename so a crash cannot leave an
+    empty file behind the new name.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = tmp_path(path)
+    try:
+        yield tmp
+        _fsync(tmp)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def write_parquet_atomic(df: pd.DataFrame, path: Path, **kwargs) -> None:
+    kwargs.setdefault("index", False)
+    with atomic_path(path) as tmp:
+        df.to_parquet(tmp, **kwargs)
+
+
+def write_text_atomic(path: Path, text: str) -> None:
+    with atomic_path(path) as tmp:
+        tmp.write_text(text, encoding="utf-8")
+
+
+def create_exclusive(path: Path, text: str) -> bool:
+    """Create ``path`` with ``text`` only if absent.
+
+    Uses ``link`` rather than ``O_EXCL`` because it is atomic on NFS as well.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = tmp_path(path)
+    tmp.write_text(text, encoding="utf-8")
+    try:
+        os.link(tmp, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+@contextmanager
+def file_lock(path: Path, shared: bool = False) -> Iterator[None]:
+    """Advisory lock on ``<path>.lock`` shared by processes on this host and NFS clients.
+
+    ``fcntl.lockf`` (POSIX record locks) is used instead of ``flock`` because
+    it is forwarded to the NFS lock manager. Lock files are left in place;
+    removing them while another process waits would break mutual exclusion.
+    Within one process, threads are serialised by a per-path lock (POSIX
+    locks are owned by the process, so they would not exclude each other);
+    it is dropped once no thread holds or waits for it.
+    """
+    lock_path = Path(path).with_name(Path(path).name + LOCK_SUFFIX)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    key = str(lock_path.resolve())
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(key, threading.Lock())
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        # 共享锁需要可读句柄，排他锁需要可写句柄，统一以 a+ 打开
+        with open(lock_path, "a+") as handle:
+            fcntl.lockf(handle, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.lockf(handle, fcntl.LOCK_UN)
+
+
+def _fsync(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    except OSError:  # pragma: no cover - some filesystems reject fsync on read-only fds
+        logger.debug("fsync not supported for %s", path)
+    finally:
+        os.close(fd)
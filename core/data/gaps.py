@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from core.data.schema import trade_date_ints, trade_date_labels
+from core.data.sessions import PERIOD_FREQS, SessionSchedule, freq_minutes
+from core.data.storage import LocalParquetStore
+from core.data.xsection import DateLike, to_trade_date
+
+logger = logging.getLogger(__name__)
+
+# error 非空的行表示该标的扫描失败（start/end 为空、bars 为 0），不等于“无缺口”
+GAP_COLUMNS = ["symbol", "freq", "start", "end", "trade_days", "bars", "error"]
+
+
+@dataclass(frozen=True)
+class Gap:
+    """A maximal run of missing bars.
+
+    Daily gaps are bounded by trade-date labels; intraday gaps by the UTC
+    end times of the first and last missing bars. Runs continuing across a
+    non-trading interval (lunch break, overnight, weekend) are one gap.
+    """
+
+    start: pd.Timestamp
+    end: pd.Timestamp
+    trade_days: int
+    bars: int
+
+
+def missing_runs(present: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Inclusive ``(starts, ends)`` positions of the runs of False in a presence mask."""
+    edges = np.diff(np.concatenate(([0], (~present).view(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+
+
+class GapScanner:
+    """Vectorised, calendar-aware gap detection over a ``LocalParquetStore``.
+
+    Stored bars are compared with the exchange calendar (``trade_days``, as
+    cached by ``TradingCalendarCache``) and, for intraday freqs, with the
+    session grid of ``SessionSchedule``; weekends, holidays and lunch breaks
+    are never reported. Daily checks read only the ``trade_date`` column and
+    intraday checks only ``timestamp``; presence is marked on an integer
+    ``day * bars_per_day + position`` grid and runs are found with one diff.
+    The scanned window defaults to each symbol's first..last stored day.
+    """
+
+    def __init__(
+        self, store: LocalParquetStore, trade_days: Iterable, schedule: Optional[SessionSchedule] = None
+    ) -> None:
+        self.store = store
+        self.schedule = schedule or SessionSchedule(timezone=store.timezone)
+        self.trade_days = np.unique(trade_date_ints(pd.DatetimeIndex(trade_days)))
+        if len(self.trade_days) == 0:
+            raise ValueError("交易日历为空，无法检测缺口")
+
+    def gaps(
+        self, symbol: str, freq: str = "1d", start: Optional[DateLike] = None, end: Optional[DateLike] = None
+    ) -> List[Gap]:
+        columns = ["trade_date"] if freq_minutes(freq) is None else ["timestamp"]
+        return self.table_gaps(self.store.load_table(symbol, freq, columns=columns), freq, start, end, symbol)
+
+    def grid_positions(self, table: Optional[pa.Table], freq: str) -> Tuple[np.ndarray, np.ndarray]:
+        """``YYYYMMDD`` and in-day grid position of each stored bar (position -1: off the session grid)."""
+        if freq in PERIOD_FREQS:
+            raise ValueError(f"周/月线 {freq} 不按交易日历检测缺口，请检查其基础频率")
+        if freq_minutes(freq) is None:
+            stored_days = table.column("trade_date").to_numpy() if table is not None else np.array([], np.int32)
+            return stored_days, np.zeros(len(stored_days), dtype=np.int64)
+        timestamps = table.column("timestamp").to_pandas() if table is not None else []
+        labels, positions = self.schedule.bar_positions(timestamps, freq)
+        return trade_date_ints(labels), positions
+
+    def table_gaps(
+        self,
+        table: Optional[pa.Table],
+        freq: str,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        symbol: str = "",
+    ) -> List[Gap]:
+        """Gaps of an already loaded table (``trade_date`` for daily, ``timestamp`` for intraday freqs)."""
+        stored_days, positions = self.grid_positions(table, freq)
+        bars_per_day = self.schedule.expected_bars(freq)
+        days = self._window(stored_days, start, end, symbol)
+        if len(days) == 0:
+            return []
+
+        # 每个 (交易日, 时段内序号) 在网格上的全局序号；不在网格内的 bar（盘外/非交易日）忽略
+        day_idx = np.searchsorted(days, stored_days)
+        valid = (positions >= 0) & (day_idx < len(days))
+        valid[valid] = days[day_idx[valid]] == stored_days[valid]
+        present = np.zeros(len(days) * bars_per_day, dtype=bool)
+        present[day_idx[valid] * bars_per_day + positions[valid]] = True
+        starts, ends = missing_runs(present)
+        if len(starts) == 0:
+            return []
+        first = self._bar_times(days, starts, bars_per_day, freq)
+        last = self._bar_times(days, ends, bars_per_day, freq)
+        day_counts = ends // bars_per_day - starts // bars_per_day + 1
+        return [
+            Gap(start=s, end=e, trade_days=int(d), bars=int(b))
+            for s, e, d, b in zip(first, last, day_counts, ends - starts + 1)
+        ]
+
+    def scan(
+        self,
+        symbols: Optional[Iterable[str]] = None,
+        freq: str = "1d",
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        workers: int = 8,
+    ) -> pd.DataFrame:
+        """Gaps of many symbols (all stored symbols of ``freq`` by default) as one frame.
+
+        A symbol whose scan fails gets a single row with a non-empty
+        ``error`` (and no range), so it is not mistaken for a clean one.
+        """
+        symbols = list(symbols) if symbols is not None else self.store.symbols(freq)
+
+        def run(symbol: str) -> List[dict]:
+            try:
+                return [{"symbol": symbol, "freq": freq, **asdict(gap), "error": ""} for gap in self.gaps(symbol, freq, start, end)]
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Gap scan failed for %s %s", symbol, freq)
+                return [{"symbol": symbol, "freq": freq, "start": pd.NaT, "end": pd.NaT, "trade_days": 0, "bars": 0, "error": str(exc)}]
+
+        rows = []
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for symbol_rows in pool.map(run, symbols):
+                rows.extend(symbol_rows)
+        return pd.DataFrame(rows, columns=GAP_COLUMNS)
+
+    def _window(
+        self, stored_days: np.ndarray, start: Optional[DateLike], end: Optional[DateLike], symbol: str
+    ) -> np.ndarray:
+        if len(stored_days) == 0 and (start is None or end is None):
+            return np.array([], dtype=self.trade_days.dtype)
+        lo = to_trade_date(start, self.schedule.timezone) if start is not None else int(stored_days.min())
+        hi = to_trade_date(end, self.schedule.timezone) if end is not None else int(stored_days.max())
+        if lo < self.trade_days[0] or hi > self.trade_days[-1]:
+            logger.warning(
+                "Calendar covers %s-%s, gap window %s-%s of %s is clipped",
+                self.trade_days[0],
+                self.trade_days[-1],
+                lo,
+                hi,
+                symbol,
+            )
+        return self.trade_days[(self.trade_days >= lo) & (self.trade_days <= hi)]
+
+    def _bar_times(self, days: np.ndarray, ordinals: np.ndarray, bars_per_day: int, freq: str) -> pd.DatetimeIndex:
+        labels = trade_date_labels(days[ordinals // bars_per_day])
+        if bars_per_day == 1 and freq_minutes(freq) is None:
+            return labels
+        offsets = self.schedule.bar_offsets(freq)[ordinals % bars_per_day]
+        local = labels.tz_localize(None) + offsets
+        return local.tz_localize(self.schedule.timezone).tz_convert("UTC")
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_RUN_ID_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+# ETA 按最近若干个标的的平均耗时估算，反映当前配额/网络状况
+ETA_WINDOW = 50
+
+
+def check_run_id(run_id: str) -> None:
+    if not _RUN_ID_RE.match(run_id):
+        raise ValueError(f"run_id 只能包含字母、数字、'-'、'_'、'.': {run_id}")
+
+
+@dataclass
+class JournalProgress:
+    total: int
+    done: int
+    failed: int
+    pending: int
+    rows: int
+    seconds_per_symbol: float
+    eta_seconds: Optional[float]
+
+    def describe(self) -> str:
+        eta = "n/a" if self.eta_seconds is None else str(timedelta(seconds=round(self.eta_seconds)))
+        return (
+            f"done={self.done}/{self.total} failed={self.failed} pending={self.pending} "
+            f"rows={self.rows} avg={self.seconds_per_symbol:.2f}s/symbol eta={eta}"
+        )
+
+
+class BackfillJournal:
+    """Append-only run journal so long backfills can resume where they stopped.
+
+    Stored as JSON lines at ``base_dir/_runs/<run_id>.jsonl``: one ``plan``
+    event (symbols, range, freq) followed by a ``done``/``failed`` event per
+    symbol attempt. The latest event of a symbol wins when replaying.
+    ``path`` overrides the location (used for per-shard journals).
+    """
+
+    def __init__(self, base_dir: Path, run_id: str, path: Optional[Path] = None) -> None:
+        check_run_id(run_id)
+        self.run_id = run_id
+        self.path = Path(path) if path is not None else Path(base_dir) / "_runs" / f"{run_id}.jsonl"
+        self.plan: dict = {}
+        self.status: Dict[str, dict] = {}
+        self._elapsed: List[float] = []
+        self._needs_newline = False
+        if self.path.exists():
+            self._replay()
+
+    def exists(self) -> bool:
+        return bool(self.plan)
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.plan.get("symbols", []))
+
+    def create(
+        self,
+        symbols: Iterable[str],
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        freq: str,
+        use_missing_ranges: bool = True,
+    ) -> None:
+        if self.exists():
+            raise ValueError(f"run 已存在: {self.run_id}（使用恢复模式继续）")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        event = {
+            "event": "plan",
+            "run_id": self.run_id,
+            "symbols": list(dict.fromkeys(symbols)),
+            "start": pd.Timestamp(start).isoformat(),
+            "end": pd.Timestamp(end).isoformat(),
+            "freq": freq,
+            "use_missing_ranges": use_missing_ranges,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self._append(event)
+        self.plan = event
+
+    def pending(self, failed_only: bool = False) -> List[str]:
+        """Symbols still to fetch; ``failed_only`` restricts to previously failed ones."""
+        if failed_only:
+            return [s for s in self.symbols if self.status.get(s, {}).get("event") == "failed"]
+        return [s for s in self.symbols if self.status.get(s, {}).get("event") != "done"]
+
+    def record(self, result, elapsed: float) -> None:
+        """Persist the outcome of one ``FetchResult``."""
+        event = {
+            "event": "failed" if result.error else "done",
+            "symbol": result.symbol,
+            "rows": int(result.fetched_rows),
+            "missing_ranges": int(result.missing_ranges),
+            "skipped": bool(result.skipped),
+            "elapsed": round(float(elapsed), 4),
+            "at": datetime.now().isoformat(timespec="seconds"),
+        }
+        if result.error:
+            event["error"] = str(result.error)
+        self._append(event)
+        self._apply(event)
+
+    def progress(self) -> JournalProgress:
+        total = len(self.symbols)
+        done = sum(1 for s in self.symbols if self.status.get(s, {}).get("event") == "done")
+        failed = sum(1 for s in self.symbols if self.status.get(s, {}).get("event") == "failed")
+        pending = total - done
+        rows = sum(int(v.get("rows", 0)) for v in self.status.values())
+        recent = self._elapsed[-ETA_WINDOW:]
+        per_symbol = sum(recent) / len(recent) if recent else 0.0
+        eta = per_symbol * pending if recent else None
+        return JournalProgress(
+            total=total,
+            done=done,
+            failed=failed,
+            pending=pending,
+            rows=rows,
+            seconds_per_symbol=per_symbol,
+            eta_seconds=eta,
+        )
+
+    def failures(self) -> Dict[str, str]:
+        return {s: v.get("error", "") for s, v in self.status.items() if v.get("event") == "failed"}
+
+    def _append(self, event: dict) -> None:
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        if self._needs_newline:
+            line = "\n" + line
+            self._needs_newline = False
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _apply(self, event: dict) -> None:
+        if event.get("event") == "plan":
+            self.plan = event
+            return
+        symbol = event.get("symbol")
+        if symbol is None:
+            return
+        # 行数在多次尝试间累加，状态取最后一次
+        prev_rows = int(self.status.get(symbol, {}).get("rows", 0))
+        event = dict(event, rows=prev_rows + int(event.get("rows", 0)))
+        self.status[symbol] = event
+        self._elapsed.append(float(event.get("elapsed", 0.0)))
+
+    def _replay(self) -> None:
+        text = self.path.read_text(encoding="utf-8")
+        self._needs_newline = bool(text) and not text.endswith("\n")
+        for lineno, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                # 进程崩溃可能留下半行，忽略即可（该标的会被重新拉取）
+                logger.warning("Ignoring corrupt journal line %s:%s", self.path, lineno)
+                continue
+            self._apply(event)
@@ -1,6 +1,46 @@
 from __future__ import annotations
 
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from core.data.fileio import atomic_path
+from core.data.tables import read_table, to_table
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_COLUMNS = [
+    "open",
+    "close",
+    "high",
+    "low",
+    "volume",
+    "turnover",
+    "change_rate",
+    "pe_ratio",
+    "turnover_rate",
+    "last_close",
+]
+# 显式列类型：不做类型推断；未列出的额外列仍由 Arrow 推断
+CSV_COLUMN_TYPES: Dict[str, pa.DataType] = {
+    "code": pa.string(),
+    "name": pa.string(),
+    "time_key": pa.timestamp("ns"),
+    **{name: pa.float64() for name in NUMERIC_COLUMNS},
+    # 成交量保持整数（可空）
+    "volume": pa.int64(),
+}
+NULL_VALUES = ["", "NA", "N/A", "NaN", "nan", "null", "NULL", "None", "-", "--"]
+TIMESTAMP_PARSERS = [pacsv.ISO8601, "%Y/%m/%d", "%Y/%m/%d %H:%M:%S", "%Y%m%d"]
+DEFAULT_BLOCK_SIZE = 16 << 20
+SIDECAR_VERSION = 2
 
 
 class CSVPriceLoader:
@@ -10,30 +50,142 @@ class CSVPriceLoader:
     ``code``, ``name``, ``time_key``, ``open``, ``close``, ``high``, ``low``,
     ``volume`` and ``turnover``. Extra columns (e.g. change_rate/pe_ratio) are
     preserved for downstream inspection.
+
+    Parsing uses the multi-threaded pyarrow CSV reader with the explicit
+    column types above (numeric columns are float64, ``volume`` a nullable
+    int64; naive ``time_key`` is taken as UTC). With ``sidecar=True`` the
+    parsed table is kept in a Parquet sidecar in ``sidecar_dir`` (default:
+    next to the CSV), named by a hash of the file contents, so later loads of
+    an unchanged file are a columnar read. ``iter_tables`` streams large
+    dumps in blocks.
     """
 
-    def __init__(self, csv_path: str) -> None:
+    def __init__(
+        self,
+        csv_path: str,
+        sidecar: bool = False,
+        sidecar_dir: Optional[Path] = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ) -> None:
         self.csv_path = csv_path
+        self.sidecar = sidecar
+        self.sidecar_dir = Path(sidecar_dir) if sidecar_dir is not None else Path(csv_path).parent
+        self.block_size = block_size
 
     def load(self) -> pd.DataFrame:
-        df = pd.read_csv(self.csv_path)
-        df = df.rename(columns={"time_key": "timestamp"})
-        df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
-
-        numeric_cols = [
-            "open",
-            "close",
-            "high",
-            "low",
-            "volume",
-            "turnover",
-            "change_rate",
-            "pe_ratio",
-            "turnover_rate",
-        ]
-        for col in numeric_cols:
-            if col in df:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-
-        df = df.sort_values("timestamp").reset_index(drop=True)
-        return df
+        return self.load_table().to_pandas()
+
+    def load_table(self) -> pa.Table:
+        """Whole file as an Arrow table sorted by timestamp (from the sidecar when it is current)."""
+        sidecar_path = self.sidecar_path() if self.sidecar else None
+        if sidecar_path is not None and sidecar_path.exists():
+            try:
+                return read_table(sidecar_path)
+            except Exception:  # noqa: BLE001
+                logger.warning("Ignoring unreadable CSV sidecar %s", sidecar_path, exc_info=True)
+        try:
+            table = pacsv.read_csv(
+                self.csv_path, read_options=self._read_options(), convert_options=self._convert_options()
+            )
+        except pa.ArrowInvalid:
+            # 数值列含无法解析的脏值：按字符串读入后逐列强制转换（无法解析的置空）
+            logger.warning("Typed parse of %s failed, coercing numeric columns", self.csv_path, exc_info=True)
+            table = pacsv.read_csv(
+                self.csv_path, read_options=self._read_options(), convert_options=self._convert_options(strict=False)
+            )
+            table = _coerce_numeric(table)
+        table = self._normalize(table)
+        if table.num_rows:
+            table = table.take(pc.sort_indices(table, sort_keys=[("timestamp", "ascending")]))
+        if sidecar_path is not None:
+            self._write_sidecar(table, sidecar_path)
+        return table
+
+    def iter_tables(self) -> Iterator[pa.Table]:
+        """Stream the file in ``block_size`` chunks (unsorted, not cached) for dumps larger than memory.
+
+        Dirty numeric values fall back to per-column coercion as in
+        ``load_table``; the fallback pass resumes after the rows already yielded.
+        """
+        emitted = 0
+        try:
+            for table in self._iter_blocks(strict=True):
+                emitted += table.num_rows
+                yield table
+            return
+        except pa.ArrowInvalid:
+            logger.warning(
+                "Typed parse of %s failed after %s rows, coercing numeric columns", self.csv_path, emitted, exc_info=True
+            )
+        for table in self._iter_blocks(strict=False):
+            if emitted >= table.num_rows:
+                emitted -= table.num_rows
+                continue
+            yield table.slice(emitted)
+            emitted = 0
+
+    def _iter_blocks(self, strict: bool) -> Iterator[pa.Table]:
+        reader = pacsv.open_csv(
+            self.csv_path, read_options=self._read_options(), convert_options=self._convert_options(strict=strict)
+        )
+        for batch in reader:
+            if batch.num_rows:
+                table = pa.Table.from_batches([batch])
+                yield self._normalize(table if strict else _coerce_numeric(table))
+
+    def source_digest(self) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(self.csv_path, "rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def sidecar_path(self, digest: Optional[str] = None) -> Path:
+        digest = digest or self.source_digest()
+        return self.sidecar_dir / f".{Path(self.csv_path).name}.{digest}.v{SIDECAR_VERSION}.parquet"
+
+    def _write_sidecar(self, table: pa.Table, path: Path) -> None:
+        try:
+            with atomic_path(path) as tmp:
+                pq.write_table(table, tmp, compression="zstd")
+            # 源文件变化后旧哈希的 sidecar 不再可能命中
+            for stale in self.sidecar_dir.glob(f".{Path(self.csv_path).name}.*.parquet"):
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+        except OSError:
+            logger.warning("Could not write CSV sidecar %s", path, exc_info=True)
+
+    def _read_options(self) -> pacsv.ReadOptions:
+        return pacsv.ReadOptions(block_size=self.block_size, use_threads=True)
+
+    @staticmethod
+    def _convert_options(strict: bool = True) -> pacsv.ConvertOptions:
+        column_types = dict(CSV_COLUMN_TYPES)
+        if not strict:
+            column_types.update({name: pa.string() for name in NUMERIC_COLUMNS})
+        return pacsv.ConvertOptions(
+            column_types=column_types,
+            null_values=NULL_VALUES,
+            strings_can_be_null=True,
+            timestamp_parsers=TIMESTAMP_PARSERS,
+        )
+
+    @staticmethod
+    def _normalize(table: pa.Table) -> pa.Table:
+        if "time_key" in table.column_names:
+            table = table.rename_columns(["timestamp" if name == "time_key" else name for name in table.column_names])
+        return to_table(table)
+
+
+def _coerce_numeric(table: pa.Table) -> pa.Table:
+    for name in NUMERIC_COLUMNS:
+        if name not in table.column_names:
+            continue
+        idx = table.column_names.index(name)
+        values = pd.to_numeric(table.column(idx).to_pandas(), errors="coerce").astype("float64")
+        column = pa.array(values, type=pa.float64())
+        finite = values.dropna()
+        if name == "volume" and (finite == finite.round()).all():
+            column = pa.array(values.astype("Int64"), type=pa.int64())
+        table = table.set_column(idx, pa.field(name, column.type), column)
+    return table
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from core.data.fileio import is_tmp_file, write_text_atomic
+from core.data.storage import LocalParquetStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROW_GROUP_SIZE = 128 * 1024
+# 晚于该时长仍存在的临时文件视为崩溃残留（正在写入的临时文件不会存活这么久）
+DEFAULT_TMP_AGE_SECONDS = 3600.0
+
+
+@dataclass
+class CompactionReport:
+    scanned: int = 0
+    compacted: int = 0
+    unchanged: int = 0
+    rows_before: int = 0
+    rows_after: int = 0
+    tmp_removed: int = 0
+    dirs_removed: int = 0
+    failures: Dict[str, str] = field(default_factory=dict)
+
+    def describe(self) -> str:
+        return (
+            f"scanned={self.scanned} compacted={self.compacted} unchanged={self.unchanged} "
+            f"rows={self.rows_before}->{self.rows_after} duplicates_removed={self.rows_before - self.rows_after} "
+            f"tmp_removed={self.tmp_removed} dirs_removed={self.dirs_removed} failed={len(self.failures)}"
+        )
+
+
+class StoreCompactor:
+    """Maintenance pass over a ``LocalParquetStore``.
+
+    Rewrites partitions sorted and deduplicated with right-sized row groups
+    (via ``LocalParquetStore.compact_partition``, under the partition lock
+    and with an atomic replace, so concurrent readers and writers are safe),
+    removes temp files left by crashed writers and prunes empty directories.
+    The ``(mtime, size)`` of every partition after compaction is kept in
+    ``_maintenance/compaction.json`` so incremental runs only revisit
+    partitions written since.
+    """
+
+    def __init__(
+        self,
+        store: LocalParquetStore,
+        row_group_size: Optional[int] = None,
+        tmp_age_seconds: float = DEFAULT_TMP_AGE_SECONDS,
+    ) -> None:
+        self.store = store
+        self.row_group_size = row_group_size or store.options.row_group_size or DEFAULT_ROW_GROUP_SIZE
+        self.tmp_age_seconds = tmp_age_seconds
+        self.state_path = Path(store.base_dir) / "_maintenance" / "compaction.json"
+
+    def load_state(self) -> dict:
+        if not self.state_path.exists():
+            return {"partitions": {}}
+        try:
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            logger.warning("Corrupt compaction state %s, running a full pass", self.state_path)
+            return {"partitions": {}}
+
+    def run(
+        self,
+        full: bool = False,
+        dry_run: bool = False,
+        symbols: Optional[Set[str]] = None,
+        freq: Optional[str] = None,
+        workers: int = 4,
+    ) -> CompactionReport:
+        report = CompactionReport()
+        state = self.load_state()
+        known: Dict[str, List[int]] = state.get("partitions", {})
+        todo = []
+        for symbol, part_freq, year, path in self.store.iter_partitions():
+            if (symbols is not None and symbol not in symbols) or (freq and part_freq != freq):
+                continue
+            report.scanned += 1
+            key = self._key(path)
+            if not full and known.get(key) == self._signature(path):
+                report.unchanged += 1
+                continue
+            todo.append((symbol, part_freq, year, path, key))
+
+        def compact(item):
+            symbol, part_freq, year, path, key = item
+            try:
+                before, after = self.store.compact_partition(
+                    symbol, part_freq, year, row_group_size=self.row_group_size, dry_run=dry_run
+                )
+                return key, path, before, after, None
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Failed to compact %s", path)
+                return key, path, 0, 0, str(exc)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for key, path, before, after, error in pool.map(compact, todo):
+                if error:
+                    report.failures[key] = error
+                    continue
+                report.compacted += 1
+                report.rows_before += before
+                report.rows_after += after
+                if not dry_run:
+                    known[key] = self._signature(path)
+
+        report.tmp_removed = self._remove_stale_tmp(dry_run)
+        report.dirs_removed = self._remove_empty_dirs(dry_run)
+        if not dry_run:
+            # 已删除的分区不再保留记录
+            state["partitions"] = {k: v for k, v in known.items() if (Path(self.store.base_dir) / k).exists()}
+            state["last_run"] = datetime.now().isoformat(timespec="seconds")
+            state["last_report"] = report.describe()
+            write_text_atomic(self.state_path, json.dumps(state, ensure_ascii=False))
+        return report
+
+    def _remove_stale_tmp(self, dry_run: bool) -> int:
+        cutoff = time.time() - self.tmp_age_seconds
+        removed = 0
+        for path in Path(self.store.base_dir).glob("symbol=*/**/.*"):
+            if not path.is_file() or not is_tmp_file(path):
+                continue
+            try:
+                if path.stat().st_mtime > cutoff:
+                    continue
+                if not dry_run:
+                    path.unlink()
+                removed += 1
+                logger.info("Removed stale temp file %s", path)
+            except FileNotFoundError:
+                continue
+        return removed
+
+    def _remove_empty_dirs(self, dry_run: bool) -> int:
+        removed = 0
+        base = Path(self.store.base_dir)
+        # 自底向上删除空目录；带锁文件的目录保留（锁文件删除会破坏等待中写入方的互斥）
+        for dirpath, dirnames, filenames in os.walk(base, topdown=False):
+            path = Path(dirpath)
+            if path == base or not path.relative_to(base).parts[0].startswith("symbol="):
+                continue
+            if filenames or any((path / d).exists() for d in dirnames):
+                continue
+            if not dry_run:
+                try:
+                    path.rmdir()
+                except OSError:
+                    # 并发写入者刚刚创建了文件，跳过
+                    continue
+            removed += 1
+        return removed
+
+    def _key(self, path: Path) -> str:
+        return path.relative_to(self.store.base_dir).as_posix()
+
+    @staticmethod
+    def _signature(path: Path) -> List[int]:
+        stat = path.stat()
+        return [stat.st_mtime_ns, stat.st_size]
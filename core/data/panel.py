@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from core.data.fileio import file_lock, tmp_path, write_text_atomic
+from core.data.schema import trade_date_labels
+from core.data.storage import LocalParquetStore
+from core.data.tables import concat_tables
+from core.data.xsection import DateRange, trade_date_bounds
+
+logger = logging.getLogger(__name__)
+
+PANEL_DIR = "_panel"
+PANEL_FIELDS = ("open", "high", "low", "close", "volume", "turnover")
+CURRENT_FILE = "CURRENT"
+
+
+def store_manifest(store: LocalParquetStore, freq: str = "1d") -> Dict[str, List[int]]:
+    """``{relative path: [mtime_ns, size]}`` of the files a ``freq`` panel is built from.
+
+    The cross-section month files when that layout is enabled (a handful of
+    stats), otherwise every symbol partition of ``freq``.
+    """
+    base = Path(store.base_dir)
+    if store.options.cross_section and freq == store.xsection.freq:
+        paths = sorted(store.xsection.root.glob("month=*/data.parquet"))
+    else:
+        paths = [path for _, part_freq, _, path in store.iter_partitions() if part_freq == freq]
+    manifest = {}
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        manifest[path.relative_to(base).as_posix()] = [stat.st_mtime_ns, stat.st_size]
+    return manifest
+
+
+def manifest_version(manifest: Dict[str, List[int]], fields: Sequence[str]) -> str:
+    digest = hashlib.sha1(json.dumps([sorted(manifest.items()), list(fields)]).encode()).hexdigest()
+    return digest[:16]
+
+
+@dataclass
+class Panel:
+    """Read-only dates × symbols arrays memory-mapped from ``_panel/<version>/``.
+
+    Arrays are ``np.memmap`` views: opening is O(1), slicing reads only the
+    touched pages, and every process mapping the same version shares one
+    copy in the OS page cache. Missing bars are NaN.
+    """
+
+    root: Path
+    version: str
+    dates: np.ndarray
+    symbols: List[str]
+    fields: Tuple[str, ...]
+
+    def __post_init__(self) -> None:
+        self._symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def open(cls, root: Path) -> "Panel":
+        meta = json.loads((root / "manifest.json").read_text(encoding="utf-8"))
+        return cls(
+            root=root,
+            version=meta["version"],
+            dates=np.load(root / "dates.npy", mmap_mode="r"),
+            symbols=list(meta["symbols"]),
+            fields=tuple(meta["fields"]),
+        )
+
+    def field(self, name: str) -> np.ndarray:
+        """The full ``(dates, symbols)`` array of one field (memory-mapped, read-only)."""
+        if name not in self.fields:
+            raise KeyError(f"panel 中无字段 {name}，可用: {self.fields}")
+        if name not in self._arrays:
+            self._arrays[name] = np.load(self.root / f"{name}.npy", mmap_mode="r")
+        return self._arrays[name]
+
+    def date_slice(self, dates: Optional[DateRange] = None, timezone: str = "Asia/Shanghai") -> slice:
+        if dates is None:
+            return slice(0, len(self.dates))
+        start, end = trade_date_bounds(dates, timezone)
+        return slice(int(np.searchsorted(self.dates, start, "left")), int(np.searchsorted(self.dates, end, "right")))
+
+    def symbol_positions(self, symbols: Iterable[str]) -> np.ndarray:
+        missing = [s for s in symbols if s not in self._symbol_index]
+        if missing:
+            raise KeyError(f"panel 中无标的: {missing[:5]}")
+        return np.array([self._symbol_index[s] for s in symbols], dtype=np.intp)
+
+    def values(
+        self, name: str, dates: Optional[DateRange] = None, symbols: Optional[Sequence[str]] = None
+    ) -> np.ndarray:
+        """Slice of a field; a zero-copy view unless ``symbols`` selects columns."""
+        array = self.field(name)[self.date_slice(dates)]
+        if symbols is not None:
+            array = array[:, self.symbol_positions(symbols)]
+        return array
+
+    def frame(
+        self, name: str, dates: Optional[DateRange] = None, symbols: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """DataFrame (trade-date labels × symbols) copy of a slice."""
+        rows = self.date_slice(dates)
+        columns = list(symbols) if symbols is not None else self.symbols
+        return pd.DataFrame(
+            np.array(self.values(name, dates, symbols)),
+            index=trade_date_labels(self.dates[rows]),
+            columns=columns,
+        )
+
+
+class PanelCache:
+    """Materialised, memory-mapped daily panels of a ``LocalParquetStore``.
+
+    ``_panel/<version>/`` holds ``<field>.npy`` (float64, dates × symbols),
+    ``dates.npy`` (int32 ``YYYYMMDD``) and ``manifest.json``. The version is a
+    digest of the store manifest (path, mtime and size of every source file)
+    and the fields, so any write to the store yields a new version; readers
+    keep using the mapping they opened. ``_panel/CURRENT`` names the latest
+    build. Builds are written to a temp directory and renamed into place.
+    """
+
+    def __init__(
+        self, store: LocalParquetStore, fields: Sequence[str] = PANEL_FIELDS, freq: str = "1d", workers: int = 8
+    ) -> None:
+        self.store = store
+        self.fields = tuple(fields)
+        self.freq = freq
+        self.workers = workers
+        self.root = Path(store.base_dir) / PANEL_DIR
+
+    def current_version(self) -> Optional[str]:
+        path = self.root / CURRENT_FILE
+        if not path.exists():
+            return None
+        return path.read_text(encoding="utf-8").strip() or None
+
+    def store_version(self) -> str:
+        return manifest_version(store_manifest(self.store, self.freq), self.fields)
+
+    def open(self, version: Optional[str] = None) -> Panel:
+        """Map an existing build (``CURRENT`` by default) without checking the store."""
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"尚未构建 panel: {self.root}")
+        return Panel.open(self.root / version)
+
+    def ensure(self) -> Panel:
+        """Map the panel matching the store's current contents, building it first if needed."""
+        manifest = store_manifest(self.store, self.freq)
+        version = manifest_version(manifest, self.fields)
+        if not (self.root / version / "manifest.json").exists():
+            # 多个进程同时发现过期时只构建一次
+            with file_lock(self.root / "build"):
+                if not (self.root / version / "manifest.json").exists():
+                    self.build(version, manifest)
+        if self.current_version() != version:
+            write_text_atomic(self.root / CURRENT_FILE, version)
+        return Panel.open(self.root / version)
+
+    def build(self, version: str, manifest: Dict[str, List[int]]) -> Path:
+        table = self._load()
+        if table is None or table.num_rows == 0:
+            raise ValueError(f"存储中无 {self.freq} 数据: {self.store.base_dir}")
+        dates, date_idx = np.unique(table.column("trade_date").to_numpy(), return_inverse=True)
+        symbol_col = table.column("symbol")
+        if pa.types.is_dictionary(symbol_col.type):
+            symbol_col = symbol_col.cast(symbol_col.type.value_type)
+        symbols, symbol_idx = np.unique(symbol_col.to_numpy(zero_copy_only=False).astype(str), return_inverse=True)
+
+        target = self.root / version
+        staging = tmp_path(target)
+        staging.mkdir(parents=True)
+        try:
+            np.save(staging / "dates.npy", dates.astype(np.int32))
+            for name in self.fields:
+                # 直接写入 .npy 内存映射，避免再持有一份完整副本
+                array = np.lib.format.open_memmap(
+                    staging / f"{name}.npy", mode="w+", dtype=np.float64, shape=(len(dates), len(symbols))
+                )
+                array[:] = np.nan
+                values = table.column(name).cast(pa.float64()).fill_null(np.nan).to_numpy()
+                array[date_idx, symbol_idx] = values
+                array.flush()
+                del array
+            meta = {
+                "version": version,
+                "freq": self.freq,
+                "fields": list(self.fields),
+                "symbols": symbols.tolist(),
+                "start": int(dates[0]),
+                "end": int(dates[-1]),
+                "rows": table.num_rows,
+                "sources": len(manifest),
+            }
+            (staging / "manifest.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+            os.rename(staging, target)
+        finally:
+            if staging.exists():
+                shutil.rmtree(staging)
+        logger.info("Built panel %s: dates=%s symbols=%s fields=%s", version, len(dates), len(symbols), self.fields)
+        return target
+
+    def prune(self, keep: int = 2) -> List[str]:
+        """Delete all but the ``keep`` newest builds (and never ``CURRENT``); returns removed versions.
+
+        Processes that still map a removed build keep reading it: on POSIX the
+        unlinked files live until their last mapping is closed.
+        """
+        current = self.current_version()
+        builds = sorted(
+            (p for p in self.root.glob("*/manifest.json") if not p.parent.name.startswith(".")),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        removed = []
+        for path in builds[keep:]:
+            if path.parent.name == current:
+                continue
+            shutil.rmtree(path.parent, ignore_errors=True)
+            removed.append(path.parent.name)
+        return removed
+
+    def _load(self) -> Optional[pa.Table]:
+        columns = ["trade_date", "symbol", *self.fields]
+        if self.store.options.cross_section and self.freq == self.store.xsection.freq:
+            months = self.store.xsection.months()
+            if not months:
+                return None
+            start, end = months[0] * 100 + 1, months[-1] * 100 + 31
+            return self.store.xsection.read((start, end), self.fields)
+        parts = [(symbol, path) for symbol, freq, _, path in self.store.iter_partitions() if freq == self.freq]
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            tables = list(pool.map(lambda item: self.store._read_partition(item[1], item[0], columns), parts))
+        if not tables:
+            return None
+        return concat_tables(tables).unify_dictionaries()
@@ -7,6 +7,9 @@ from pathlib import Path
 from typing import Iterable, Optional, Sequence
 
 import pandas as pd
+import pyarrow as pa
+
+from core.data.tables import to_table
 
 
 @dataclass
@@ -21,6 +24,15 @@ class RetryConfig:
     backoff_seconds: float = 1.0
 
 
+@dataclass
+class LimitsConfig:
+    max_rows_per_call: int = 0  # 0 表示未知/不限
+    target_latency_seconds: float = 5.0
+    safety: float = 0.9
+    min_chunk_days: int = 1
+    max_chunk_days: int = 366 * 5
+
+
 @dataclass
 class ProviderConfig:
     username: Optional[str] = None
@@ -29,6 +41,8 @@ class ProviderConfig:
     timezone: str = "Asia/Shanghai"
     throttle: ThrottleConfig = field(default_factory=ThrottleConfig)
     retry: RetryConfig = field(default_factory=RetryConfig)
+    limits: LimitsConfig = field(default_factory=LimitsConfig)
+    options: dict = field(default_factory=dict)
 
 
 class DataProvider(ABC):
@@ -49,6 +63,21 @@ class DataProvider(ABC):
         """Fetch price data from the remote provider."""
         raise NotImplementedError
 
+    def get_price_table(
+        self,
+        symbol: str,
+        start: datetime,
+        end: datetime,
+        freq: str = "1d",
+        fields: Optional[Sequence[str]] = None,
+    ) -> pa.Table:
+        """Arrow variant of ``get_price`` used by the ingest path.
+
+        The default converts the DataFrame once; providers that can build
+        columns directly should override it (and derive ``get_price`` from it).
+        """
+        return to_table(self.get_price(symbol, start, end, freq=freq, fields=fields))
+
     def get_price_batch(
         self,
         symbols: Iterable[str],
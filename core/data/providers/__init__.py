@@ -1,3 +1,20 @@
 """Provider implementations for external data sources."""
 
-__all__ = []
+from __future__ import annotations
+
+from core.data.provider import DataProvider, ProviderConfig
+
+__all__ = ["create_provider"]
+
+
+def create_provider(name: str, config: ProviderConfig) -> DataProvider:
+    """Instantiate a provider by its config name (SDK imports stay lazy)."""
+    if name == "joinquant":
+        from core.data.providers.joinquant import JoinQuantProvider
+
+        return JoinQuantProvider(config)
+    if name == "replay":
+        from core.data.providers.replay import ReplayProvider
+
+        return ReplayProvider(config)
+    raise ValueError(f"未知的 provider: {name}")
@@ -5,7 +5,10 @@ import time
 from datetime import datetime
 from typing import Optional, Sequence
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
 from core.data.provider import DataProvider, ProviderConfig
 
@@ -68,12 +71,11 @@ class JoinQuantProvider(DataProvider):
         start_dt = self._normalize_dt(start)
         end_dt = self._normalize_dt(end)
         days = self._client.get_trade_days(start_dt, end_dt)
-        idx = pd.to_datetime(days)
-        if idx.tz is None:
-            idx = idx.tz_localize(self.config.timezone)
-        else:
-            idx = idx.tz_convert(self.config.timezone)
-        return idx.tz_convert("UTC").normalize()
+        idx = pd.DatetimeIndex(pd.to_datetime(days))
+        if idx.tz is not None:
+            idx = idx.tz_convert(self.config.timezone).tz_localize(None)
+        # 交易日标签：本地日期挂在 UTC 零点（与 TradingCalendarCache 约定一致）
+        return idx.normalize().tz_localize("UTC")
 
     def get_price(
         self,
@@ -83,6 +85,20 @@ class JoinQuantProvider(DataProvider):
         freq: str = "1d",
         fields: Optional[Sequence[str]] = None,
     ) -> pd.DataFrame:
+        table = self.get_price_table(symbol, start, end, freq=freq, fields=fields)
+        if table.num_rows == 0:
+            return pd.DataFrame()
+        return table.to_pandas()
+
+    def get_price_table(
+        self,
+        symbol: str,
+        start: datetime,
+        end: datetime,
+        freq: str = "1d",
+        fields: Optional[Sequence[str]] = None,
+    ) -> pa.Table:
+        """Build the canonical price table straight from the SDK frame's column arrays."""
         fields = fields or ["open", "high", "low", "close", "volume", "money"]
         jq_freq = self._map_freq(freq)
 
@@ -100,30 +116,40 @@ class JoinQuantProvider(DataProvider):
             fq="post",
         )
         if df is None or df.empty:
-            return pd.DataFrame()
+            return pa.table({})
 
-        df = df.reset_index()
-        timestamp_col = "index"
+        index = df.index
         if "time" in df:
-            timestamp_col = "time"
-        df = df.rename(columns={timestamp_col: "timestamp", "money": "turnover"})
-
-        df["timestamp"] = pd.to_datetime(df["timestamp"])
-        if df["timestamp"].dt.tz is None:
-            df["timestamp"] = df["timestamp"].dt.tz_localize(self.config.timezone)
-        df["timestamp"] = df["timestamp"].dt.tz_convert("UTC")
-
-        df["symbol"] = symbol
-        numeric_cols = ["open", "high", "low", "close", "volume", "turnover"]
-        for col in numeric_cols:
-            if col in df:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
+            index = pd.DatetimeIndex(df["time"])
+        index = pd.DatetimeIndex(index)
+        if index.tz is None:
+            index = index.tz_localize(self.config.timezone)
+        ts = index.tz_convert("UTC").as_unit("ns")
+
+        valid = ~ts.isna()
+        # SDK 按时间升序返回；仅在乱序时才排序
+        order = None if ts[valid].is_monotonic_increasing else np.argsort(ts.asi8, kind="stable")
+        columns = {
+            "symbol": pa.array(np.full(len(df), symbol, dtype=object), type=pa.string()),
+            "timestamp": pa.array(ts.asi8, type=pa.timestamp("ns", tz="UTC"), mask=~valid),
+        }
+        for col, src in (
+            ("open", "open"),
+            ("high", "high"),
+            ("low", "low"),
+            ("close", "close"),
+            ("volume", "volume"),
+            ("turnover", "money"),
+        ):
+            if src in df:
+                values = pd.to_numeric(df[src], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+                columns[col] = pa.array(values, type=pa.float64())
             else:
-                df[col] = pd.NA
-
-        df = df[["symbol", "timestamp", "open", "high", "low", "close", "volume", "turnover"]]
-        df = df.dropna(subset=["timestamp"])
-        return df.sort_values("timestamp").reset_index(drop=True)
+                columns[col] = pa.nulls(len(df), type=pa.float64())
+        table = pa.table(columns)
+        if order is not None:
+            table = table.take(pa.array(order))
+        return table.filter(pc.is_valid(table.column("timestamp")))
 
     def _normalize_dt(self, dt: datetime) -> datetime:
         ts = pd.Timestamp(dt)
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import zlib
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from core.data.calendar import TradingCalendarCache
+from core.data.provider import DataProvider, ProviderConfig
+from core.data.sessions import SessionSchedule
+from core.data.storage import LocalParquetStore
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ["symbol", "timestamp", "open", "high", "low", "close", "volume", "turnover"]
+
+
+class SimulatedProviderError(RuntimeError):
+    """Injected failure raised by ReplayProvider."""
+
+
+class QuotaExceededError(SimulatedProviderError):
+    """Raised when the simulated per-minute call quota is exhausted."""
+
+
+@dataclass
+class LatencyConfig:
+    distribution: str = "none"  # none / fixed / uniform / lognormal
+    mean_seconds: float = 0.0
+    sigma: float = 0.5
+    per_row_ms: float = 0.0
+
+    def sample(self, rng: np.random.Generator, rows: int) -> float:
+        dist = self.distribution.lower()
+        if dist == "none":
+            base = 0.0
+        elif dist == "fixed":
+            base = self.mean_seconds
+        elif dist == "uniform":
+            base = rng.uniform(self.mean_seconds * (1 - self.sigma), self.mean_seconds * (1 + self.sigma))
+        elif dist == "lognormal":
+            # 保持均值为 mean_seconds 的对数正态分布
+            base = self.mean_seconds * float(np.exp(self.sigma * rng.standard_normal() - self.sigma**2 / 2))
+        else:
+            raise ValueError(f"不支持的延迟分布: {self.distribution}")
+        return max(0.0, base) + rows * self.per_row_ms / 1000.0
+
+
+@dataclass
+class SimulationConfig:
+    source: str = "synthetic"  # synthetic / fixtures
+    fixtures_dir: Optional[Path] = None
+    synthetic_symbols: int = 100
+    seed: int = 0
+    latency: LatencyConfig = field(default_factory=LatencyConfig)
+    error_rate: float = 0.0
+    quota_per_minute: int = 0
+    row_limit: int = 0
+
+    @classmethod
+    def from_options(cls, options: dict) -> "SimulationConfig":
+        latency_cfg = options.get("latency", {}) or {}
+        fixtures_dir = options.get("fixtures_dir")
+        return cls(
+            source=str(options.get("source", "synthetic")),
+            fixtures_dir=Path(fixtures_dir) if fixtures_dir else None,
+            synthetic_symbols=int(options.get("synthetic_symbols", 100)),
+            seed=int(options.get("seed", 0)),
+            latency=LatencyConfig(
+                distribution=str(latency_cfg.get("distribution", "none")),
+                mean_seconds=float(latency_cfg.get("mean_seconds", 0.0)),
+                sigma=float(latency_cfg.get("sigma", 0.5)),
+                per_row_ms=float(latency_cfg.get("per_row_ms", 0.0)),
+            ),
+            error_rate=float(options.get("error_rate", 0.0)),
+            quota_per_minute=int(options.get("quota_per_minute", 0)),
+            row_limit=int(options.get("row_limit", 0)),
+        )
+
+
+@dataclass
+class ReplayStats:
+    calls: int = 0
+    rows: int = 0
+    errors: int = 0
+    quota_rejections: int = 0
+    truncated: int = 0
+    latency_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class ReplayProvider(DataProvider):
+    """Offline provider serving recorded Parquet fixtures or synthetic bars.
+
+    Output format, per-call row truncation, quota errors and network latency
+    mimic JQData so MarketFetcher throughput can be measured without a live
+    account. Safe to share between threads.
+    """
+
+    name = "replay"
+
+    def __init__(self, config: ProviderConfig) -> None:
+        super().__init__(config)
+        self.sim = SimulationConfig.from_options(config.options.get("simulation", {}) or {})
+        self.stats = ReplayStats()
+        self._rng = np.random.default_rng(self.sim.seed)
+        self._lock = threading.Lock()
+        self._call_times: deque[float] = deque()
+        self._min_interval = 0.0
+        if config.throttle.max_per_minute > 0:
+            self._min_interval = 60.0 / float(config.throttle.max_per_minute)
+        self._next_available = 0.0
+        self._frames: dict[tuple[str, str], pd.DataFrame] = {}
+        self._minute_offsets = SessionSchedule.from_config(config).bar_offsets("1m")
+        self._fixtures: Optional[LocalParquetStore] = None
+        if self.sim.source == "fixtures":
+            if self.sim.fixtures_dir is None:
+                raise ValueError("replay provider 使用 fixtures 时需配置 simulation.fixtures_dir")
+            self._fixtures = LocalParquetStore(self.sim.fixtures_dir, timezone=config.timezone)
+        elif self.sim.source != "synthetic":
+            raise ValueError(f"不支持的 replay 数据源: {self.sim.source}")
+
+    @staticmethod
+    def _map_freq(freq: str) -> str:
+        freq = freq.lower()
+        if freq in ("1d", "d", "day", "daily"):
+            return "1d"
+        if freq in ("1m", "minute", "min"):
+            return "1m"
+        raise ValueError(f"不支持的频率: {freq}")
+
+    def list_securities(self, types: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        self._before_call()
+        df = pd.DataFrame()
+        if self._fixtures is not None:
+            cached = sorted((self._fixtures.base_dir / "_securities").glob("*.parquet"))
+            if cached:
+                df = pd.read_parquet(cached[0])
+            else:
+                symbols = sorted(p.name.replace("symbol=", "") for p in self._fixtures.base_dir.glob("symbol=*"))
+                df = pd.DataFrame({"symbol": symbols, "type": "stock"})
+        else:
+            symbols = [f"SIM{i:06d}.XSHE" for i in range(self.sim.synthetic_symbols)]
+            df = pd.DataFrame(
+                {
+                    "symbol": symbols,
+                    "display_name": symbols,
+                    "name": symbols,
+                    "start_date": pd.Timestamp("2005-01-04"),
+                    "end_date": pd.Timestamp("2200-01-01"),
+                    "type": "stock",
+                }
+            )
+        if types and "type" in df:
+            df = df[df["type"].isin(list(types))].reset_index(drop=True)
+        return df
+
+    def get_trade_days(self, start: datetime, end: datetime) -> pd.DatetimeIndex:
+        self._before_call()
+        start_dt = self._normalize_dt(start)
+        end_dt = self._normalize_dt(end)
+        if self._fixtures is not None:
+            cached = sorted((self._fixtures.base_dir / "_calendar").glob("*.parquet"))
+            if cached:
+                idx = TradingCalendarCache._to_index(pd.read_parquet(cached[0])["trade_date"])
+                lo = TradingCalendarCache._to_utc_midnight(start)
+                hi = TradingCalendarCache._to_utc_midnight(end)
+                return idx[(idx >= lo) & (idx <= hi)]
+        days = pd.bdate_range(start_dt.date(), end_dt.date())
+        # 与 JoinQuantProvider 一致：本地日期挂在 UTC 零点
+        return days.tz_localize("UTC")
+
+    def get_price(
+        self,
+        symbol: str,
+        start: datetime,
+        end: datetime,
+        freq: str = "1d",
+        fields: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        freq_key = self._map_freq(freq)
+        start_dt = self._normalize_dt(start)
+        end_dt = self._normalize_dt(end)
+        self._before_call(inject_errors=True)
+
+        if self._fixtures is not None:
+            df = self._fixture_frame(symbol, freq_key)
+        else:
+            df = self._synthesize(symbol, freq_key, start_dt, end_dt)
+        if not df.empty:
+            local = df["timestamp"].dt.tz_convert(self.config.timezone).dt.tz_localize(None)
+            if freq_key == "1d":
+                mask = (local >= start_dt.normalize()) & (local <= end_dt.normalize())
+            else:
+                mask = (local >= start_dt) & (local <= end_dt)
+            df = df[mask.to_numpy()].reset_index(drop=True)
+
+        truncated = False
+        if self.sim.row_limit and len(df) > self.sim.row_limit:
+            df = df.iloc[: self.sim.row_limit].reset_index(drop=True)
+            truncated = True
+            logger.debug("Truncated %s %s result to %s rows", symbol, freq_key, self.sim.row_limit)
+
+        with self._lock:
+            delay = self.sim.latency.sample(self._rng, len(df))
+            self.stats.rows += len(df)
+            self.stats.truncated += int(truncated)
+            self.stats.latency_seconds += delay
+        if delay > 0:
+            time.sleep(delay)
+
+        if df.empty:
+            return pd.DataFrame()
+        return df
+
+    def _before_call(self, inject_errors: bool = False) -> None:
+        """Client-side throttle, then quota check and optional error injection."""
+        with self._lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self._min_interval > 0:
+                wait = max(0.0, self._next_available - now)
+                self._next_available = max(now, self._next_available) + self._min_interval
+        if wait > 0:
+            time.sleep(wait)
+
+        with self._lock:
+            now = time.monotonic()
+            self.stats.calls += 1
+            if self.sim.quota_per_minute > 0:
+                while self._call_times and now - self._call_times[0] >= 60.0:
+                    self._call_times.popleft()
+                if len(self._call_times) >= self.sim.quota_per_minute:
+                    self.stats.quota_rejections += 1
+                    raise QuotaExceededError(f"超过每分钟调用配额 {self.sim.quota_per_minute}")
+                self._call_times.append(now)
+            if inject_errors and self.sim.error_rate > 0 and self._rng.random() < self.sim.error_rate:
+                self.stats.errors += 1
+                raise SimulatedProviderError("模拟的数据源异常")
+
+    def _fixture_frame(self, symbol: str, freq_key: str) -> pd.DataFrame:
+        key = (symbol, freq_key)
+        with self._lock:
+            cached = self._frames.get(key)
+        if cached is not None:
+            return cached
+        assert self._fixtures is not None
+        df = self._fixtures.load(symbol, freq_key)
+        if not df.empty:
+            df["symbol"] = symbol
+            for col in PRICE_COLUMNS:
+                if col not in df:
+                    df[col] = np.nan
+            df = df[PRICE_COLUMNS].sort_values("timestamp").reset_index(drop=True)
+        with self._lock:
+            self._frames[key] = df
+        return df
+
+    def _synthesize(self, symbol: str, freq_key: str, start_dt: pd.Timestamp, end_dt: pd.Timestamp) -> pd.DataFrame:
+        days = pd.bdate_range(start_dt.date(), end_dt.date())
+        if days.empty:
+            return pd.DataFrame(columns=PRICE_COLUMNS)
+        key = zlib.crc32(symbol.encode("utf-8"))
+        bars = len(self._minute_offsets)
+        closes = np.empty((len(days), bars))
+        volumes = np.empty((len(days), bars))
+        base = 5.0 + key % 95
+        phase = (key % 628) / 100.0
+        for i, day in enumerate(days):
+            # 按 (seed, symbol, 日期) 播种，任意请求区间拿到的同一根 bar 完全一致
+            ordinal = day.toordinal()
+            rng = np.random.default_rng([self.sim.seed, key, ordinal])
+            level = base * np.exp(0.25 * np.sin(ordinal / 60.0 + phase) + 0.1 * np.sin(ordinal / 9.0 + phase))
+            closes[i] = level * np.exp(np.cumsum(rng.normal(0.0, 0.0015, size=bars)))
+            volumes[i] = rng.integers(10, 1000, size=bars) * 100
+        opens = np.concatenate([closes[:, :1] / np.exp(0.0005), closes[:, :-1]], axis=1)
+        spread = 1.0 + np.abs(np.sin(closes * 1000.0)) * 0.0008
+        highs = np.maximum(opens, closes) * spread
+        lows = np.minimum(opens, closes) / spread
+        turnover = volumes * closes
+
+        if freq_key == "1d":
+            local_ts = days
+            data = {
+                "open": opens[:, 0],
+                "high": highs.max(axis=1),
+                "low": lows.min(axis=1),
+                "close": closes[:, -1],
+                "volume": volumes.sum(axis=1),
+                "turnover": turnover.sum(axis=1),
+            }
+        else:
+            local_ts = pd.DatetimeIndex((days.values[:, None] + self._minute_offsets.values[None, :]).ravel())
+            data = {
+                "open": opens.ravel(),
+                "high": highs.ravel(),
+                "low": lows.ravel(),
+                "close": closes.ravel(),
+                "volume": volumes.ravel(),
+                "turnover": turnover.ravel(),
+            }
+        timestamps = local_ts.tz_localize(self.config.timezone).tz_convert("UTC")
+        df = pd.DataFrame({"symbol": symbol, "timestamp": timestamps, **data})
+        return df[PRICE_COLUMNS]
+
+    def _normalize_dt(self, dt: datetime) -> pd.Timestamp:
+        ts = pd.Timestamp(dt)
+        if ts.tzinfo is None:
+            ts = ts.tz_localize(self.config.timezone)
+        else:
+            ts = ts.tz_convert(self.config.timezone)
+        return ts.tz_localize(None)
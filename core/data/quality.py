@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from core.data.fileio import atomic_path
+from core.data.gaps import GapScanner
+from core.data.sessions import PERIOD_FREQS, SessionSchedule, freq_minutes
+from core.data.storage import LocalParquetStore, StorageConfig
+
+logger = logging.getLogger(__name__)
+
+QUALITY_DIR = "_quality"
+REPORT_FILE = "report.parquet"
+# 只读检查需要的列（列投影），symbol 由分区路径给出
+SCAN_COLUMNS = ["timestamp", "trade_date", "open", "high", "low", "close", "volume"]
+ISSUE_COLUMNS = [
+    "nan_rows",
+    "duplicates",
+    "ohlc_violations",
+    "nonpositive_price",
+    "nonpositive_volume",
+    "off_session",
+    "jumps",
+    "missing_bars",
+]
+
+
+@dataclass
+class QualityConfig:
+    # 相邻 bar 收盘价变动超过该比例视为异常跳变（A 股涨跌停 10%/20%，留出除权等余量）
+    jump_threshold: float = 0.25
+    # 分钟线跳变阈值（单根 bar 正常波动远小于日线）
+    intraday_jump_threshold: float = 0.1
+
+
+@dataclass
+class SymbolQuality:
+    """Check counts of one symbol/freq (all zero is clean)."""
+
+    symbol: str
+    freq: str
+    rows: int = 0
+    first: Optional[pd.Timestamp] = None
+    last: Optional[pd.Timestamp] = None
+    nan_rows: int = 0
+    duplicates: int = 0
+    ohlc_violations: int = 0
+    nonpositive_price: int = 0
+    nonpositive_volume: int = 0
+    off_session: int = 0
+    jumps: int = 0
+    max_jump: float = 0.0
+    gap_ranges: int = 0
+    missing_bars: int = 0
+    error: str = ""
+    issues: int = field(init=False, default=0)
+
+    def __post_init__(self) -> None:
+        self.issues = sum(getattr(self, name) for name in ISSUE_COLUMNS)
+
+
+def check_table(
+    table: Optional[pa.Table],
+    symbol: str,
+    freq: str,
+    scanner: GapScanner,
+    config: QualityConfig,
+) -> SymbolQuality:
+    """Run all checks on one symbol/freq table with NumPy array ops."""
+    if table is None or table.num_rows == 0:
+        return SymbolQuality(symbol=symbol, freq=freq)
+    ts = table.column("timestamp").to_numpy()
+    order = np.argsort(ts, kind="stable")
+    ts = ts[order]
+    o, h, l, c = (_float_values(table, name)[order] for name in ("open", "high", "low", "close"))
+    volume = _float_values(table, "volume")[order]
+    prices = np.vstack([o, h, l, c])
+
+    nan_rows = int(np.isnan(prices).any(axis=0).sum())
+    duplicates = int(len(ts) - len(np.unique(ts)))
+    with np.errstate(invalid="ignore"):
+        # NaN 比较为 False，不计入违例
+        body_low = np.fmin(o, c)
+        body_high = np.fmax(o, c)
+        ohlc = (l > body_low) | (h < body_high) | (l > h)
+        nonpositive_price = (prices <= 0).any(axis=0)
+        nonpositive_volume = volume <= 0
+        returns = c[1:] / c[:-1] - 1.0
+    threshold = config.jump_threshold if freq_minutes(freq) is None else config.intraday_jump_threshold
+    abs_returns = np.abs(returns[np.isfinite(returns)])
+    stored_days, positions = scanner.grid_positions(table.take(pa.array(order)), freq)
+    # 非交易日的 bar 或不在时段网格上的 bar
+    off_session = (positions < 0) | ~np.isin(stored_days, scanner.trade_days)
+    gaps = scanner.table_gaps(table, freq, symbol=symbol)
+    return SymbolQuality(
+        symbol=symbol,
+        freq=freq,
+        rows=len(ts),
+        first=pd.Timestamp(ts[0], tz="UTC"),
+        last=pd.Timestamp(ts[-1], tz="UTC"),
+        nan_rows=nan_rows,
+        duplicates=duplicates,
+        ohlc_violations=int(ohlc.sum()),
+        nonpositive_price=int(nonpositive_price.sum()),
+        nonpositive_volume=int(nonpositive_volume.sum()),
+        off_session=int(off_session.sum()),
+        jumps=int((abs_returns > threshold).sum()),
+        max_jump=float(abs_returns.max()) if len(abs_returns) else 0.0,
+        gap_ranges=len(gaps),
+        missing_bars=sum(g.bars for g in gaps),
+    )
+
+
+def _float_values(table: pa.Table, name: str) -> np.ndarray:
+    # 空值转为 NaN（整型 volume 含空值时同样适用）
+    return table.column(name).cast(pa.float64()).fill_null(np.nan).to_numpy()
+
+
+def load_report(base_dir: Path) -> pd.DataFrame:
+    """The saved per-symbol report (empty when no scan has run)."""
+    path = Path(base_dir) / QUALITY_DIR / REPORT_FILE
+    if not path.exists():
+        return pd.DataFrame()
+    return pd.read_parquet(path)
+
+
+def report_generated_at(base_dir: Path) -> Optional[str]:
+    path = Path(base_dir) / QUALITY_DIR / REPORT_FILE
+    if not path.exists():
+        return None
+    value = (pq.read_schema(path).metadata or {}).get(b"quant.quality.generated_at")
+    return value.decode() if value else None
+
+
+# 进程池内每个 worker 持有一个只读 store 与缺口扫描器
+_worker_state: dict = {}
+
+
+def _init_worker(
+    base_dir: Path, timezone: str, options: StorageConfig, trade_days: np.ndarray, schedule: SessionSchedule
+) -> None:
+    store = LocalParquetStore(Path(base_dir), timezone=timezone, options=options)
+    _worker_state["store"] = store
+    _worker_state["scanner"] = GapScanner(store, pd.DatetimeIndex(trade_days), schedule)
+
+
+def _scan_one(task: Tuple[str, str, QualityConfig]) -> SymbolQuality:
+    symbol, freq, config = task
+    try:
+        table = _worker_state["store"].load_table(symbol, freq, columns=SCAN_COLUMNS)
+        return check_table(table, symbol, freq, _worker_state["scanner"], config)
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("Quality scan failed for %s %s", symbol, freq)
+        return SymbolQuality(symbol=symbol, freq=freq, error=str(exc))
+
+
+class QualityScanner:
+    """Store-wide data quality scan in a process pool.
+
+    Each task reads one symbol/freq with column projection and runs the
+    vectorised checks in ``check_table`` (OHLC consistency, non-positive
+    prices/volume, duplicate timestamps, bars outside the calendar/session
+    grid, close-to-close jumps and calendar gaps). Results are kept as one
+    row per symbol/freq in ``_quality/report.parquet``; scans of a subset
+    replace only those rows.
+    """
+
+    def __init__(
+        self,
+        store: LocalParquetStore,
+        trade_days: Iterable,
+        schedule: Optional[SessionSchedule] = None,
+        config: Optional[QualityConfig] = None,
+    ) -> None:
+        self.store = store
+        self.trade_days = pd.DatetimeIndex(trade_days)
+        self.schedule = schedule or SessionSchedule(timezone=store.timezone)
+        self.config = config or QualityConfig()
+        self.report_path = Path(store.base_dir) / QUALITY_DIR / REPORT_FILE
+
+    def tasks(self, symbols: Optional[Iterable[str]] = None, freqs: Optional[Sequence[str]] = None) -> List[Tuple[str, str]]:
+        wanted = set(symbols) if symbols is not None else None
+        pairs = {
+            (symbol, freq)
+            for symbol, freq, _, _ in self.store.iter_partitions()
+            # 周/月线为派生数据，随基础频率检查
+            if (wanted is None or symbol in wanted) and (not freqs or freq in freqs) and freq not in PERIOD_FREQS
+        }
+        return sorted(pairs)
+
+    def run(
+        self,
+        symbols: Optional[Iterable[str]] = None,
+        freqs: Optional[Sequence[str]] = None,
+        workers: int = 4,
+        save: bool = True,
+    ) -> pd.DataFrame:
+        tasks = [(symbol, freq, self.config) for symbol, freq in self.tasks(symbols, freqs)]
+        with ProcessPoolExecutor(
+            max_workers=max(1, workers),
+            initializer=_init_worker,
+            initargs=(self.store.base_dir, self.store.timezone, self.store.options, self.trade_days.to_numpy(), self.schedule),
+        ) as pool:
+            results = list(pool.map(_scan_one, tasks, chunksize=max(1, len(tasks) // (max(1, workers) * 8))))
+        report = pd.DataFrame([asdict(r) for r in results])
+        if save:
+            report = self.save(report)
+        return report
+
+    def load(self) -> pd.DataFrame:
+        return load_report(self.store.base_dir)
+
+    def save(self, report: pd.DataFrame) -> pd.DataFrame:
+        existing = self.load()
+        if not existing.empty and not report.empty:
+            scanned = pd.MultiIndex.from_frame(report[["symbol", "freq"]])
+            keep = ~pd.MultiIndex.from_frame(existing[["symbol", "freq"]]).isin(scanned)
+            report = pd.concat([existing[keep], report], ignore_index=True)
+        report = report.sort_values(["freq", "symbol"]).reset_index(drop=True)
+        table = pa.Table.from_pandas(report, preserve_index=False)
+        metadata = {
+            b"quant.quality.generated_at": datetime.now().isoformat(timespec="seconds").encode(),
+            b"quant.quality.config": json.dumps(asdict(self.config)).encode(),
+        }
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+        with atomic_path(self.report_path) as tmp:
+            pq.write_table(table, tmp)
+        return report
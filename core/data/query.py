@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from core.data.schema import PRICE_SCHEMA
+from core.data.storage import LocalParquetStore
+from core.data.xsection import XSECTION_DIR, DateLike, to_trade_date
+
+logger = logging.getLogger(__name__)
+
+TABLE_PREFIX = "bars_"
+XSECTION_TABLE = "xsection_1d"
+DEFAULT_MAX_ROWS = 10_000
+DEFAULT_TIMEOUT_SECONDS = 30.0
+# 查询结果按批拉取，超出行数上限即停止（不物化全部结果）
+FETCH_BATCH_ROWS = 8192
+
+# symbol 在分区路径与（未开启 drop_partition_columns 时的）文件中都有，统一按字符串读取
+PARTITIONING = ds.partitioning(
+    pa.schema([("symbol", pa.string()), ("freq", pa.string()), ("year", pa.int32())]), flavor="hive"
+)
+XSECTION_PARTITIONING = ds.partitioning(pa.schema([("freq", pa.string()), ("month", pa.string())]), flavor="hive")
+_FREQ_NAME = re.compile(r"^[0-9a-z]+$")
+
+
+def dataset_schema(partition_fields: Sequence[pa.Field]) -> pa.Schema:
+    """v2 columns plus the path-derived ones, as exposed by the query layer."""
+    fields = [pa.field("symbol", pa.string()) if f.name == "symbol" else f for f in PRICE_SCHEMA]
+    return pa.schema(fields + [f for f in partition_fields if f.name not in PRICE_SCHEMA.names])
+
+
+def _import_duckdb():
+    try:
+        import duckdb
+    except ImportError as exc:
+        raise ImportError("SQL 查询需要 duckdb：pip install duckdb") from exc
+    return duckdb
+
+
+@dataclass
+class QueryResult:
+    table: pa.Table
+    truncated: bool
+    elapsed: float
+
+    def to_frame(self) -> pd.DataFrame:
+        return self.table.to_pandas()
+
+
+class QueryEngine:
+    """Analytical queries over a ``LocalParquetStore`` without loading per symbol.
+
+    Every stored freq is exposed as an Arrow dataset over the
+    ``symbol=/freq=/year=`` layout (``symbol`` and ``year`` come from the
+    path, so filters on them prune whole partitions; ``_``-prefixed
+    directories are not part of it). ``scan`` uses the datasets directly;
+    ``sql`` registers them in an in-memory DuckDB connection as
+    ``bars_<freq>`` (``bars_1d``, ``bars_1m``, derived ``bars_5m``...) plus
+    ``xsection_1d`` for the month files, so filters and projections are
+    pushed into multi-threaded Arrow scans and joins/window functions run
+    in DuckDB's vectorised executor. Only single read-only statements are
+    accepted and file access from SQL is disabled.
+    """
+
+    def __init__(self, store: LocalParquetStore, threads: Optional[int] = None) -> None:
+        self.store = store
+        self.threads = threads
+
+    def freqs(self) -> List[str]:
+        """Freqs with at least one stored partition."""
+        names = {path.name.split("=", 1)[1] for path in self.store.base_dir.glob("symbol=*/freq=*")}
+        return sorted(name for name in names if _FREQ_NAME.match(name))
+
+    def dataset(self, freq: str) -> ds.Dataset:
+        """Arrow dataset over all partitions of ``freq`` (file list taken now; later writes need a new one)."""
+        paths = [str(p) for p in sorted(self.store.base_dir.glob(f"symbol=*/freq={freq}/year=*/data.parquet"))]
+        return ds.dataset(
+            paths,
+            format="parquet",
+            partitioning=PARTITIONING,
+            partition_base_dir=str(self.store.base_dir),
+            schema=dataset_schema(PARTITIONING.schema),
+        )
+
+    def xsection_dataset(self) -> Optional[ds.Dataset]:
+        root = self.store.base_dir / XSECTION_DIR
+        paths = [str(p) for p in sorted(root.glob("freq=1d/month=*/data.parquet"))]
+        if not paths:
+            return None
+        return ds.dataset(
+            paths,
+            format="parquet",
+            partitioning=XSECTION_PARTITIONING,
+            partition_base_dir=str(root),
+            schema=dataset_schema(XSECTION_PARTITIONING.schema),
+        )
+
+    def scan(
+        self,
+        freq: str = "1d",
+        columns: Optional[Sequence[str]] = None,
+        symbols: Optional[Iterable[str]] = None,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+    ) -> pa.Table:
+        """Rows of many symbols in one parallel scan; ``start``/``end`` bound ``trade_date`` (inclusive).
+
+        Symbol and year filters skip non-matching partitions without opening them.
+        """
+        expr = None
+        conditions = []
+        if symbols is not None:
+            conditions.append(ds.field("symbol").isin(list(symbols)))
+        if start is not None:
+            lo = to_trade_date(start, self.store.timezone)
+            conditions += [ds.field("year") >= lo // 10000, ds.field("trade_date") >= lo]
+        if end is not None:
+            hi = to_trade_date(end, self.store.timezone)
+            conditions += [ds.field("year") <= hi // 10000, ds.field("trade_date") <= hi]
+        for condition in conditions:
+            expr = condition if expr is None else expr & condition
+        return self.dataset(freq).to_table(columns=list(columns) if columns is not None else None, filter=expr)
+
+    def tables(self) -> Dict[str, ds.Dataset]:
+        """SQL table name -> dataset for everything currently stored."""
+        tables = {f"{TABLE_PREFIX}{freq}": self.dataset(freq) for freq in self.freqs()}
+        xsection = self.xsection_dataset()
+        if xsection is not None:
+            tables[XSECTION_TABLE] = xsection
+        return tables
+
+    def connect(self):
+        """Locked-down DuckDB connection with the store tables registered."""
+        duckdb = _import_duckdb()
+        con = duckdb.connect(":memory:")
+        for name, dataset in self.tables().items():
+            con.register(name, dataset)
+        if self.threads:
+            con.execute(f"SET threads = {int(self.threads)}")
+        # 注册的 Arrow 数据集不受影响；禁止 SQL 内直接读写任意文件，并锁定配置
+        con.execute("SET enable_external_access = false")
+        con.execute("SET lock_configuration = true")
+        return con
+
+    def sql(
+        self,
+        query: str,
+        max_rows: Optional[int] = DEFAULT_MAX_ROWS,
+        timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS,
+    ) -> QueryResult:
+        """Run one SELECT; stops after ``max_rows`` rows and interrupts after ``timeout`` seconds (TimeoutError)."""
+        duckdb = _import_duckdb()
+        con = self.connect()
+        try:
+            statements = con.extract_statements(query)
+            if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+                raise ValueError("只支持单条只读 SELECT 语句")
+            timer = threading.Timer(timeout, con.interrupt) if timeout else None
+            started = time.perf_counter()
+            if timer is not None:
+                timer.start()
+            try:
+                reader = con.execute(statements[0].query).fetch_record_batch(FETCH_BATCH_ROWS)
+                batches, rows, truncated = [], 0, False
+                for batch in reader:
+                    batches.append(batch)
+                    rows += batch.num_rows
+                    if max_rows is not None and rows > max_rows:
+                        truncated = True
+                        break
+            except duckdb.InterruptException as exc:
+                raise TimeoutError(f"查询超过 {timeout}s，已中断") from exc
+            finally:
+                if timer is not None:
+                    timer.cancel()
+            table = pa.Table.from_batches(batches, schema=reader.schema)
+            if truncated:
+                table = table.slice(0, max_rows)
+            elapsed = time.perf_counter() - started
+            logger.debug("SQL returned %s rows (truncated=%s) in %.3fs", table.num_rows, truncated, elapsed)
+            return QueryResult(table=table, truncated=truncated, elapsed=elapsed)
+        finally:
+            con.close()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# 存储格式版本：
+#   1 = 早期格式（pandas 直接落盘，列类型随 provider 而定，无元数据）
+#   2 = 规范格式（本模块定义的列类型 + 文件级元数据）
+SCHEMA_VERSION = 2
+VERSION_KEY = b"quant.schema_version"
+TIMEZONE_KEY = b"quant.timezone"
+
+PRICE_FIELDS = [
+    pa.field("symbol", pa.dictionary(pa.int32(), pa.string())),
+    pa.field("timestamp", pa.timestamp("ns", tz="UTC")),
+    pa.field("trade_date", pa.int32()),
+    pa.field("open", pa.float64()),
+    pa.field("high", pa.float64()),
+    pa.field("low", pa.float64()),
+    pa.field("close", pa.float64()),
+    pa.field("volume", pa.int64()),
+    pa.field("turnover", pa.float64()),
+]
+PRICE_SCHEMA = pa.schema(PRICE_FIELDS)
+
+
+def schema_version(schema: pa.Schema) -> int:
+    """Storage format version recorded in a file's schema metadata (1 when absent)."""
+    metadata = schema.metadata or {}
+    try:
+        return int(metadata.get(VERSION_KEY, b"1"))
+    except ValueError:
+        return 1
+
+
+def is_current(schema: pa.Schema, timezone: str) -> bool:
+    return schema_version(schema) == SCHEMA_VERSION and (schema.metadata or {}).get(TIMEZONE_KEY) == timezone.encode()
+
+
+def conform(table: pa.Table, symbol: Optional[str] = None, timezone: str = "Asia/Shanghai") -> pa.Table:
+    """Cast a price table to the v2 layout.
+
+    ``timestamp`` must already be ``timestamp[ns, UTC]`` (see
+    ``core.data.tables.to_table``). ``trade_date`` is derived as the
+    exchange-local ``YYYYMMDD`` of the bar; ``volume`` is rounded to int64;
+    missing canonical columns are filled with nulls (``symbol`` from the
+    argument) and extra columns are kept after the canonical ones.
+    """
+    if is_current(table.schema, timezone):
+        return table
+    n = table.num_rows
+    names = set(table.column_names)
+    columns = []
+    for field in PRICE_FIELDS:
+        if field.name == "trade_date":
+            columns.append(trade_date_column(table.column("timestamp"), timezone))
+            continue
+        if field.name not in names:
+            if field.name == "symbol" and symbol is not None:
+                columns.append(pa.array(np.full(n, symbol, dtype=object), type=pa.string()).dictionary_encode())
+            else:
+                columns.append(pa.nulls(n, type=field.type))
+            continue
+        column = table.column(field.name)
+        if field.name == "volume" and pa.types.is_floating(column.type):
+            column = pc.round(column)
+            column = pc.if_else(pc.is_nan(column), pa.scalar(None, column.type), column)
+        if field.name == "symbol" and not pa.types.is_dictionary(column.type):
+            column = column.cast(pa.string()).dictionary_encode()
+        columns.append(column.cast(field.type))
+    extras = [name for name in table.column_names if name not in PRICE_SCHEMA.names]
+    fields = PRICE_FIELDS + [table.schema.field(name) for name in extras]
+    columns += [table.column(name) for name in extras]
+    schema = pa.schema(fields, metadata={VERSION_KEY: str(SCHEMA_VERSION).encode(), TIMEZONE_KEY: timezone.encode()})
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def trade_date_column(timestamps, timezone: str) -> pa.ChunkedArray:
+    """Exchange-local ``YYYYMMDD`` (int32) of UTC timestamps, computed with Arrow kernels."""
+    local = timestamps.cast(pa.timestamp("ns", tz=timezone))
+    value = pc.add(
+        pc.add(pc.multiply(pc.year(local), 10000), pc.multiply(pc.month(local), 100)),
+        pc.day(local),
+    )
+    return value.cast(pa.int32())
+
+
+def trade_date_ints(labels: Iterable) -> np.ndarray:
+    """``YYYYMMDD`` ints of trade-date labels (local date at UTC midnight)."""
+    idx = pd.DatetimeIndex(labels)
+    if idx.tz is not None:
+        idx = idx.tz_convert("UTC").tz_localize(None)
+    return (idx.year * 10000 + idx.month * 100 + idx.day).to_numpy(dtype=np.int32)
+
+
+def trade_date_labels(values: Iterable[int]) -> pd.DatetimeIndex:
+    """Inverse of ``trade_date_ints``."""
+    return pd.DatetimeIndex(pd.to_datetime(np.asarray(values, dtype=np.int64).astype(str), format="%Y%m%d"), tz="UTC")
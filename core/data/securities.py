@@ -5,6 +5,8 @@ from typing import Optional
 
 import pandas as pd
 
+from core.data.fileio import write_parquet_atomic
+
 
 class SecuritiesCache:
     """Simple local cache for securities list."""
@@ -23,5 +25,4 @@ class SecuritiesCache:
         return pd.DataFrame()
 
     def save(self, df: pd.DataFrame) -> None:
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_parquet(self.path, index=False)
+        write_parquet_atomic(df, self.path)
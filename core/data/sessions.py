@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.data.provider import ProviderConfig
+
+DAILY_FREQS = ("1d", "d", "day", "daily")
+# 周线/月线：只能由日线派生（LocalParquetStore 的 derived 物化），没有交易时段网格
+PERIOD_FREQS = ("1w", "1mo")
+_MINUTE_RE = re.compile(r"^(\d+)\s*(m|min|minute)$")
+
+
+def freq_minutes(freq: str) -> Optional[int]:
+    """Bar length in minutes for intraday freqs (``1m``/``5m``/``60m``...), None for daily and longer."""
+    freq = freq.lower()
+    if freq in DAILY_FREQS or freq in PERIOD_FREQS:
+        return None
+    if freq in ("minute", "min"):
+        return 1
+    match = _MINUTE_RE.match(freq)
+    if not match:
+        raise ValueError(f"不支持的频率: {freq}")
+    return int(match.group(1))
+
+
+@dataclass(frozen=True)
+class SessionSchedule:
+    """Exchange trading sessions in local time; bars are labelled by their end time.
+
+    Trade dates are represented as UTC-midnight timestamps carrying the local
+    calendar date (the same labels ``TradingCalendarCache`` stores).
+    """
+
+    timezone: str = "Asia/Shanghai"
+    sessions: Tuple[Tuple[str, str], ...] = (("09:30", "11:30"), ("13:00", "15:00"))
+
+    @classmethod
+    def from_config(cls, config: ProviderConfig) -> "SessionSchedule":
+        sessions: Optional[Sequence[Sequence[str]]] = config.options.get("sessions")
+        if not sessions:
+            return cls(timezone=config.timezone)
+        return cls(timezone=config.timezone, sessions=tuple((str(o), str(c)) for o, c in sessions))
+
+    def bar_offsets(self, freq: str) -> pd.TimedeltaIndex:
+        """Offsets from local midnight of every bar end within one trading day."""
+        return _bar_offsets(self.sessions, freq_minutes(freq) or 0)
+
+    def expected_bars(self, freq: str) -> int:
+        if freq_minutes(freq) is None:
+            return 1
+        return len(self.bar_offsets(freq))
+
+    def trade_dates(self, timestamps) -> pd.DatetimeIndex:
+        """Map UTC bar timestamps to trade-date labels (local date at UTC midnight)."""
+        idx = pd.DatetimeIndex(timestamps)
+        if idx.tz is None:
+            idx = idx.tz_localize("UTC")
+        local = idx.tz_convert(self.timezone).tz_localize(None).normalize()
+        return local.tz_localize("UTC")
+
+    def day_bounds(self, trade_date: pd.Timestamp) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """Local-time [first open, last close] of a trade-date label."""
+        day = pd.Timestamp(trade_date)
+        if day.tzinfo is not None:
+            day = day.tz_localize(None)
+        day = day.normalize().tz_localize(self.timezone)
+        opens = [pd.Timedelta(f"{o}:00") for o, _ in self.sessions]
+        closes = [pd.Timedelta(f"{c}:00") for _, c in self.sessions]
+        return day + min(opens), day + max(closes)
+
+    def bar_positions(self, timestamps, freq: str) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+        """Trade-date label and grid position of each bar (-1 for bars off the session grid)."""
+        idx = pd.DatetimeIndex(timestamps)
+        if idx.tz is None:
+            idx = idx.tz_localize("UTC")
+        local = idx.tz_convert(self.timezone).tz_localize(None)
+        days = local.normalize()
+        offsets = (local - days).to_numpy()
+        grid = self.bar_offsets(freq).to_numpy()
+        pos = np.searchsorted(grid, offsets)
+        pos_clipped = np.minimum(pos, len(grid) - 1)
+        valid = (pos < len(grid)) & (grid[pos_clipped] == offsets)
+        return days.tz_localize("UTC"), np.where(valid, pos_clipped, -1)
+
+
+@lru_cache(maxsize=None)
+def _bar_offsets(sessions: Tuple[Tuple[str, str], ...], minutes: int) -> pd.TimedeltaIndex:
+    if minutes <= 0:
+        return pd.TimedeltaIndex([pd.Timedelta(0)])
+    step = pd.Timedelta(minutes=minutes)
+    offsets = []
+    for open_, close in sessions:
+        start = pd.Timedelta(f"{open_}:00")
+        end = pd.Timedelta(f"{close}:00")
+        offsets.extend(pd.timedelta_range(start + step, end, freq=step))
+        # 时段长度不能被 bar 长度整除时，收盘时刻补一根残 bar
+        if offsets and offsets[-1] < end:
+            offsets.append(end)
+    return pd.TimedeltaIndex(offsets)
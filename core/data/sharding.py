@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from core.data.fileio import create_exclusive, write_text_atomic
+from core.data.journal import BackfillJournal, JournalProgress, check_run_id
+
+logger = logging.getLogger(__name__)
+
+RUNNING = "running"
+COMPLETE = "complete"
+# 租约有效期；持有者每 1/3 周期续约一次，超时未续约视为 worker 已失联
+LEASE_SECONDS = 600.0
+DEFAULT_SHARD_SIZE = 50
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+@dataclass
+class ShardLease:
+    shard: str
+    worker: str
+    token: str
+    acquired_at: float
+    expires_at: float
+    state: str = RUNNING
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return self.state != COMPLETE and now >= self.expires_at
+
+
+@dataclass
+class ShardStatus:
+    shard: str
+    symbols: int
+    done: int
+    failed: int
+    state: str
+    worker: Optional[str] = None
+    expires_in: Optional[float] = None
+
+
+@dataclass
+class ShardedProgress:
+    overall: JournalProgress
+    shards: List[ShardStatus] = field(default_factory=list)
+
+    @property
+    def workers(self) -> List[str]:
+        return sorted({s.worker for s in self.shards if s.state == RUNNING and s.worker})
+
+    def describe(self) -> str:
+        states: Dict[str, int] = {}
+        for shard in self.shards:
+            states[shard.state] = states.get(shard.state, 0) + 1
+        counts = " ".join(f"{k}={v}" for k, v in sorted(states.items()))
+        return f"{self.overall.describe()} shards[{counts}] workers={len(self.workers)}"
+
+
+class ShardedRun:
+    """Backfill run split into symbol shards that workers claim through lease files.
+
+    Layout under ``base_dir/_runs/<run_id>/``: ``shards.json`` (plan and shard
+    membership, written once), ``leases/<shard>.json`` (current owner and
+    expiry) and ``<shard>.jsonl`` (a ``BackfillJournal`` per shard, written
+    only by the lease holder). Lease files are created with ``link`` so only
+    one worker wins on a shared filesystem; expired leases are taken over by
+    renaming them aside first. Expiry compares wall clocks, so nodes must be
+    NTP-synchronised.
+    """
+
+    def __init__(self, base_dir: Path, run_id: str, lease_seconds: float = LEASE_SECONDS) -> None:
+        check_run_id(run_id)
+        self.base_dir = Path(base_dir)
+        self.run_id = run_id
+        self.lease_seconds = float(lease_seconds)
+        self.root = self.base_dir / "_runs" / run_id
+        self.manifest_path = self.root / "shards.json"
+        self.lease_dir = self.root / "leases"
+        self._manifest: Optional[dict] = None
+
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    @property
+    def plan(self) -> dict:
+        if self._manifest is None:
+            if not self.exists():
+                raise ValueError(f"分片任务不存在: {self.run_id}")
+            self._manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        return self._manifest
+
+    @property
+    def shards(self) -> Dict[str, List[str]]:
+        return self.plan["shards"]
+
+    def create(
+        self,
+        symbols: Iterable[str],
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        freq: str,
+        use_missing_ranges: bool = True,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+    ) -> dict:
+        unique = list(dict.fromkeys(symbols))
+        shard_size = max(1, int(shard_size))
+        shards = {
+            f"shard-{i // shard_size:05d}": unique[i : i + shard_size] for i in range(0, len(unique), shard_size)
+        }
+        manifest = {
+            "run_id": self.run_id,
+            "start": pd.Timestamp(start).isoformat(),
+            "end": pd.Timestamp(end).isoformat(),
+            "freq": freq,
+            "use_missing_ranges": use_missing_ranges,
+            "shard_size": shard_size,
+            "total": len(unique),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "shards": shards,
+        }
+        self.lease_dir.mkdir(parents=True, exist_ok=True)
+        if not create_exclusive(self.manifest_path, json.dumps(manifest, ensure_ascii=False)):
+            raise ValueError(f"分片任务已存在: {self.run_id}（直接启动 worker 即可继续）")
+        self._manifest = manifest
+        return manifest
+
+    def journal(self, shard: str) -> BackfillJournal:
+        return BackfillJournal(self.base_dir, self.run_id, path=self.root / f"{shard}.jsonl")
+
+    def read_lease(self, shard: str) -> Optional[ShardLease]:
+        path = self._lease_path(shard)
+        try:
+            return ShardLease(**json.loads(path.read_text(encoding="utf-8")))
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, TypeError):
+            # 写到一半的租约按已过期处理，允许接管
+            logger.warning("Corrupt lease %s, treating as expired", path)
+            return ShardLease(shard=shard, worker="?", token="corrupt", acquired_at=0.0, expires_at=0.0)
+
+    def claim(self, worker: str, retry_failed: bool = False) -> Optional[ShardLease]:
+        """Claim the first free shard: unleased, expired, or (with ``retry_failed``) complete with failures."""
+        now = time.time()
+        for shard in self.shards:
+            current = self.read_lease(shard)
+            if current is None:
+                lease = self._new_lease(shard, worker)
+                if create_exclusive(self._lease_path(shard), json.dumps(asdict(lease))):
+                    logger.info("Worker %s claimed %s", worker, shard)
+                    return lease
+                continue
+            if current.state == COMPLETE:
+                if not (retry_failed and self.journal(shard).failures()):
+                    continue
+            elif not current.expired(now):
+                continue
+            lease = self._take_over(shard, current, worker)
+            if lease is not None:
+                return lease
+        return None
+
+    def renew(self, lease: ShardLease) -> bool:
+        """Extend our lease; False means another worker took the shard over."""
+        current = self.read_lease(lease.shard)
+        if current is None or current.token != lease.token:
+            return False
+        lease.expires_at = time.time() + self.lease_seconds
+        write_text_atomic(self._lease_path(lease.shard), json.dumps(asdict(lease)))
+        return True
+
+    def release(self, lease: ShardLease, complete: bool) -> None:
+        """Mark the shard complete, or drop the lease so another worker can resume it."""
+        current = self.read_lease(lease.shard)
+        if current is None or current.token != lease.token:
+            logger.warning("Lease %s no longer held by %s, not releasing", lease.shard, lease.worker)
+            return
+        if complete:
+            lease.state = COMPLETE
+            write_text_atomic(self._lease_path(lease.shard), json.dumps(asdict(lease)))
+        else:
+            self._lease_path(lease.shard).unlink(missing_ok=True)
+
+    def progress(self) -> ShardedProgress:
+        """Combined progress over all shard journals (coordinator view)."""
+        now = time.time()
+        statuses: List[ShardStatus] = []
+        done = failed = rows = 0
+        elapsed: List[float] = []
+        for shard, symbols in self.shards.items():
+            journal = self.journal(shard)
+            shard_done = sum(1 for s in symbols if journal.status.get(s, {}).get("event") == "done")
+            shard_failed = sum(1 for s in symbols if journal.status.get(s, {}).get("event") == "failed")
+            done += shard_done
+            failed += shard_failed
+            rows += sum(int(v.get("rows", 0)) for v in journal.status.values())
+            elapsed.extend(float(v.get("elapsed", 0.0)) for v in journal.status.values())
+            lease = self.read_lease(shard)
+            if lease is None:
+                state, worker, expires_in = "pending", None, None
+            elif lease.state == COMPLETE:
+                state, worker, expires_in = COMPLETE, lease.worker, None
+            else:
+                state = "expired" if lease.expired(now) else RUNNING
+                worker, expires_in = lease.worker, round(lease.expires_at - now, 1)
+            statuses.append(ShardStatus(shard, len(symbols), shard_done, shard_failed, state, worker, expires_in))
+        total = int(self.plan.get("total", sum(len(v) for v in self.shards.values())))
+        pending = total - done
+        per_symbol = sum(elapsed) / len(elapsed) if elapsed else 0.0
+        live = len({s.worker for s in statuses if s.state == RUNNING}) or 1
+        overall = JournalProgress(
+            total=total,
+            done=done,
+            failed=failed,
+            pending=pending,
+            rows=rows,
+            seconds_per_symbol=per_symbol,
+            # 各 worker 并行推进，ETA 按当前存活 worker 数摊分
+            eta_seconds=per_symbol * pending / live if elapsed else None,
+        )
+        return ShardedProgress(overall=overall, shards=statuses)
+
+    def _lease_path(self, shard: str) -> Path:
+        return self.lease_dir / f"{shard}.json"
+
+    def _new_lease(self, shard: str, worker: str) -> ShardLease:
+        now = time.time()
+        return ShardLease(
+            shard=shard,
+            worker=worker,
+            token=uuid.uuid4().hex,
+            acquired_at=now,
+            expires_at=now + self.lease_seconds,
+        )
+
+    def _take_over(self, shard: str, observed: ShardLease, worker: str) -> Optional[ShardLease]:
+        path = self._lease_path(shard)
+        stale = path.with_name(f"{path.name}.stale-{uuid.uuid4().hex}")
+        try:
+            os.rename(path, stale)
+        except FileNotFoundError:
+            return None
+        try:
+            moved = ShardLease(**json.loads(stale.read_text(encoding="utf-8")))
+            moved_token = moved.token
+        except (json.JSONDecodeError, TypeError):
+            moved_token = "corrupt"
+        if moved_token != observed.token:
+            # 其他 worker 抢先接管并写入了新租约，被我们挪走了：还原后放弃
+            try:
+                os.link(stale, path)
+            except FileExistsError:
+                pass
+            stale.unlink(missing_ok=True)
+            return None
+        stale.unlink(missing_ok=True)
+        lease = self._new_lease(shard, worker)
+        if not create_exclusive(path, json.dumps(asdict(lease))):
+            return None
+        logger.warning(
+            "Worker %s took over %s from %s (state=%s, expired %.0fs ago)",
+            worker,
+            shard,
+            observed.worker,
+            observed.state,
+            lease.acquired_at - observed.expires_at,
+        )
+        return lease
+
+
+class ShardWorker:
+    """Claims shards of a ``ShardedRun`` and fetches their pending symbols until none are left."""
+
+    def __init__(
+        self,
+        run: ShardedRun,
+        fetcher,
+        worker_id: Optional[str] = None,
+        topup: bool = False,
+        retry_failed: bool = False,
+        on_result: Optional[Callable[[str, object], None]] = None,
+    ) -> None:
+        self.run = run
+        self.fetcher = fetcher
+        self.worker_id = worker_id or default_worker_id()
+        self.topup = topup
+        self.retry_failed = retry_failed
+        self.on_result = on_result
+
+    def run_until_done(self) -> int:
+        """Process shards until nothing is claimable; returns the number of shards completed."""
+        completed = 0
+        while True:
+            lease = self.run.claim(self.worker_id, retry_failed=self.retry_failed)
+            if lease is None:
+                logger.info("Worker %s: no claimable shard left", self.worker_id)
+                return completed
+            if self._process(lease):
+                completed += 1
+
+    def _process(self, lease: ShardLease) -> bool:
+        plan = self.run.plan
+        journal = self.run.journal(lease.shard)
+        if not journal.exists():
+            journal.create(
+                self.run.shards[lease.shard],
+                pd.Timestamp(plan["start"]),
+                pd.Timestamp(plan["end"]),
+                plan["freq"],
+                use_missing_ranges=bool(plan.get("use_missing_ranges", True)),
+            )
+        lost = threading.Event()
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(lease, stop, lost), name=f"lease-{lease.shard}", daemon=True
+        )
+        heartbeat.start()
+        complete = False
+        try:
+            with self.fetcher.store.batch():
+                for sym in journal.pending():
+                    if lost.is_set():
+                        logger.error("Worker %s lost lease on %s, abandoning shard", self.worker_id, lease.shard)
+                        return False
+                    started = time.monotonic()
+                    result = self.fetcher.fetch_symbol(
+                        sym,
+                        pd.Timestamp(plan["start"]),
+                        pd.Timestamp(plan["end"]),
+                        freq=plan["freq"],
+                        use_missing_ranges=bool(plan.get("use_missing_ranges", True)),
+                        topup=self.topup,
+                    )
+                    journal.record(result, time.monotonic() - started)
+                    if self.on_result is not None:
+                        self.on_result(lease.shard, result)
+            complete = not lost.is_set()
+            return complete
+        finally:
+            stop.set()
+            heartbeat.join()
+            if not lost.is_set():
+                self.run.release(lease, complete=complete)
+                logger.info("Worker %s %s %s", self.worker_id, "completed" if complete else "released", lease.shard)
+
+    def _heartbeat(self, lease: ShardLease, stop: threading.Event, lost: threading.Event) -> None:
+        interval = max(1.0, self.run.lease_seconds / 3)
+        while not stop.wait(interval):
+            try:
+                if not self.run.renew(lease):
+                    lost.set()
+                    return
+            except OSError:
+                # 共享存储短暂不可用时继续尝试，租约到期前恢复即可
+                logger.warning("Failed to renew lease %s", lease.shard, exc_info=True)
@@ -1,84 +1,490 @@
 from __future__ import annotations
 
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from core.data.cache import CacheStats, PartitionCache, file_signature
+from core.data.derived import BarAggregator, check_derivation
+from core.data.fileio import atomic_path, file_lock
+from core.data.schema import conform, is_current
+from core.data.sessions import SessionSchedule
+from core.data.tables import (
+    PriceData,
+    concat_tables,
+    dedupe_sorted,
+    read_batches,
+    read_table,
+    to_frame,
+    to_table,
+    year_slices,
+)
+from core.data.xsection import XSECTION_FREQS, CrossSectionStore, DateRange, trade_date_bounds
+
+logger = logging.getLogger(__name__)
+
+PRICE_VALUE_COLUMNS = ("open", "high", "low", "close")
+PARTITION_COLUMNS = ("symbol",)
+# iter_tables 每批行数（流式回测等按批处理整段历史）
+DEFAULT_STREAM_BATCH_ROWS = 262_144
+# batch() 内缓冲的截面行数上限，超过即提前落盘（控制长区间回补时的内存）
+DEFAULT_BATCH_FLUSH_ROWS = 2_000_000
+
+
+@dataclass
+class StorageConfig:
+    """Parquet write options (``storage:`` section of ``config/data.yaml``)."""
+
+    compression: Optional[str] = "snappy"
+    compression_level: Optional[int] = None
+    # True/False 或需要字典编码的列名列表
+    dictionary: Union[bool, List[str]] = True
+    # 不在文件里重复存储分区路径已包含的列（symbol），读取时补回
+    drop_partition_columns: bool = False
+    price_dtype: str = "float64"
+    row_group_size: Optional[int] = None
+    # 额外维护按月分区、全市场一个文件的日线截面布局（_xsection/），与按标的布局同步写入
+    cross_section: bool = False
+    # 进程内分区缓存上限（MB，0 关闭），长驻进程（MCP 服务）反复读取同一标的时受益
+    cache_mb: int = 0
+    # 基础频率 -> 随其 upsert 增量维护的派生频率，如 {"1m": ["5m", "30m"], "1d": ["1w", "1mo"]}
+    derived: Dict[str, List[str]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if self.price_dtype not in ("float32", "float64"):
+            raise ValueError(f"price_dtype 只支持 float32/float64: {self.price_dtype}")
+        for base, targets in self.derived.items():
+            for target in targets:
+                check_derivation(base, target)
+
+    def write_kwargs(self) -> dict:
+        kwargs = {
+            "compression": self.compression or "none",
+            "use_dictionary": self.dictionary,
+        }
+        if self.compression_level is not None:
+            kwargs["compression_level"] = self.compression_level
+        if self.row_group_size:
+            kwargs["row_group_size"] = self.row_group_size
+        return kwargs
 
 
 class LocalParquetStore:
-    """Simple Parquet store with year partitions: symbol/freq/year/data.parquet."""
+    """Simple Parquet store with year partitions: symbol/freq/year/data.parquet.
+
+    Safe for concurrent writers (threads, processes, NFS clients): each
+    partition's read-merge-write runs under an advisory lock on
+    ``data.parquet.lock`` and the new file is written to a temp name and
+    renamed over the old one, so readers never observe a partial file.
+
+    With ``options.cross_section`` daily bars are also mirrored into month
+    files holding all symbols (``core.data.xsection``), read back with
+    ``load_cross_section``; wrap bulk runs in ``batch()`` so each month file
+    is written once.
 
-    def __init__(self, base_dir: Path, engine: str = "pyarrow") -> None:
+    Freqs listed in ``options.derived`` (e.g. ``5m`` from ``1m``, ``1w``
+    from ``1d``) are materialized as ordinary partitions: every upsert of a
+    base freq re-aggregates only the buckets its rows fall in
+    (``core.data.derived``). ``schedule`` supplies the session grid for
+    intraday buckets.
+    """
+
+    def __init__(
+        self,
+        base_dir: Path,
+        engine: str = "pyarrow",
+        timezone: str = "Asia/Shanghai",
+        options: Optional[StorageConfig] = None,
+        schedule: Optional[SessionSchedule] = None,
+    ) -> None:
         self.base_dir = base_dir
         self.engine = engine
+        # 交易所时区，用于派生 trade_date 列
+        self.timezone = timezone
+        self.options = options or StorageConfig()
+        self.aggregator = BarAggregator(schedule or SessionSchedule(timezone=timezone))
+        self.xsection = CrossSectionStore(self)
+        self._batch_lock = threading.Lock()
+        self._batch_depth = 0
+        self._batch_flush_rows = DEFAULT_BATCH_FLUSH_ROWS
+        self._batch_pending: List[pa.Table] = []
+        self._batch_rows = 0
+        self.cache = PartitionCache(self.options.cache_mb * 1024 * 1024) if self.options.cache_mb > 0 else None
 
     def _partition_path(self, symbol: str, freq: str, year: int) -> Path:
         return self.base_dir / f"symbol={symbol}" / f"freq={freq}" / f"year={year}" / "data.parquet"
 
-    def load(self, symbol: str, freq: str) -> pd.DataFrame:
+    def partitions(self, symbol: str, freq: str) -> List[Path]:
         root = self.base_dir / f"symbol={symbol}" / f"freq={freq}"
         if not root.exists():
+            return []
+        return sorted(root.rglob("data.parquet"))
+
+    def symbols(self, freq: str) -> List[str]:
+        """Symbols with at least one stored partition of ``freq``."""
+        return sorted(
+            path.parent.name.split("=", 1)[1]
+            for path in self.base_dir.glob(f"symbol=*/freq={freq}")
+            if any(path.glob("year=*/data.parquet"))
+        )
+
+    def iter_partitions(self) -> Iterator[Tuple[str, str, int, Path]]:
+        """``(symbol, freq, year, path)`` of every stored partition."""
+        for path in sorted(self.base_dir.glob("symbol=*/freq=*/year=*/data.parquet")):
+            year_dir = path.parent
+            freq_dir = year_dir.parent
+            yield (
+                freq_dir.parent.name.split("=", 1)[1],
+                freq_dir.name.split("=", 1)[1],
+                int(year_dir.name.split("=", 1)[1]),
+                path,
+            )
+
+    def upgrade_partition(
+        self, symbol: str, freq: str, year: int, dry_run: bool = False, force: bool = False
+    ) -> Optional[int]:
+        """Rewrite one partition in the current schema and storage options.
+
+        Returns its row count, or None when it is already current (``force``
+        rewrites anyway, e.g. after changing the ``storage:`` options).
+        """
+        path = self._partition_path(symbol, freq, year)
+        with file_lock(path):
+            if not force and is_current(pq.read_schema(path), self.timezone):
+                return None
+            table = self._read_unlocked(path, symbol)
+            before = pq.read_metadata(path).num_rows
+            if table.num_rows != before:
+                raise RuntimeError(f"{path}: 行数不一致 {before} -> {table.num_rows}")
+            if not dry_run:
+                self._write_partition(table, path)
+            return table.num_rows
+
+    def compact_partition(
+        self, symbol: str, freq: str, year: int, row_group_size: Optional[int] = None, dry_run: bool = False
+    ) -> Tuple[int, int]:
+        """Rewrite one partition sorted, deduplicated and with ``row_group_size`` rows per group.
+
+        Returns ``(rows_before, rows_after)``. The rewrite is verified before
+        the atomic replace: the new file must hold exactly the distinct
+        timestamps of the old one, so a mismatch leaves the original untouched.
+        """
+        path = self._partition_path(symbol, freq, year)
+        with file_lock(path):
+            before = pq.read_metadata(path).num_rows
+            table = self._read_unlocked(path, symbol)
+            distinct = pc.count_distinct(table.column("timestamp")).as_py() if table.num_rows else 0
+            table = dedupe_sorted(table)
+            if table.num_rows != distinct:
+                raise RuntimeError(f"{path}: 去重后行数 {table.num_rows} != 不同时间戳数 {distinct}")
+            if not dry_run:
+                self._write_partition(table, path, row_group_size=row_group_size, verify=True)
+            return before, table.num_rows
+
+    def encode(self, table: pa.Table, partitioned: bool = True) -> pa.Table:
+        """Apply the storage options to a v2 table (the layout that is written to disk).
+
+        ``partitioned=False`` keeps ``symbol`` for files whose path does not carry it.
+        """
+        if partitioned and self.options.drop_partition_columns:
+            table = table.drop_columns([c for c in PARTITION_COLUMNS if c in table.column_names])
+        if self.options.price_dtype == "float32":
+            for name in PRICE_VALUE_COLUMNS:
+                if name in table.column_names:
+                    idx = table.column_names.index(name)
+                    table = table.set_column(idx, pa.field(name, pa.float32()), table.column(idx).cast(pa.float32()))
+        return table
+
+    def load(self, symbol: str, freq: str) -> pd.DataFrame:
+        table = self.load_table(symbol, freq)
+        if table is None:
             return pd.DataFrame()
-        frames = []
-        for path in sorted(root.rglob("data.parquet")):
-            frames.append(pd.read_parquet(path))
-        if not frames:
+        return to_frame(table)
+
+    def load_table(self, symbol: str, freq: str, columns: Optional[Sequence[str]] = None) -> Optional[pa.Table]:
+        """All partitions of a symbol/freq as one v2 Arrow table (None when nothing is stored).
+
+        Files written in an older format are upgraded in memory; ``columns``
+        restricts the read (e.g. ``["trade_date"]`` for gap checks).
+        """
+        tables = [self._read_partition(path, symbol, columns) for path in self.partitions(symbol, freq)]
+        if not tables:
+            return None
+        return concat_tables(tables)
+
+    def iter_tables(
+        self,
+        symbol: str,
+        freq: str,
+        columns: Optional[Sequence[str]] = None,
+        batch_rows: int = DEFAULT_STREAM_BATCH_ROWS,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+    ) -> Iterator[pa.Table]:
+        """All partitions of a symbol/freq as v2 tables of at most ``batch_rows`` rows, in timestamp order.
+
+        Memory stays bounded by one batch (plus one row group) however long
+        the history is; the partition cache is bypassed. ``start``/``end``
+        (inclusive) skip year partitions and row groups outside the window
+        instead of reading and discarding them.
+        """
+        file_columns = None if columns is None else [c for c in columns if c not in PARTITION_COLUMNS]
+        first = _utc_year(start)
+        last = _utc_year(end)
+        for path in self.partitions(symbol, freq):
+            year = int(path.parent.name.split("=", 1)[1])
+            if (first is not None and year < first) or (last is not None and year > last):
+                continue
+            batches = read_batches(
+                path, columns=file_columns, upgrade=self._upgrader(symbol), batch_rows=batch_rows, start=start, end=end
+            )
+            for table in batches:
+                yield self._with_symbol(table, symbol, columns)
+
+    def years(self, symbol: str, freq: str) -> List[int]:
+        """Years (UTC) of the stored partitions of a symbol/freq, ascending."""
+        return [int(path.parent.name.split("=", 1)[1]) for path in self.partitions(symbol, freq)]
+
+    def load_cross_section(
+        self, dates: DateRange, fields: Optional[Sequence[str]] = None, symbols: Optional[Iterable[str]] = None
+    ) -> pd.DataFrame:
+        """Daily bars of all (or the given) symbols on a date or an inclusive ``(start, end)`` range.
+
+        Dates may be ``YYYYMMDD`` ints, strings or Timestamps. ``fields``
+        restricts the value columns; ``symbol`` and ``trade_date`` are always
+        returned. Rows are ordered by ``(trade_date, symbol)``.
+        """
+        table = self.load_cross_section_table(dates, fields, symbols)
+        if table is None:
             return pd.DataFrame()
-        df = pd.concat(frames, ignore_index=True)
-        return self._normalize(df)
+        return to_frame(table)
+
+    def load_cross_section_table(
+        self, dates: DateRange, fields: Optional[Sequence[str]] = None, symbols: Optional[Iterable[str]] = None
+    ) -> Optional[pa.Table]:
+        """Arrow form of ``load_cross_section`` (None when nothing is stored).
+
+        Reads the month files when ``options.cross_section`` is on; otherwise
+        falls back to opening every symbol's year partitions.
+        """
+        if self.options.cross_section:
+            return self.xsection.read(dates, fields, symbols)
+        start, end = trade_date_bounds(dates, self.timezone)
+        columns = None if fields is None else list(dict.fromkeys(["trade_date", "symbol", *fields]))
+        wanted = set(symbols) if symbols is not None else None
+        tables = []
+        for symbol, freq, year, path in self.iter_partitions():
+            if freq != "1d" or not start // 10000 <= year <= end // 10000 or (wanted is not None and symbol not in wanted):
+                continue
+            table = self._read_partition(path, symbol, columns)
+            trade_date = table.column("trade_date")
+            tables.append(table.filter(pc.and_(pc.greater_equal(trade_date, start), pc.less_equal(trade_date, end))))
+        if not tables:
+            return None
+        return dedupe_sorted(concat_tables(tables).unify_dictionaries(), keys=("trade_date", "symbol"))
+
+    @contextmanager
+    def batch(self, flush_rows: Optional[int] = None) -> Iterator["LocalParquetStore"]:
+        """Defer cross-section mirroring of the enclosed upserts to one write per month file.
 
-    def upsert(self, symbol: str, freq: str, df: pd.DataFrame) -> None:
-        if df.empty:
+        Per-symbol partitions are still written immediately. Rows for the
+        month files are buffered (from all threads) and merged when the
+        outermost ``batch()`` exits, or earlier once ``flush_rows`` rows are
+        pending. The buffer is flushed on errors too, so both layouts keep
+        whatever was stored.
+        """
+        with self._batch_lock:
+            if self._batch_depth == 0:
+                self._batch_flush_rows = flush_rows or DEFAULT_BATCH_FLUSH_ROWS
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._batch_lock:
+                self._batch_depth -= 1
+                pending = self._take_pending() if self._batch_depth == 0 else []
+            self._flush_cross_section(pending)
+
+    def upsert(self, symbol: str, freq: str, data: PriceData, keep: str = "first") -> None:
+        """Merge rows into the year partitions; existing rows win on duplicate timestamps.
+
+        ``keep="last"`` lets incoming rows replace stored ones instead (used
+        for derived bars, whose buckets are recomputed as base bars arrive).
+
+        Accepts a DataFrame or a ``pyarrow.Table``. Merging stays in Arrow: the
+        incoming table is conformed to the v2 schema and sorted/deduplicated
+        once, sliced per year without copies, and each partition is combined
+        with its file via Arrow take. Older-format partitions are rewritten
+        as v2 when touched. Daily bars are then mirrored into the
+        cross-section layout when it is enabled, and the configured derived
+        freqs are refreshed.
+        """
+        table = to_table(data)
+        if table.num_rows == 0:
             return
-        df = self._normalize(df)
-        df = df.drop_duplicates(subset=["timestamp"]).sort_values("timestamp")
-        df["year"] = df["timestamp"].dt.year
-        for year, chunk in df.groupby("year"):
-            chunk = chunk.drop(columns=["year"])
-            path = self._partition_path(symbol, freq, int(year))
-            path.parent.mkdir(parents=True, exist_ok=True)
-            if path.exists():
-                existing = pd.read_parquet(path)
-                merged = pd.concat([existing, chunk], ignore_index=True)
-                merged = merged.drop_duplicates(subset=["timestamp"]).sort_values("timestamp")
-            else:
-                merged = chunk
-            merged.to_parquet(path, index=False, engine=self.engine)
+        table = dedupe_sorted(conform(table, symbol, self.timezone))
+        mirror = self.options.cross_section and freq in XSECTION_FREQS
+        stored = []
+        for year, chunk in year_slices(table):
+            path = self._partition_path(symbol, freq, year)
+            with file_lock(path):
+                if path.exists():
+                    existing = self._read_unlocked(path, symbol)
+                    merged = dedupe_sorted(concat_tables([existing, chunk]).unify_dictionaries(), keep=keep)
+                else:
+                    merged = chunk
+                self._write_partition(merged, path)
+            if mirror:
+                # 镜像实际落盘的行（已有行优先），而不是传入的行，保证两种布局一致
+                stored.append(merged.filter(pc.is_in(merged.column("timestamp"), value_set=chunk.column("timestamp").combine_chunks())))
+        if stored:
+            self._mirror_cross_section(concat_tables(stored))
+        for target in self.options.derived.get(freq, ()):
+            self._refresh_derived(symbol, freq, target, table)
 
-    @staticmethod
-    def missing_ranges(
-        existing: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp, freq: str = "1d"
-    ) -> Iterable[tuple[pd.Timestamp, pd.Timestamp]]:
-        """Return missing ranges [start, end] inclusive for timestamp-ordered data."""
-        if existing.empty:
-            yield (start, end)
+    def rebuild_derived(self, symbol: str, freq: str, targets: Optional[Sequence[str]] = None) -> Dict[str, int]:
+        """Recompute derived freqs of one symbol from all stored ``freq`` bars; returns rows per target.
+
+        Buckets are replaced, not merged, so this repairs derived partitions
+        written before ``options.derived`` listed them or edited by hand.
+        """
+        targets = list(targets) if targets is not None else list(self.options.derived.get(freq, ()))
+        base = self.load_table(symbol, freq)
+        rows = {}
+        for target in targets:
+            bars = self.aggregator.aggregate(base, freq, target) if base is not None else None
+            if bars is not None and bars.num_rows:
+                self.upsert(symbol, target, bars, keep="last")
+            rows[target] = bars.num_rows if bars is not None else 0
+        return rows
+
+    def _refresh_derived(self, symbol: str, freq: str, target: str, incoming: pa.Table) -> None:
+        # 只重算本次写入涉及的桶：按桶的时间范围读取已落盘的基础 bar（含此前已有的行），整桶聚合后覆盖
+        keys = self.aggregator.bucket_keys(incoming, freq, target)
+        affected = np.unique(keys[keys >= 0])
+        if len(affected) == 0:
+            return
+        start, end = self.aggregator.bucket_window(affected, target)
+        tables = [
+            self._read_partition(path, symbol)
+            for path in self.partitions(symbol, freq)
+            if start.year <= int(path.parent.name.split("=", 1)[1]) <= end.year
+        ]
+        if not tables:
             return
-        freq_delta = pd.tseries.frequencies.to_offset(freq)
-        existing_ts = existing["timestamp"]
-        existing_ts = existing_ts[(existing_ts >= start) & (existing_ts <= end)].sort_values()
-        if existing_ts.empty:
-            yield (start, end)
+        base = concat_tables(tables)
+        ts = base.column("timestamp")
+        in_window = pc.and_(
+            pc.greater_equal(ts, pa.scalar(start.value, ts.type)), pc.less_equal(ts, pa.scalar(end.value, ts.type))
+        )
+        base = base.filter(in_window)
+        base = base.filter(pa.array(np.isin(self.aggregator.bucket_keys(base, freq, target), affected)))
+        bars = self.aggregator.aggregate(base, freq, target)
+        if bars.num_rows:
+            self.upsert(symbol, target, bars, keep="last")
+
+    def _mirror_cross_section(self, table: pa.Table) -> None:
+        with self._batch_lock:
+            if self._batch_depth == 0:
+                pending = [table]
+            else:
+                self._batch_pending.append(table)
+                self._batch_rows += table.num_rows
+                pending = self._take_pending() if self._batch_rows >= self._batch_flush_rows else []
+        self._flush_cross_section(pending)
+
+    def _take_pending(self) -> List[pa.Table]:
+        pending, self._batch_pending, self._batch_rows = self._batch_pending, [], 0
+        return pending
+
+    def _flush_cross_section(self, pending: List[pa.Table]) -> None:
+        if not pending:
             return
+        table = concat_tables(pending)
+        files = self.xsection.upsert(table)
+        logger.debug("Mirrored %s daily rows into %s cross-section files", table.num_rows, files)
 
-        first_ts = existing_ts.iloc[0]
-        if start < first_ts:
-            yield (start, first_ts - freq_delta)
+    def _write_partition(
+        self, table: pa.Table, path: Path, row_group_size: Optional[int] = None, verify: bool = False
+    ) -> None:
+        kwargs = self.options.write_kwargs()
+        if row_group_size:
+            kwargs["row_group_size"] = row_group_size
+        try:
+            with atomic_path(path) as tmp:
+                pq.write_table(self.encode(table), tmp, **kwargs)
+                if verify:
+                    written = pq.read_metadata(tmp).num_rows
+                    if written != table.num_rows:
+                        raise RuntimeError(f"{path}: 写入行数 {written} != {table.num_rows}")
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate(path)
 
-        current = first_ts
-        for ts in existing_ts.iloc[1:]:
-            expected = current + freq_delta
-            if ts > expected:
-                yield (expected, ts - freq_delta)
-            current = ts
+    def _upgrader(self, symbol: str):
+        def upgrade(schema: pa.Schema):
+            if is_current(schema, self.timezone):
+                return None
+            return lambda table: conform(table, symbol, self.timezone)
 
-        tail_start = current + freq_delta
-        if end >= tail_start:
-            yield (tail_start, end)
+        return upgrade
+
+    def cache_stats(self) -> Optional[CacheStats]:
+        """Hit/miss counters of the partition cache (None when ``cache_mb`` is 0)."""
+        return self.cache.stats() if self.cache is not None else None
+
+    def _read_partition(self, path: Path, symbol: str, columns: Optional[Sequence[str]] = None) -> pa.Table:
+        if self.cache is None:
+            return self._read_partition_uncached(path, symbol, columns)
+        # 先取签名再读：读取期间文件被替换时，缓存项签名偏旧，下次访问即失效重读
+        signature = file_signature(path)
+        table = self.cache.get(path, columns, signature)
+        if table is None:
+            table = self._read_partition_uncached(path, symbol, columns)
+            self.cache.put(path, columns, signature, table)
+        return table
+
+    def _read_partition_uncached(self, path: Path, symbol: str, columns: Optional[Sequence[str]] = None) -> pa.Table:
+        try:
+            return self._read_unlocked(path, symbol, columns)
+        except Exception:  # noqa: BLE001
+            # 文件在列目录与打开之间被替换（NFS 句柄失效）或为旧版非原子写入的残缺文件：
+            # 等待写入方释放锁后重读一次，仍失败则抛出
+            logger.warning("Retrying read of %s under partition lock", path, exc_info=True)
+            with file_lock(path, shared=True):
+                return self._read_unlocked(path, symbol, columns)
+
+    def _read_unlocked(self, path: Path, symbol: str, columns: Optional[Sequence[str]] = None) -> pa.Table:
+        """Read a partition as a v2 table (callers holding the partition lock use this directly)."""
+        file_columns = None if columns is None else [c for c in columns if c not in PARTITION_COLUMNS]
+        table = read_table(path, columns=file_columns, upgrade=self._upgrader(symbol))
+        return self._with_symbol(table, symbol, columns)
 
     @staticmethod
-    def _normalize(df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        if "timestamp" in df:
-            df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
-        return df
+    def _with_symbol(table: pa.Table, symbol: str, columns: Optional[Sequence[str]] = None) -> pa.Table:
+        if "symbol" not in table.column_names and (columns is None or "symbol" in columns):
+            # 分区路径隐含的 symbol 列未落盘时，按常量字典列补回（无逐行字符串）
+            symbol_col = pa.DictionaryArray.from_arrays(
+                pa.array(np.zeros(table.num_rows, dtype=np.int32)), pa.array([symbol], type=pa.string())
+            )
+            table = table.add_column(0, pa.field("symbol", symbol_col.type), symbol_col)
+        if columns is not None:
+            table = table.select(list(columns))
+        return table
+
+
+def _utc_year(value: Optional[pd.Timestamp]) -> Optional[int]:
+    # 年分区按 UTC 时间戳的年份划分
+    if value is None:
+        return None
+    value = pd.Timestamp(value)
+    return (value.tz_localize("UTC") if value.tzinfo is None else value.tz_convert("UTC")).year
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+PRICE_COLUMNS = ["symbol", "timestamp", "open", "high", "low", "close", "volume", "turnover"]
+TIMESTAMP_TYPE = pa.timestamp("ns", tz="UTC")
+
+PriceData = Union[pd.DataFrame, pa.Table]
+
+
+def to_table(data: PriceData) -> pa.Table:
+    """Arrow table with a ``timestamp[ns, UTC]`` timestamp column (naive values are taken as UTC)."""
+    if isinstance(data, pd.DataFrame):
+        table = pa.Table.from_pandas(data, preserve_index=False)
+    else:
+        table = data
+    # pandas 元数据里的索引/时区信息在合并后会过期，丢弃；其余（如存储格式版本）保留
+    metadata = dict(table.schema.metadata or {})
+    if metadata.pop(b"pandas", None) is not None:
+        table = table.replace_schema_metadata(metadata or None)
+    if "timestamp" not in table.column_names:
+        return table
+    idx = table.column_names.index("timestamp")
+    column = table.column(idx)
+    if not pa.types.is_timestamp(column.type):
+        column = pd.to_datetime(column.to_pandas(), utc=True)
+        column = pa.chunked_array([pa.array(column, type=TIMESTAMP_TYPE)])
+    elif column.type.tz is None:
+        column = pc.assume_timezone(column, "UTC")
+    if column.type != TIMESTAMP_TYPE:
+        column = column.cast(TIMESTAMP_TYPE)
+    return table.set_column(idx, pa.field("timestamp", TIMESTAMP_TYPE), column)
+
+
+def read_table(path, columns: Optional[Sequence[str]] = None, upgrade=None) -> pa.Table:
+    """Read a Parquet file through one open handle.
+
+    ``pq.read_table(path)`` may open the path more than once (metadata, then
+    row groups); if a writer renames a new file in between, the pieces come
+    from different files. A single handle pins one inode. ``upgrade`` maps the
+    file schema to a callable applied to the full table (e.g. migrating an old
+    storage format) or None when the requested columns can be read as-is.
+    """
+    with pa.OSFile(str(path)) as source:
+        parquet = pq.ParquetFile(source)
+        convert = upgrade(parquet.schema_arrow) if upgrade is not None else None
+        if convert is None:
+            return to_table(parquet.read(columns=list(columns) if columns else None))
+        table = convert(to_table(parquet.read()))
+        return table.select(list(columns)) if columns else table
+
+
+def read_batches(
+    path,
+    columns: Optional[Sequence[str]] = None,
+    upgrade=None,
+    batch_rows: int = 65536,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+) -> Iterator[pa.Table]:
+    """Stream a Parquet file as tables of at most ``batch_rows`` rows through one open handle.
+
+    Files that need ``upgrade`` are converted whole and then sliced, so only
+    current-format files are read with bounded memory. ``start``/``end``
+    keep rows with ``start <= timestamp <= end``; row groups whose
+    ``timestamp`` statistics lie outside the window are not read.
+    """
+    bounded = start is not None or end is not None
+    wanted = list(columns) if columns else None
+    read_columns = wanted if not bounded or wanted is None or "timestamp" in wanted else wanted + ["timestamp"]
+    with pa.OSFile(str(path)) as source:
+        parquet = pq.ParquetFile(source)
+        convert = upgrade(parquet.schema_arrow) if upgrade is not None else None
+        if convert is not None:
+            table = _in_window(convert(to_table(parquet.read())), start, end)
+            table = table.select(wanted) if wanted else table
+            for offset in range(0, table.num_rows, batch_rows):
+                yield table.slice(offset, batch_rows)
+            return
+        row_groups = _row_groups_in_window(parquet, start, end) if bounded else None
+        if row_groups is not None and not row_groups:
+            return
+        for batch in parquet.iter_batches(batch_size=batch_rows, row_groups=row_groups, columns=read_columns):
+            table = to_table(pa.Table.from_batches([batch]))
+            if bounded:
+                table = _in_window(table, start, end)
+                table = table.select(wanted) if wanted else table
+            if table.num_rows:
+                yield table
+
+
+def _in_window(table: pa.Table, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]) -> pa.Table:
+    ts = table.column("timestamp")
+    mask = None
+    if start is not None:
+        mask = pc.greater_equal(ts, pa.scalar(_utc(start).value, ts.type))
+    if end is not None:
+        upper = pc.less_equal(ts, pa.scalar(_utc(end).value, ts.type))
+        mask = upper if mask is None else pc.and_(mask, upper)
+    return table if mask is None else table.filter(mask)
+
+
+def _row_groups_in_window(
+    parquet: pq.ParquetFile, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]
+) -> Optional[List[int]]:
+    """Row groups whose ``timestamp`` min/max overlap ``[start, end]`` (None: read all, no usable statistics)."""
+    names = parquet.schema_arrow.names
+    if "timestamp" not in names:
+        return None
+    # 存储表均为扁平结构，列序即叶子列序
+    idx = names.index("timestamp")
+    groups = []
+    for i in range(parquet.metadata.num_row_groups):
+        stats = parquet.metadata.row_group(i).column(idx).statistics
+        if stats is None or not stats.has_min_max:
+            return None
+        if start is not None and _utc(pd.Timestamp(stats.max)) < _utc(start):
+            continue
+        if end is not None and _utc(pd.Timestamp(stats.min)) > _utc(end):
+            continue
+        groups.append(i)
+    return groups
+
+
+def _utc(value: pd.Timestamp) -> pd.Timestamp:
+    value = pd.Timestamp(value)
+    return value.tz_localize("UTC") if value.tzinfo is None else value.tz_convert("UTC")
+
+
+def concat_tables(tables) -> pa.Table:
+    """Concatenate tables whose columns may differ (missing columns become null)."""
+    tables = [t for t in tables if t is not None]
+    if len(tables) == 1:
+        return tables[0]
+    return pa.concat_tables(tables, promote_options="permissive")
+
+
+def dedupe_sorted(table: pa.Table, keep: str = "first", keys: Sequence[str] = ("timestamp",)) -> pa.Table:
+    """Sort by ``keys`` (default: timestamp) and drop rows with duplicate keys.
+
+    ``keep="first"`` retains the earliest row in input order (the existing
+    row when called as ``dedupe_sorted(concat_tables([existing, new]))``), matching
+    ``drop_duplicates(subset=["timestamp"])``; ``keep="last"`` retains the latest.
+    Dictionary key columns (symbol) are compared by value.
+    """
+    n = table.num_rows
+    if n == 0:
+        return table
+    if keep not in ("first", "last"):
+        raise ValueError(f"keep 只支持 first/last: {keep}")
+    key_table = pa.table([_sort_key(table.column(name)) for name in keys], names=list(keys))
+    # Arrow 的 sort_indices 是稳定排序：同一键内保持输入顺序
+    sort_idx = pc.sort_indices(key_table, sort_keys=[(name, "ascending") for name in keys]).to_numpy()
+    changed = np.zeros(n - 1, dtype=bool)
+    for name in keys:
+        values = key_table.column(name).to_numpy()[sort_idx]
+        changed |= values[1:] != values[:-1]
+    mask = np.ones(n, dtype=bool)
+    if keep == "first":
+        mask[1:] = changed
+    else:
+        mask[:-1] = changed
+    take = sort_idx[mask]
+    if len(take) == n and (take[1:] > take[:-1]).all():
+        return table
+    return table.take(pa.array(take))
+
+
+def _sort_key(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    if pa.types.is_dictionary(column.type):
+        return column.cast(column.type.value_type)
+    return column
+
+
+def year_slices(table: pa.Table) -> Iterator[Tuple[int, pa.Table]]:
+    """Zero-copy ``(year, slice)`` pairs of a timestamp-sorted table."""
+    if table.num_rows == 0:
+        return
+    years = pc.year(table.column("timestamp")).to_numpy()
+    bounds = np.flatnonzero(years[1:] != years[:-1]) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(years)]))
+    for start, end in zip(starts, ends):
+        yield int(years[start]), table.slice(int(start), int(end - start))
+
+
+def to_frame(table: pa.Table) -> pd.DataFrame:
+    """DataFrame view of a stored table; dictionary columns (symbol) are decoded to plain strings."""
+    for idx, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(idx, pa.field(field.name, field.type.value_type), table.column(idx).cast(field.type.value_type))
+    return table.to_pandas()
+
+
+def timestamps(table: pa.Table) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(table.column("timestamp").to_pandas())
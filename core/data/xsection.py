@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from core.data.fileio import atomic_path, file_lock
+from core.data.tables import concat_tables, dedupe_sorted, read_table
+
+if TYPE_CHECKING:  # pragma: no cover
+    from core.data.storage import LocalParquetStore
+
+logger = logging.getLogger(__name__)
+
+XSECTION_DIR = "_xsection"
+# 截面布局只镜像日线：分钟线单月全市场数据量过大，且按标的读取才是其主要访问方式
+XSECTION_FREQS = ("1d",)
+# 同一 (symbol, timestamp) 只保留一行；先按交易日、再按标的排序，单日截面在文件内连续
+XSECTION_KEYS = ("trade_date", "symbol", "timestamp")
+
+DateLike = Union[int, str, pd.Timestamp]
+DateRange = Union[DateLike, Tuple[DateLike, DateLike]]
+
+
+def to_trade_date(value: DateLike, timezone: str) -> int:
+    """``YYYYMMDD`` of a date given as int, string or Timestamp (tz-aware values are taken in ``timezone``)."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(timezone)
+    return ts.year * 10000 + ts.month * 100 + ts.day
+
+
+def trade_date_bounds(dates: DateRange, timezone: str) -> Tuple[int, int]:
+    """Inclusive ``(start, end)`` trade dates of a single date or a ``(start, end)`` pair."""
+    if isinstance(dates, (tuple, list)):
+        start, end = dates
+        return to_trade_date(start, timezone), to_trade_date(end, timezone)
+    value = to_trade_date(dates, timezone)
+    return value, value
+
+
+def month_slices(table: pa.Table) -> Iterator[Tuple[int, pa.Table]]:
+    """Zero-copy ``(YYYYMM, slice)`` pairs of a trade-date-sorted table."""
+    if table.num_rows == 0:
+        return
+    months = table.column("trade_date").to_numpy() // 100
+    bounds = np.flatnonzero(months[1:] != months[:-1]) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(months)]))
+    for start, end in zip(starts, ends):
+        yield int(months[start]), table.slice(int(start), int(end - start))
+
+
+class CrossSectionStore:
+    """Daily bars of all symbols in one file per month.
+
+    Layout: ``_xsection/freq=1d/month=YYYY-MM/data.parquet``, rows sorted by
+    ``(trade_date, symbol)``. It mirrors the per-symbol layout of
+    ``LocalParquetStore``, which stays the source of truth: ``upsert`` there
+    forwards the rows it actually stored, so on duplicate ``(symbol,
+    timestamp)`` the incoming rows win here. Month files use the same lock
+    and atomic-replace protocol as symbol partitions.
+    """
+
+    def __init__(self, store: "LocalParquetStore", freq: str = "1d") -> None:
+        if freq not in XSECTION_FREQS:
+            raise ValueError(f"截面布局只支持 {XSECTION_FREQS}: {freq}")
+        self.store = store
+        self.freq = freq
+
+    @property
+    def root(self) -> Path:
+        return Path(self.store.base_dir) / XSECTION_DIR / f"freq={self.freq}"
+
+    def month_path(self, month: int) -> Path:
+        return self.root / f"month={month // 100:04d}-{month % 100:02d}" / "data.parquet"
+
+    def months(self) -> List[int]:
+        """``YYYYMM`` of every stored month file."""
+        result = []
+        for path in sorted(self.root.glob("month=*/data.parquet")):
+            year, month = path.parent.name.split("=", 1)[1].split("-")
+            result.append(int(year) * 100 + int(month))
+        return result
+
+    def upsert(self, table: pa.Table) -> int:
+        """Merge v2 rows of any symbols into their month files; returns the number of files written."""
+        if table.num_rows == 0:
+            return 0
+        table = dedupe_sorted(table.unify_dictionaries(), keep="last", keys=XSECTION_KEYS)
+        written = 0
+        for month, chunk in month_slices(table):
+            path = self.month_path(month)
+            with file_lock(path):
+                if path.exists():
+                    existing = read_table(path)
+                    chunk = dedupe_sorted(
+                        concat_tables([existing, chunk]).unify_dictionaries(), keep="last", keys=XSECTION_KEYS
+                    )
+                with atomic_path(path) as tmp:
+                    pq.write_table(self.store.encode(chunk, partitioned=False), tmp, **self.store.options.write_kwargs())
+            written += 1
+        return written
+
+    def read(
+        self,
+        dates: DateRange,
+        columns: Optional[Sequence[str]] = None,
+        symbols: Optional[Iterable[str]] = None,
+    ) -> Optional[pa.Table]:
+        """Rows with ``start <= trade_date <= end`` from the month files (None when none exist)."""
+        start, end = trade_date_bounds(dates, self.store.timezone)
+        read_columns = None if columns is None else list(dict.fromkeys(["trade_date", "symbol", *columns]))
+        tables = []
+        for month in self._month_range(start // 100, end // 100):
+            path = self.month_path(month)
+            if not path.exists():
+                continue
+            try:
+                table = read_table(path, columns=read_columns)
+            except Exception:  # noqa: BLE001
+                logger.warning("Retrying read of %s under month lock", path, exc_info=True)
+                with file_lock(path, shared=True):
+                    table = read_table(path, columns=read_columns)
+            tables.append(_filter(table, start, end, symbols))
+        if not tables:
+            return None
+        table = concat_tables(tables)
+        return table.select(read_columns) if read_columns else table
+
+    def rebuild(self, years: Optional[Iterable[int]] = None, workers: int = 4) -> int:
+        """Rebuild month files from the per-symbol layout, one year at a time; returns rows mirrored.
+
+        Used when enabling the layout on an existing store or after a crash
+        between a symbol write and its mirror. Rows are merged (per-symbol
+        values win), so it is safe to run alongside fetch jobs.
+        """
+        wanted = set(years) if years is not None else None
+        by_year = {}
+        for symbol, freq, year, path in self.store.iter_partitions():
+            if freq == self.freq and (wanted is None or year in wanted):
+                by_year.setdefault(year, []).append((symbol, path))
+        total = 0
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for year in sorted(by_year):
+                tables = list(pool.map(lambda item: self.store._read_partition(item[1], item[0]), by_year[year]))
+                table = concat_tables(tables)
+                files = self.upsert(table)
+                total += table.num_rows
+                logger.info("Cross-section %s: symbols=%s rows=%s months=%s", year, len(tables), table.num_rows, files)
+        return total
+
+    @staticmethod
+    def _month_range(start: int, end: int) -> Iterator[int]:
+        month = start
+        while month <= end:
+            yield month
+            month = month + 89 if month % 100 == 12 else month + 1
+
+
+def _filter(table: pa.Table, start: int, end: int, symbols: Optional[Iterable[str]]) -> pa.Table:
+    trade_date = table.column("trade_date")
+    mask = pc.and_(pc.greater_equal(trade_date, start), pc.less_equal(trade_date, end))
+    if symbols is not None:
+        symbol = table.column("symbol")
+        if pa.types.is_dictionary(symbol.type):
+            symbol = symbol.cast(symbol.type.value_type)
+        mask = pc.and_(mask, pc.is_in(symbol, value_set=pa.array(list(symbols), type=pa.string())))
+    return table.filter(mask)
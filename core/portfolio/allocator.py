@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from core.data.panel import Panel
+from core.data.schema import trade_date_labels
+from core.data.xsection import DateRange
+
+
+@dataclass
+class AllocatorConfig:
+    top_k: int = 50
+    # 单票权重上限；选中标的不足 1/max_weight 只时余下为现金
+    max_weight: float = 0.05
+    # equal：等权；score：按正分数加权（全部非正时退化为等权）
+    weighting: str = "equal"
+    # 每 N 个交易日调仓一次
+    rebalance_every: int = 1
+    # 流动性过滤：过去 liquidity_window 日平均成交额不低于 min_turnover（0 关闭）
+    min_turnover: float = 0.0
+    liquidity_window: int = 20
+    # 单边交易成本（基点），按调仓权重变化绝对值之和扣除
+    cost_bps: float = 0.0
+
+    def __post_init__(self) -> None:
+        if self.top_k <= 0:
+            raise ValueError("top_k 必须为正")
+        if not 0 < self.max_weight <= 1:
+            raise ValueError("max_weight 需在 (0, 1] 内")
+        if self.weighting not in ("equal", "score"):
+            raise ValueError(f"weighting 只支持 equal/score: {self.weighting}")
+        if self.rebalance_every <= 0:
+            raise ValueError("rebalance_every 必须为正")
+
+
+@dataclass
+class AllocationResult:
+    """Target weights on rebalance dates plus daily portfolio returns over the whole span."""
+
+    dates: np.ndarray
+    symbols: List[str]
+    rebalance_rows: np.ndarray
+    weights: np.ndarray
+    gross_returns: np.ndarray
+    net_returns: np.ndarray
+    turnover: np.ndarray
+
+    def holdings(self, date: Optional[int] = None) -> pd.Series:
+        """Non-zero target weights of a rebalance date (YYYYMMDD; default: the latest)."""
+        pos = len(self.rebalance_rows) - 1
+        if date is not None:
+            pos = int(np.searchsorted(self.dates[self.rebalance_rows], date, "right")) - 1
+            if pos < 0:
+                raise KeyError(f"{date} 之前没有调仓")
+        row = self.weights[pos]
+        held = np.flatnonzero(row > 0)
+        weights = pd.Series(row[held], index=[self.symbols[i] for i in held], name="weight")
+        return weights.sort_values(ascending=False)
+
+    def frame(self) -> pd.DataFrame:
+        """Daily gross/net returns, net equity and turnover (0 off rebalance dates)."""
+        turnover = np.zeros(len(self.dates))
+        turnover[self.rebalance_rows] = self.turnover
+        return pd.DataFrame(
+            {
+                "gross_return": self.gross_returns,
+                "net_return": self.net_returns,
+                "equity": np.cumprod(1 + self.net_returns),
+                "turnover": turnover,
+            },
+            index=trade_date_labels(self.dates),
+        )
+
+
+def momentum_scores(close: np.ndarray, lookback: int = 20, skip: int = 0) -> np.ndarray:
+    """``close[t - skip] / close[t - lookback] - 1`` per symbol (NaN where history is short)."""
+    scores = np.full(close.shape, np.nan)
+    if lookback < len(close) and skip < lookback:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores[lookback:] = close[lookback - skip : len(close) - skip] / close[: len(close) - lookback] - 1
+    return scores
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """Carry the last finite value of each column forward (leading NaNs stay NaN)."""
+    rows = np.where(np.isfinite(values), np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return np.take_along_axis(values, rows, axis=0)
+
+
+def cap_weights(weights: np.ndarray, cap: float, max_iter: int = 50) -> np.ndarray:
+    """Clip each row at ``cap`` and hand the excess to uncapped names pro rata (water-filling)."""
+    weights = weights.copy()
+    for _ in range(max_iter):
+        excess = np.clip(weights - cap, 0, None).sum(axis=1)
+        if not (excess > 1e-12).any():
+            break
+        np.minimum(weights, cap, out=weights)
+        room = np.where((weights > 0) & (weights < cap), weights, 0.0)
+        total = room.sum(axis=1)
+        scale = np.divide(excess, total, out=np.zeros_like(excess), where=total > 0)
+        weights += room * scale[:, None]
+    return np.minimum(weights, cap)
+
+
+class PortfolioAllocator:
+    """Cross-sectional top-K portfolios over a dates × symbols score matrix.
+
+    On every ``rebalance_every``-th date the eligible universe (finite score
+    and close, traded that day, optional average-turnover floor) is ranked
+    with ``np.argpartition`` and the top ``top_k`` names get equal or
+    score-proportional weights capped at ``max_weight``. Weights set at a
+    close earn the next days' returns and drift until the next rebalance;
+    drift, turnover (one-way, ``sum |Δw| / 2``) and portfolio returns for all
+    dates are computed with cumulative log-growth matrices, no per-date
+    Python loop. Missing/suspended bars keep the last close.
+    """
+
+    def __init__(self, config: Optional[AllocatorConfig] = None) -> None:
+        self.config = config or AllocatorConfig()
+
+    def eligible(
+        self, close: np.ndarray, volume: Optional[np.ndarray] = None, turnover: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        mask = np.isfinite(close)
+        if volume is not None:
+            # 停牌（无成交）当日不可买入
+            mask &= np.nan_to_num(volume) > 0
+        if turnover is not None and self.config.min_turnover > 0:
+            window = self.config.liquidity_window
+            csum = np.cumsum(np.nan_to_num(turnover), axis=0)
+            rolling = csum.copy()
+            rolling[window:] -= csum[:-window]
+            counts = np.minimum(np.arange(1, len(close) + 1), window)[:, None]
+            mask &= rolling / counts >= self.config.min_turnover
+        return mask
+
+    def select(self, scores: np.ndarray, eligible: np.ndarray) -> np.ndarray:
+        """Boolean top-K membership of each row (fewer when fewer names are eligible)."""
+        ranked = np.where(eligible & np.isfinite(scores), scores, -np.inf)
+        k = min(self.config.top_k, ranked.shape[1])
+        top = np.argpartition(-ranked, k - 1, axis=1)[:, :k]
+        selected = np.zeros(ranked.shape, dtype=bool)
+        np.put_along_axis(selected, top, True, axis=1)
+        return selected & np.isfinite(ranked)
+
+    def target_weights(self, scores: np.ndarray, selected: np.ndarray) -> np.ndarray:
+        counts = selected.sum(axis=1, keepdims=True)
+        equal = np.divide(selected, counts, out=np.zeros(selected.shape), where=counts > 0)
+        if self.config.weighting == "score":
+            positive = np.where(selected, np.clip(np.nan_to_num(scores), 0, None), 0.0)
+            total = positive.sum(axis=1, keepdims=True)
+            weights = np.where(total > 0, np.divide(positive, total, out=np.zeros(positive.shape), where=total > 0), equal)
+        else:
+            weights = equal
+        return cap_weights(weights, self.config.max_weight)
+
+    def allocate(
+        self,
+        scores: np.ndarray,
+        close: np.ndarray,
+        dates: Sequence[int],
+        symbols: Sequence[str],
+        volume: Optional[np.ndarray] = None,
+        turnover: Optional[np.ndarray] = None,
+    ) -> AllocationResult:
+        """Run the rebalancing schedule over ``(dates, symbols)`` arrays aligned with ``scores``."""
+        close = np.asarray(close, dtype=np.float64)
+        scores = np.asarray(scores, dtype=np.float64)
+        if scores.shape != close.shape:
+            raise ValueError(f"scores {scores.shape} 与 close {close.shape} 形状不一致")
+        n_dates = len(close)
+        rows = np.arange(0, n_dates, self.config.rebalance_every)
+        eligible = self.eligible(close, volume, turnover)[rows]
+        targets = self.target_weights(scores[rows], self.select(scores[rows], eligible))
+
+        # 按标的累计对数增长；缺失/停牌日沿用上一收盘价（收益为 0，复牌日计入区间涨跌）
+        filled = forward_fill(close)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = filled[1:] / filled[:-1]
+        returns = np.where(np.isfinite(ratio), ratio - 1, 0.0)
+        log_growth = np.zeros(close.shape)
+        np.cumsum(np.log1p(returns), axis=0, out=log_growth[1:])
+
+        # 第 t 日收益由 t-1 日收盘时生效的那次调仓（segment）决定
+        segment = np.searchsorted(rows, np.arange(n_dates), side="right") - 1
+        seg_prev = segment[:-1]
+        base = log_growth[rows][seg_prev]
+        held = targets[seg_prev]
+        cash = 1 - held.sum(axis=1)
+        # 原地计算，峰值内存约为几个 dates × symbols 矩阵
+        growth = np.subtract(log_growth[:-1], base)
+        np.exp(growth, out=growth)
+        growth *= held
+        value_prev = cash + growth.sum(axis=1)
+        positions = np.subtract(log_growth[1:], base, out=growth)
+        del base
+        np.exp(positions, out=positions)
+        positions *= held
+        value_now = cash + positions.sum(axis=1)
+        gross = np.zeros(n_dates)
+        gross[1:] = value_now / value_prev - 1
+
+        # 调仓日换手：调仓前（漂移后）权重 vs 目标权重
+        drifted = np.zeros(targets.shape)
+        later = rows[rows > 0]
+        drifted[rows > 0] = positions[later - 1] / value_now[later - 1, None]
+        trades = np.abs(targets - drifted).sum(axis=1)
+        net = gross.copy()
+        net[rows] -= trades * self.config.cost_bps * 1e-4
+        return AllocationResult(
+            dates=np.asarray(dates),
+            symbols=list(symbols),
+            rebalance_rows=rows,
+            weights=targets,
+            gross_returns=gross,
+            net_returns=net,
+            turnover=trades / 2,
+        )
+
+    def allocate_panel(
+        self, panel: Panel, scores: np.ndarray, dates: Optional[DateRange] = None, symbols: Optional[Sequence[str]] = None
+    ) -> AllocationResult:
+        """``allocate`` with close/volume/turnover taken from a ``Panel`` (``scores`` aligned with the same slice)."""
+        fields = {name: panel.values(name, dates, symbols) for name in ("close", "volume", "turnover") if name in panel.fields}
+        return self.allocate(
+            scores,
+            fields["close"],
+            panel.dates[panel.date_slice(dates)],
+            list(symbols) if symbols is not None else panel.symbols,
+            volume=fields.get("volume"),
+            turnover=fields.get("turnover"),
+        )
@@ -0,0 +1,176 @@
+"""Opt-in cProfile + tracemalloc hooks shared by scripts and MCP tools.
+
+Enabled by ``--profile`` on scripts (see ``enable_profiling``) or by setting
+``QUANT_PROFILE=1``. Output goes to ``logs/profile`` (override with
+``QUANT_PROFILE_DIR``): a ``.prof`` pstats dump plus a ``.mem.json`` with peak
+memory and top allocation sites per run / tool call.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import functools
+import itertools
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ENV_VAR = "QUANT_PROFILE"
+DIR_ENV_VAR = "QUANT_PROFILE_DIR"
+DEFAULT_DIR = Path(__file__).resolve().parents[1] / "logs" / "profile"
+TRACE_FRAMES = 10
+TOP_ALLOCATIONS = 30
+
+_enabled = os.getenv(ENV_VAR, "").lower() in ("1", "true", "yes", "on")
+# cProfile 不能在同一进程内嵌套/并发开启，同一时刻只采集一个会话
+_active = threading.Lock()
+# 文件名序号：同一进程同一时刻（如同一秒内两次工具调用）的输出不互相覆盖
+_run_ids = itertools.count(1)
+
+
+def enable_profiling(enabled: bool = True) -> None:
+    """Turn profiling on/off for the current process (used by ``--profile`` flags)."""
+    global _enabled
+    _enabled = enabled
+
+
+def profiling_enabled() -> bool:
+    return _enabled
+
+
+def profile_dir() -> Path:
+    return Path(os.getenv(DIR_ENV_VAR, str(DEFAULT_DIR)))
+
+
+@contextmanager
+def profile_run(name: str, enabled: Optional[bool] = None) -> Iterator[None]:
+    """Profile the enclosed block when enabled; a no-op otherwise."""
+    if not (_enabled if enabled is None else enabled):
+        yield
+        return
+    if not _active.acquire(blocking=False):
+        logger.debug("Profiler busy, skipping profile for %s", name)
+        yield
+        return
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACE_FRAMES)
+    else:
+        tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    started_at = datetime.now()
+    t0 = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        wall = time.perf_counter() - t0
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            _write_profile(name, started_at, wall, profiler, snapshot, peak)
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to write profile for %s", name)
+        finally:
+            _active.release()
+
+
+def profiled(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Decorator form of ``profile_run``; costs a single flag check when disabled."""
+
+    def decorator(fn: Callable) -> Callable:
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with profile_run(label, enabled=True):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _write_profile(
+    name: str,
+    started_at: datetime,
+    wall: float,
+    profiler: cProfile.Profile,
+    snapshot: tracemalloc.Snapshot,
+    peak: int,
+) -> None:
+    out_dir = profile_dir()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = f"{name}-{started_at:%Y%m%d-%H%M%S-%f}-{os.getpid()}-{next(_run_ids)}"
+    prof_path = out_dir / f"{stem}.prof"
+    profiler.dump_stats(str(prof_path))
+
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        )
+    )
+    allocations = [
+        {
+            "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_bytes": stat.size,
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+    ]
+    mem_path = out_dir / f"{stem}.mem.json"
+    mem_path.write_text(
+        json.dumps(
+            {
+                "name": name,
+                "started_at": started_at.isoformat(timespec="seconds"),
+                "wall_seconds": round(wall, 4),
+                "peak_bytes": peak,
+                "top_allocations": allocations,
+            },
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    logger.info("Profile for %s written to %s (wall=%.2fs peak=%.1fMB)", name, prof_path, wall, peak / 1e6)
+
+
+def summarize(prof_path: Path, top: int = 20, sort: str = "cumulative") -> str:
+    """Render top functions (pstats) and top allocation sites for one profile run."""
+    prof_path = Path(prof_path)
+    lines: List[str] = [f"== {prof_path.name}"]
+    stats = pstats.Stats(str(prof_path)).sort_stats(sort)
+    lines.append(f"Total calls: {stats.total_calls}  total time: {stats.total_tt:.3f}s")
+    lines.append(f"{'ncalls':>10} {'tottime':>9} {'cumtime':>9}  function")
+    for func in stats.fcn_list[:top]:
+        cc, nc, tt, ct, _ = stats.stats[func]
+        filename, lineno, funcname = func
+        ncalls = f"{nc}/{cc}" if nc != cc else str(nc)
+        lines.append(f"{ncalls:>10} {tt:9.3f} {ct:9.3f}  {filename}:{lineno}({funcname})")
+
+    mem_path = prof_path.with_name(prof_path.name[: -len(".prof")] + ".mem.json")
+    if mem_path.exists():
+        mem = json.loads(mem_path.read_text(encoding="utf-8"))
+        lines.append(f"Wall: {mem['wall_seconds']:.3f}s  peak memory: {mem['peak_bytes'] / 1e6:.1f}MB")
+        lines.append(f"{'size':>12} {'count':>8}  allocation site")
+        for alloc in mem["top_allocations"][:top]:
+            lines.append(f"{alloc['size_bytes'] / 1e3:10.1f}KB {alloc['count']:>8}  {alloc['site']}")
+    return "\n".join(lines)
@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from core.data.fileio import file_lock, tmp_path, write_text_atomic
+from core.data.panel import Panel, PanelCache
+from core.data.storage import LocalParquetStore
+
+logger = logging.getLogger(__name__)
+
+RISK_DIR = "_risk"
+CURRENT_FILE = "CURRENT"
+STATE_ARRAYS = ("mean_num", "mean_den", "cov_num", "cov_den", "counts")
+
+Weights = Union[Mapping[str, float], pd.Series]
+
+
+@dataclass
+class RiskConfig:
+    # EWMA 半衰期（交易日）
+    halflife: float = 60.0
+    # 单个标的有效收益数不足时不给出风险估计
+    min_periods: int = 20
+    annual_periods: int = 252
+    # 首次构建/补算时每批处理的交易日数（限制收益矩阵内存）
+    block_days: int = 250
+
+    def __post_init__(self) -> None:
+        if self.halflife <= 0:
+            raise ValueError("halflife 必须为正")
+        if self.min_periods < 2:
+            raise ValueError("min_periods 至少为 2")
+        if self.block_days <= 0:
+            raise ValueError("block_days 必须为正")
+
+    @property
+    def decay(self) -> float:
+        return 0.5 ** (1 / self.halflife)
+
+
+@dataclass
+class EWMAState:
+    """Exponentially weighted mean/covariance accumulators of daily returns.
+
+    Numerators and denominators are decayed separately, per symbol for the
+    mean and per pair for the covariance, so missing returns (suspensions,
+    names not yet listed) neither decay nor dilute an estimate: the
+    estimate is ``num / den`` over the days both names traded, i.e. the
+    bias-adjusted EWMA with pairwise-complete observations. Each return is
+    centred on the symbol's mean *before* that day.
+    """
+
+    symbols: List[str]
+    last_date: Optional[int]
+    mean_num: np.ndarray
+    mean_den: np.ndarray
+    cov_num: np.ndarray
+    cov_den: np.ndarray
+    counts: np.ndarray
+    days: int = 0
+
+    def __post_init__(self) -> None:
+        self._symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def empty(cls, symbols: Sequence[str]) -> "EWMAState":
+        n = len(symbols)
+        return cls(
+            symbols=list(symbols),
+            last_date=None,
+            mean_num=np.zeros(n),
+            mean_den=np.zeros(n),
+            cov_num=np.zeros((n, n)),
+            cov_den=np.zeros((n, n), dtype=np.float32),
+            counts=np.zeros(n, dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, root: Path, mmap: bool = True) -> "EWMAState":
+        meta = json.loads((root / "manifest.json").read_text(encoding="utf-8"))
+        arrays = {name: np.load(root / f"{name}.npy", mmap_mode="r" if mmap else None) for name in STATE_ARRAYS}
+        return cls(symbols=list(meta["symbols"]), last_date=meta["last_date"], days=meta["days"], **arrays)
+
+    def save(self, target: Path, halflife: float) -> Path:
+        """Write the state to a new directory ``target`` (staged next to it, then renamed)."""
+        staging = tmp_path(target)
+        staging.mkdir(parents=True)
+        try:
+            for name in STATE_ARRAYS:
+                np.save(staging / f"{name}.npy", getattr(self, name))
+            meta = {
+                "symbols": self.symbols,
+                "last_date": self.last_date,
+                "days": self.days,
+                "halflife": halflife,
+            }
+            (staging / "manifest.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+            os.rename(staging, target)
+        finally:
+            if staging.exists():
+                shutil.rmtree(staging)
+        return target
+
+    def positions(self, symbols: Sequence[str]) -> np.ndarray:
+        missing = [s for s in symbols if s not in self._symbol_index]
+        if missing:
+            raise KeyError(f"风险模型中无标的: {missing[:5]}")
+        return np.array([self._symbol_index[s] for s in symbols], dtype=np.intp)
+
+    def extend(self, symbols: Sequence[str]) -> "EWMAState":
+        """A copy whose universe also covers ``symbols`` (new names start with empty accumulators)."""
+        added = [s for s in symbols if s not in self._symbol_index]
+        if not added:
+            return self
+        state = EWMAState.empty(self.symbols + added)
+        n = len(self.symbols)
+        state.last_date = self.last_date
+        state.days = self.days
+        for name in STATE_ARRAYS:
+            target = getattr(state, name)
+            if target.ndim == 2:
+                target[:n, :n] = getattr(self, name)
+            else:
+                target[:n] = getattr(self, name)
+        return state
+
+    def update(self, returns: np.ndarray, decay: float) -> None:
+        """Fold in a block of daily return rows (columns in ``symbols`` order, NaN = missing).
+
+        Means are advanced row by row (O(N) each); the covariance block is
+        one weighted ``D.T @ D`` product, equal to applying the rank-one
+        recursion ``C = λC + (1-λ) d dᵀ`` once per row.
+        """
+        returns = np.asarray(returns, dtype=np.float64)
+        rows = len(returns)
+        if rows == 0:
+            return
+        observed = np.isfinite(returns)
+        deviations = np.zeros(returns.shape)
+        centred = np.zeros(returns.shape, dtype=bool)
+        for t in range(rows):
+            # 当日收益相对此前均值的偏离；首个观测没有均值可减，只计入均值
+            has_mean = observed[t] & (self.mean_den > 0)
+            np.subtract(returns[t], self.mean_num / np.where(has_mean, self.mean_den, 1.0), out=deviations[t], where=has_mean)
+            centred[t] = has_mean
+            self.mean_num *= decay
+            self.mean_den *= decay
+            self.mean_num += (1 - decay) * np.where(observed[t], returns[t], 0.0)
+            self.mean_den += (1 - decay) * observed[t]
+        self.counts += observed.sum(axis=0)
+
+        weights = (1 - decay) * decay ** np.arange(rows - 1, -1, -1, dtype=np.float64)
+        self.cov_num *= decay**rows
+        self.cov_num += (deviations * weights[:, None]).T @ deviations
+        mask = centred.astype(np.float32)
+        self.cov_den *= np.float32(decay**rows)
+        self.cov_den += (mask * weights[:, None].astype(np.float32)).T @ mask
+        self.days += rows
+
+    def mean(self, index: Optional[np.ndarray] = None) -> np.ndarray:
+        num, den = (self.mean_num, self.mean_den) if index is None else (self.mean_num[index], self.mean_den[index])
+        return np.divide(num, den, out=np.full(len(num), np.nan), where=den > 0)
+
+    def covariance(self, index: np.ndarray, min_periods: int) -> np.ndarray:
+        """Per-period covariance sub-matrix of ``index`` (NaN for names with too little history)."""
+        block = np.ix_(index, index)
+        num = np.asarray(self.cov_num[block], dtype=np.float64)
+        den = np.asarray(self.cov_den[block], dtype=np.float64)
+        cov = np.divide(num, den, out=np.full(num.shape, np.nan), where=den > 1e-12)
+        short = np.asarray(self.counts[index]) < min_periods
+        cov[short, :] = np.nan
+        cov[:, short] = np.nan
+        return cov
+
+
+class RiskExposure:
+    """Read-only risk queries against one ``EWMAState`` (memory-mapped: only the basket's sub-block is read)."""
+
+    def __init__(self, state: EWMAState, config: Optional[RiskConfig] = None) -> None:
+        self.state = state
+        self.config = config or RiskConfig()
+
+    @property
+    def as_of(self) -> Optional[int]:
+        return self.state.last_date
+
+    def covariance(self, symbols: Sequence[str], annualize: bool = True) -> pd.DataFrame:
+        cov = self.state.covariance(self.state.positions(symbols), self.config.min_periods)
+        if annualize:
+            cov *= self.config.annual_periods
+        return pd.DataFrame(cov, index=list(symbols), columns=list(symbols))
+
+    def volatility(self, symbols: Sequence[str]) -> pd.Series:
+        """Annualised EWMA volatility of each symbol."""
+        variances = np.diag(self.covariance(symbols).to_numpy())
+        return pd.Series(np.sqrt(np.clip(variances, 0, None)), index=list(symbols), name="volatility")
+
+    def correlation(self, symbols: Sequence[str]) -> pd.DataFrame:
+        cov = self.covariance(symbols, annualize=False).to_numpy()
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = np.clip(cov / np.outer(std, std), -1, 1)
+        np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=list(symbols), columns=list(symbols))
+
+    def portfolio_volatility(self, weights: Weights) -> float:
+        """Annualised volatility of a weighted basket (names without a risk estimate are dropped)."""
+        symbols, w, _ = self._weights(weights)
+        return self._volatility(symbols, w)
+
+    def risk_contributions(self, weights: Weights) -> pd.DataFrame:
+        """Marginal (∂σ/∂w) and total (w·∂σ/∂w) volatility contributions; contributions sum to the basket volatility."""
+        symbols, w, _ = self._weights(weights)
+        return self._contributions(symbols, w)
+
+    def clusters(self, symbols: Sequence[str], threshold: float = 0.6) -> List[List[str]]:
+        """Average-linkage clusters whose mean pairwise correlation stays at or above ``threshold``.
+
+        Names without a risk estimate form singletons. Largest clusters first.
+        """
+        corr = self.correlation(symbols).to_numpy()
+        corr = np.where(np.isfinite(corr), corr, -1.0)
+        groups: List[List[int]] = [[i] for i in range(len(symbols))]
+        # 簇间平均相关，合并后按簇大小加权更新（UPGMA）
+        link = corr.copy()
+        np.fill_diagonal(link, -np.inf)
+        active = np.ones(len(symbols), dtype=bool)
+        while active.sum() > 1:
+            masked = np.where(np.outer(active, active), link, -np.inf)
+            a, b = np.unravel_index(int(np.argmax(masked)), masked.shape)
+            if masked[a, b] < threshold:
+                break
+            size_a, size_b = len(groups[a]), len(groups[b])
+            merged = (link[a] * size_a + link[b] * size_b) / (size_a + size_b)
+            link[a, :] = merged
+            link[:, a] = merged
+            link[a, a] = -np.inf
+            groups[a] = groups[a] + groups[b]
+            active[b] = False
+        result = [[symbols[i] for i in groups[k]] for k in np.flatnonzero(active)]
+        return sorted(result, key=len, reverse=True)
+
+    def basket_report(self, weights: Weights, threshold: float = 0.6, top: int = 10) -> Dict[str, object]:
+        """Volatility, largest risk contributors and correlated clusters of a basket in one call."""
+        symbols, w, unavailable = self._weights(weights)
+        contributions = self._contributions(symbols, w)
+        clusters = self.clusters(symbols, threshold) if symbols else []
+        return {
+            "as_of": self.as_of,
+            "volatility": self._volatility(symbols, w),
+            "gross_weight": float(np.abs(w).sum()),
+            "top_contributors": contributions.head(top).reset_index(names="symbol").to_dict(orient="records"),
+            "clusters": [c for c in clusters if len(c) > 1],
+            "unavailable": unavailable,
+        }
+
+    def _volatility(self, symbols: List[str], w: np.ndarray) -> float:
+        if not symbols:
+            return float("nan")
+        cov = self.covariance(symbols).to_numpy()
+        return float(np.sqrt(max(w @ cov @ w, 0.0)))
+
+    def _contributions(self, symbols: List[str], w: np.ndarray) -> pd.DataFrame:
+        columns = ["weight", "volatility", "marginal", "contribution", "share"]
+        if not symbols:
+            return pd.DataFrame(columns=columns)
+        cov = self.covariance(symbols).to_numpy()
+        sigma = float(np.sqrt(max(w @ cov @ w, 0.0)))
+        marginal = cov @ w / sigma if sigma > 0 else np.zeros(len(w))
+        contribution = w * marginal
+        frame = pd.DataFrame(
+            {
+                "weight": w,
+                "volatility": np.sqrt(np.clip(np.diag(cov), 0, None)),
+                "marginal": marginal,
+                "contribution": contribution,
+                "share": contribution / sigma if sigma > 0 else np.zeros(len(w)),
+            },
+            index=symbols,
+        )
+        return frame.sort_values("contribution", ascending=False)
+
+    def _weights(self, weights: Weights) -> Tuple[List[str], np.ndarray, List[str]]:
+        series = pd.Series(weights, dtype=np.float64)
+        series = series[series != 0]
+        known = [s for s in series.index if s in self.state._symbol_index]
+        unknown = [s for s in series.index if s not in self.state._symbol_index]
+        if known:
+            counts = np.asarray(self.state.counts[self.state.positions(known)])
+            short = [s for s, c in zip(known, counts) if c < self.config.min_periods]
+        else:
+            short = []
+        symbols = [s for s in known if s not in set(short)]
+        if unknown or short:
+            logger.warning("Dropping symbols without risk estimate: %s", (unknown + short)[:10])
+        return symbols, series[symbols].to_numpy(), unknown + short
+
+
+class RiskModel:
+    """Persistent EWMA risk state of a ``LocalParquetStore``, advanced from the daily panel.
+
+    ``_risk/<name>/<version>/`` holds the accumulator arrays (``.npy``) and a
+    ``manifest.json`` with the universe and the last folded-in trade date;
+    ``_risk/<name>/CURRENT`` names the latest version. ``update`` folds in
+    only the panel dates after ``last_date`` (one rank-one update per day),
+    so a daily run costs O(N²) instead of re-estimating from full history.
+    Versions are staged and renamed into place; readers keep the mapping
+    they opened.
+    """
+
+    def __init__(self, store: LocalParquetStore, config: Optional[RiskConfig] = None, name: Optional[str] = None) -> None:
+        self.store = store
+        self.config = config or RiskConfig()
+        self.name = name or f"ewma_hl{self.config.halflife:g}"
+        self.root = Path(store.base_dir) / RISK_DIR / self.name
+
+    def current_version(self) -> Optional[str]:
+        path = self.root / CURRENT_FILE
+        if not path.exists():
+            return None
+        return path.read_text(encoding="utf-8").strip() or None
+
+    def load(self, mmap: bool = True) -> Optional[EWMAState]:
+        version = self.current_version()
+        if version is None:
+            return None
+        return EWMAState.load(self.root / version, mmap=mmap)
+
+    def exposure(self) -> RiskExposure:
+        state = self.load()
+        if state is None:
+            raise FileNotFoundError(f"尚未构建风险模型: {self.root}")
+        return RiskExposure(state, self.config)
+
+    def update(self, panel: Optional[Panel] = None, rebuild: bool = False) -> EWMAState:
+        """Fold the panel's new trade dates into the persisted state (``rebuild``: start over)."""
+        panel = panel or PanelCache(self.store).ensure()
+        with file_lock(self.root / "update"):
+            state = None if rebuild else self.load(mmap=False)
+            state = (state or EWMAState.empty(panel.symbols)).extend(panel.symbols)
+            start = 0 if state.last_date is None else int(np.searchsorted(panel.dates, state.last_date, "right"))
+            if start >= len(panel.dates):
+                return state
+            columns = state.positions(panel.symbols)
+            close = panel.field("close")
+            for begin in range(max(start, 1), len(panel.dates), self.config.block_days):
+                end = min(begin + self.config.block_days, len(panel.dates))
+                block = np.full((end - begin, len(state.symbols)), np.nan)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    # 相邻两日均有收盘价才计收益（停牌、上市首日为缺失）
+                    block[:, columns] = close[begin:end] / close[begin - 1 : end - 1] - 1
+                block[~np.isfinite(block)] = np.nan
+                state.update(block, self.config.decay)
+            state.last_date = int(panel.dates[-1])
+            version = f"{state.last_date}-{uuid.uuid4().hex[:8]}"
+            state.save(self.root / version, self.config.halflife)
+            write_text_atomic(self.root / CURRENT_FILE, version)
+            self.prune()
+        logger.info(
+            "Risk model %s updated to %s: symbols=%s days=%s", self.name, state.last_date, len(state.symbols), state.days
+        )
+        return state
+
+    def prune(self, keep: int = 2) -> List[str]:
+        """Delete all but the ``keep`` newest versions (never ``CURRENT``)."""
+        current = self.current_version()
+        versions = sorted(
+            (p.parent for p in self.root.glob("*/manifest.json") if not p.parent.name.startswith(".")),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        removed = []
+        for path in versions[keep:]:
+            if path.name == current:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path.name)
+        return removed
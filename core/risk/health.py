@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from core.data.fileio import atomic_path, file_lock
+
+logger = logging.getLogger(__name__)
+
+HEALTH_DIR = "_health"
+# 策略整体（组合层面）收益使用的 symbol
+PORTFOLIO = "*"
+STATUSES = ("insufficient", "keep", "reduce", "suspend")
+_STRATEGY_ID = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+Records = Union[pd.DataFrame, Mapping[str, float]]
+
+
+@dataclass
+class HealthConfig:
+    windows: Tuple[int, ...] = (20, 60)
+    annual_periods: int = 252
+    # 窗口内有效收益数不足时 status=insufficient
+    min_periods: int = 10
+    # Sharpe 低于 warn 建议降权，低于 stop 建议停用（年化）
+    sharpe_warn: float = 0.0
+    sharpe_stop: float = -1.0
+    # 自窗口内净值高点的回撤超过 warn 降权、超过 stop 停用（正数）
+    drawdown_warn: float = 0.10
+    drawdown_stop: float = 0.20
+    # 窗口平均换手上限（单边，None 不检查），超过时降权
+    turnover_limit: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        self.windows = tuple(sorted({int(w) for w in self.windows}))
+        if not self.windows or self.windows[0] < 2:
+            raise ValueError("windows 至少包含一个 >= 2 的窗口")
+        if self.sharpe_stop > self.sharpe_warn or self.drawdown_stop < self.drawdown_warn:
+            raise ValueError("stop 阈值应比 warn 更严格")
+
+
+class RollingWindow:
+    """Rolling statistics of the last ``size`` updates of many return series.
+
+    Sums of returns, squared returns, log growth and turnover slide by
+    adding the new column and subtracting the one leaving the ring buffer;
+    the running maximum of log equity is a monotonic queue per series kept
+    in ``(series, size)`` arrays (values decreasing from head to tail), so
+    one update is a handful of vectorised operations whatever the window.
+    Missing returns (NaN) are not observations but still advance the window.
+    """
+
+    ARRAYS = ("returns", "turnover", "count", "total", "squares", "growth", "turnover_total", "turnover_count",
+              "queue_values", "queue_steps", "queue_head", "queue_len")
+
+    def __init__(self, size: int, series: int = 0) -> None:
+        self.size = size
+        self.step = 0
+        self.returns = np.full((series, size), np.nan)
+        self.turnover = np.full((series, size), np.nan)
+        self.count = np.zeros(series, dtype=np.int64)
+        self.total = np.zeros(series)
+        self.squares = np.zeros(series)
+        self.growth = np.zeros(series)
+        self.turnover_total = np.zeros(series)
+        self.turnover_count = np.zeros(series, dtype=np.int64)
+        self.queue_values = np.zeros((series, size))
+        self.queue_steps = np.zeros((series, size), dtype=np.int64)
+        self.queue_head = np.zeros(series, dtype=np.int64)
+        self.queue_len = np.zeros(series, dtype=np.int64)
+
+    def grow(self, series: int) -> None:
+        """Add empty series up to ``series`` rows."""
+        extra = series - len(self.count)
+        if extra <= 0:
+            return
+        for name in self.ARRAYS:
+            array = getattr(self, name)
+            fill = np.nan if name in ("returns", "turnover") else 0
+            pad = np.full((extra,) + array.shape[1:], fill, dtype=array.dtype)
+            setattr(self, name, np.concatenate([array, pad]))
+
+    def push(self, returns: np.ndarray, turnover: np.ndarray, log_equity: np.ndarray) -> None:
+        pos = self.step % self.size
+        # 移出环形缓冲区中最旧的一列
+        old, old_turnover = self.returns[:, pos], self.turnover[:, pos]
+        old_ok, old_turnover_ok = np.isfinite(old), np.isfinite(old_turnover)
+        self.count -= old_ok
+        self.total -= np.where(old_ok, old, 0.0)
+        self.squares -= np.where(old_ok, old * old, 0.0)
+        self.growth -= np.where(old_ok, np.log1p(np.where(old_ok, old, 0.0)), 0.0)
+        self.turnover_count -= old_turnover_ok
+        self.turnover_total -= np.where(old_turnover_ok, old_turnover, 0.0)
+
+        ok, turnover_ok = np.isfinite(returns), np.isfinite(turnover)
+        self.returns[:, pos] = returns
+        self.turnover[:, pos] = turnover
+        self.count += ok
+        self.total += np.where(ok, returns, 0.0)
+        self.squares += np.where(ok, returns * returns, 0.0)
+        self.growth += np.where(ok, np.log1p(np.where(ok, returns, 0.0)), 0.0)
+        self.turnover_count += turnover_ok
+        self.turnover_total += np.where(turnover_ok, turnover, 0.0)
+        self._push_max(log_equity)
+        self.step += 1
+        # 每满一个窗口用环形缓冲区重算一次滑动和，消除累计浮点误差
+        if self.step % self.size == 0:
+            self._resync()
+
+    def peak(self) -> np.ndarray:
+        """Maximum log equity over the window (queue head)."""
+        rows = np.arange(len(self.queue_head))
+        return np.where(self.queue_len > 0, self.queue_values[rows, self.queue_head], np.nan)
+
+    def _push_max(self, value: np.ndarray) -> None:
+        rows = np.arange(len(value))
+        size = self.size
+        # 队首已滑出窗口则出队（每步最多一个）
+        expired = (self.queue_len > 0) & (self.queue_steps[rows, self.queue_head] <= self.step - size)
+        self.queue_head[expired] = (self.queue_head[expired] + 1) % size
+        self.queue_len[expired] -= 1
+        # 队尾不大于新值的元素不可能再成为最大值，逐层弹出（均摊 O(1)）
+        while True:
+            tail = (self.queue_head + self.queue_len - 1) % size
+            pop = (self.queue_len > 0) & (self.queue_values[rows, tail] <= value)
+            if not pop.any():
+                break
+            self.queue_len[pop] -= 1
+        pos = (self.queue_head + self.queue_len) % size
+        self.queue_values[rows, pos] = value
+        self.queue_steps[rows, pos] = self.step
+        self.queue_len += 1
+
+    def _resync(self) -> None:
+        ok = np.isfinite(self.returns)
+        values = np.where(ok, self.returns, 0.0)
+        self.count = ok.sum(axis=1)
+        self.total = values.sum(axis=1)
+        self.squares = (values * values).sum(axis=1)
+        self.growth = np.log1p(values).sum(axis=1)
+        turnover_ok = np.isfinite(self.turnover)
+        self.turnover_count = turnover_ok.sum(axis=1)
+        self.turnover_total = np.where(turnover_ok, self.turnover, 0.0).sum(axis=1)
+
+    def stats(self, log_equity: np.ndarray, annual_periods: int) -> Dict[str, np.ndarray]:
+        """Per-series window metrics; Sharpe uses the repo's definitions (ddof=1, ``1e-8`` guard)."""
+        count = self.count.astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = self.total / count
+            variance = np.clip((self.squares - count * mean * mean) / (count - 1), 0, None)
+            volatility = np.sqrt(variance) * annual_periods**0.5
+            sharpe = mean * annual_periods / (volatility + 1e-8)
+            turnover = self.turnover_total / self.turnover_count
+        enough = self.count >= 2
+        return {
+            "observations": self.count.copy(),
+            "sharpe": np.where(enough, sharpe, np.nan),
+            "volatility": np.where(enough, volatility, np.nan),
+            "window_return": np.where(self.count > 0, np.expm1(self.growth), np.nan),
+            "drawdown": np.expm1(log_equity - self.peak()),
+            "turnover": turnover,
+        }
+
+    def state(self, prefix: str) -> Dict[str, np.ndarray]:
+        arrays = {f"{prefix}{name}": getattr(self, name) for name in self.ARRAYS}
+        arrays[f"{prefix}step"] = np.array(self.step)
+        return arrays
+
+    @classmethod
+    def from_state(cls, size: int, arrays: Mapping[str, np.ndarray], prefix: str) -> "RollingWindow":
+        window = cls(size)
+        for name in cls.ARRAYS:
+            setattr(window, name, np.array(arrays[f"{prefix}{name}"]))
+        window.step = int(arrays[f"{prefix}step"])
+        return window
+
+
+class StrategyHealthChecker:
+    """Incremental rolling-window health of one strategy's return series.
+
+    One series per symbol (``PORTFOLIO`` for the strategy as a whole); each
+    ``update`` appends one trade date for every series at once and advances
+    every configured window in O(series) array operations, independent of
+    window length and history. ``report`` turns the window statistics into
+    a ``status_suggestion`` (keep / reduce / suspend). State persists in
+    ``_health/<strategy_id>.npz`` under the store directory.
+    """
+
+    def __init__(self, strategy_id: str, config: Optional[HealthConfig] = None, path: Optional[Path] = None) -> None:
+        if not _STRATEGY_ID.match(strategy_id):
+            raise ValueError(f"strategy_id 只能包含字母、数字、._-: {strategy_id}")
+        self.strategy_id = strategy_id
+        self.config = config or HealthConfig()
+        self.path = Path(path) if path is not None else None
+        self.symbols: List[str] = []
+        self._symbol_index: Dict[str, int] = {}
+        self.last_date: Optional[int] = None
+        self.updates = 0
+        self.log_equity = np.zeros(0)
+        self.all_time_peak = np.zeros(0)
+        self.max_drawdown = np.zeros(0)
+        self.windows = {size: RollingWindow(size) for size in self.config.windows}
+
+    @classmethod
+    def open(cls, base_dir: Path, strategy_id: str, config: Optional[HealthConfig] = None) -> "StrategyHealthChecker":
+        """Checker persisted under ``base_dir/_health/`` (empty if the strategy has no state yet)."""
+        checker = cls(strategy_id, config, Path(base_dir) / HEALTH_DIR / f"{strategy_id}.npz")
+        if checker.path.exists():
+            checker._load()
+        return checker
+
+    def update(self, trade_date: int, returns: Records, turnover: Optional[Mapping[str, float]] = None) -> None:
+        """Append one trade date (YYYYMMDD).
+
+        ``returns`` is ``{symbol: return}`` or a DataFrame with ``symbol``,
+        ``return`` and optionally ``turnover`` columns; series without a
+        value for the date count as missing.
+        """
+        trade_date = int(trade_date)
+        if self.last_date is not None and trade_date <= self.last_date:
+            raise ValueError(f"{self.strategy_id} 已更新到 {self.last_date}，不能写入 {trade_date}")
+        frame = _records_frame(returns, turnover)
+        self._ensure_symbols(frame["symbol"])
+        rows = np.array([self._symbol_index[s] for s in frame["symbol"]], dtype=np.intp)
+        values = np.full(len(self.symbols), np.nan)
+        values[rows] = frame["return"].to_numpy(dtype=np.float64)
+        trades = np.full(len(self.symbols), np.nan)
+        trades[rows] = frame["turnover"].to_numpy(dtype=np.float64)
+
+        ok = np.isfinite(values)
+        self.log_equity += np.where(ok, np.log1p(np.where(ok, values, 0.0)), 0.0)
+        np.maximum(self.all_time_peak, self.log_equity, out=self.all_time_peak)
+        np.minimum(self.max_drawdown, np.expm1(self.log_equity - self.all_time_peak), out=self.max_drawdown)
+        for window in self.windows.values():
+            window.push(values, trades, self.log_equity)
+        self.last_date = trade_date
+        self.updates += 1
+
+    def report(self, window: Optional[int] = None, symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Window metrics and ``status_suggestion`` per series (``window`` defaults to the longest)."""
+        size = window or self.config.windows[-1]
+        if size not in self.windows:
+            raise ValueError(f"未维护 {size} 日窗口，可用: {list(self.windows)}")
+        stats = self.windows[size].stats(self.log_equity, self.config.annual_periods)
+        status, reasons = self._suggest(stats)
+        frame = pd.DataFrame(
+            {
+                "strategy": self.strategy_id,
+                "symbol": self.symbols,
+                "window": size,
+                **stats,
+                "max_drawdown": self.max_drawdown,
+                "status_suggestion": status,
+                "reasons": reasons,
+            }
+        )
+        if symbols is not None:
+            frame = frame[frame["symbol"].isin(list(symbols))]
+        return frame.reset_index(drop=True)
+
+    def save(self) -> Path:
+        if self.path is None:
+            raise ValueError("未指定保存路径，请使用 StrategyHealthChecker.open")
+        arrays = {
+            "symbols": np.array(self.symbols, dtype=str),
+            "windows": np.array(self.config.windows),
+            "last_date": np.array(-1 if self.last_date is None else self.last_date),
+            "updates": np.array(self.updates),
+            "log_equity": self.log_equity,
+            "all_time_peak": self.all_time_peak,
+            "max_drawdown": self.max_drawdown,
+        }
+        for size, window in self.windows.items():
+            arrays.update(window.state(f"w{size}_"))
+        with atomic_path(self.path) as tmp, tmp.open("wb") as handle:
+            np.savez(handle, **arrays)
+        return self.path
+
+    def _load(self) -> None:
+        with np.load(self.path) as arrays:
+            windows = tuple(int(w) for w in arrays["windows"])
+            if windows != self.config.windows:
+                raise ValueError(f"{self.path} 的窗口 {windows} 与配置 {self.config.windows} 不一致，需删除后重建")
+            self.symbols = [str(s) for s in arrays["symbols"]]
+            self._symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+            last_date = int(arrays["last_date"])
+            self.last_date = None if last_date < 0 else last_date
+            self.updates = int(arrays["updates"])
+            self.log_equity = np.array(arrays["log_equity"])
+            self.all_time_peak = np.array(arrays["all_time_peak"])
+            self.max_drawdown = np.array(arrays["max_drawdown"])
+            self.windows = {size: RollingWindow.from_state(size, arrays, f"w{size}_") for size in windows}
+
+    def _ensure_symbols(self, symbols: Sequence[str]) -> None:
+        added = [s for s in dict.fromkeys(symbols) if s not in self._symbol_index]
+        if not added:
+            return
+        for symbol in added:
+            self._symbol_index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        extra = np.zeros(len(added))
+        self.log_equity = np.concatenate([self.log_equity, extra])
+        self.all_time_peak = np.concatenate([self.all_time_peak, extra])
+        self.max_drawdown = np.concatenate([self.max_drawdown, extra])
+        for window in self.windows.values():
+            window.grow(len(self.symbols))
+
+    def _suggest(self, stats: Dict[str, np.ndarray]) -> Tuple[np.ndarray, List[str]]:
+        cfg = self.config
+        sharpe, drawdown, turnover = stats["sharpe"], stats["drawdown"], stats["turnover"]
+        sharpe_stop, drawdown_stop = sharpe < cfg.sharpe_stop, drawdown <= -cfg.drawdown_stop
+        # 同一指标只报告最严重的一级
+        checks = [
+            ("suspend", sharpe_stop, f"sharpe<{cfg.sharpe_stop:g}"),
+            ("suspend", drawdown_stop, f"drawdown>={cfg.drawdown_stop:.0%}"),
+            ("reduce", (sharpe < cfg.sharpe_warn) & ~sharpe_stop, f"sharpe<{cfg.sharpe_warn:g}"),
+            ("reduce", (drawdown <= -cfg.drawdown_warn) & ~drawdown_stop, f"drawdown>={cfg.drawdown_warn:.0%}"),
+        ]
+        if cfg.turnover_limit is not None:
+            checks.append(("reduce", turnover > cfg.turnover_limit, f"turnover>{cfg.turnover_limit:g}"))
+        insufficient = stats["observations"] < cfg.min_periods
+        suspend = np.logical_or.reduce([hit for level, hit, _ in checks if level == "suspend"])
+        reduce = np.logical_or.reduce([hit for level, hit, _ in checks if level == "reduce"])
+        status = np.select([insufficient, suspend, reduce], ["insufficient", "suspend", "reduce"], "keep")
+        hits = np.stack([hit for _, hit, _ in checks], axis=1)
+        labels = [label for _, _, label in checks]
+        reasons = [", ".join(label for label, hit in zip(labels, row) if hit) for row in hits]
+        return status, reasons
+
+
+def record_returns(
+    base_dir: Path,
+    strategy_id: str,
+    trade_date: int,
+    returns: Records,
+    turnover: Optional[Mapping[str, float]] = None,
+    config: Optional[HealthConfig] = None,
+) -> StrategyHealthChecker:
+    """Load, update and save a strategy's persisted state under a lock (safe across processes)."""
+    path = Path(base_dir) / HEALTH_DIR / f"{strategy_id}.npz"
+    with file_lock(path):
+        checker = StrategyHealthChecker.open(base_dir, strategy_id, config)
+        checker.update(trade_date, returns, turnover)
+        checker.save()
+    return checker
+
+
+def list_strategies(base_dir: Path) -> List[str]:
+    """Strategy ids with persisted health state under ``base_dir``."""
+    return sorted(path.stem for path in (Path(base_dir) / HEALTH_DIR).glob("*.npz"))
+
+
+def _records_frame(returns: Records, turnover: Optional[Mapping[str, float]]) -> pd.DataFrame:
+    if isinstance(returns, pd.DataFrame):
+        frame = returns.copy()
+        if "symbol" not in frame:
+            frame["symbol"] = PORTFOLIO
+    else:
+        frame = pd.DataFrame({"symbol": list(returns), "return": list(returns.values())})
+    if "return" not in frame:
+        raise ValueError("缺少 return 列")
+    if "turnover" not in frame:
+        frame["turnover"] = frame["symbol"].map(turnover or {})
+    frame["symbol"] = frame["symbol"].astype(str)
+    if frame["symbol"].duplicated().any():
+        raise ValueError(f"同一交易日存在重复 symbol: {frame.loc[frame['symbol'].duplicated(), 'symbol'].tolist()[:5]}")
+    return frame[["symbol", "return", "turnover"]]
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from core.portfolio.allocator import momentum_scores
+
+logger = logging.getLogger(__name__)
+
+FieldLoader = Callable[[str], np.ndarray]
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Column-wise trailing mean over ``window`` rows (NaN unless all rows are finite, like pandas ``rolling``)."""
+    result = np.full(values.shape, np.nan)
+    if window > len(values):
+        return result
+    finite = np.isfinite(values)
+    complete = bool(finite.all())
+    csum = np.zeros((len(values) + 1,) + values.shape[1:])
+    np.cumsum(values if complete else np.where(finite, values, 0.0), axis=0, out=csum[1:])
+    total = np.subtract(csum[window:], csum[:-window], out=csum[window:])
+    total /= window
+    if complete:
+        result[window - 1 :] = total
+    else:
+        # 窗口内有缺失值时结果为 NaN
+        counts = np.zeros(csum.shape, dtype=np.int32)
+        np.cumsum(finite, axis=0, out=counts[1:])
+        result[window - 1 :] = np.where(counts[window:] - counts[:-window] == window, total, np.nan)
+    return result
+
+
+@dataclass(frozen=True)
+class Feature:
+    """A named dates × symbols array derived from panel fields.
+
+    Features are frozen dataclasses, so two strategies declaring the same
+    feature with the same parameters get equal, hashable specs and the
+    planner computes it once. ``inputs`` lists the features it is built
+    from; ``compute`` receives their arrays in that order.
+    """
+
+    def inputs(self) -> Tuple["Feature", ...]:
+        return ()
+
+    def compute(self, *arrays: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    @property
+    def window(self) -> int:
+        """Rows of history this feature needs beyond its inputs' own."""
+        return 0
+
+    @property
+    def lookback(self) -> int:
+        """Rows of history needed for the latest value to be defined."""
+        return self.window + max((f.lookback for f in self.inputs()), default=0)
+
+
+@dataclass(frozen=True)
+class Field(Feature):
+    name: str = "close"
+
+
+@dataclass(frozen=True)
+class Returns(Feature):
+    periods: int = 1
+    field: str = "close"
+
+    def inputs(self) -> Tuple[Feature, ...]:
+        return (Field(self.field),)
+
+    def compute(self, values: np.ndarray) -> np.ndarray:
+        result = np.full(values.shape, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result[self.periods :] = values[self.periods :] / values[: -self.periods] - 1
+        return result
+
+    @property
+    def window(self) -> int:
+        return self.periods
+
+
+@dataclass(frozen=True)
+class SMA(Feature):
+    length: int = 20
+    field: str = "close"
+
+    def inputs(self) -> Tuple[Feature, ...]:
+        return (Field(self.field),)
+
+    def compute(self, values: np.ndarray) -> np.ndarray:
+        return rolling_mean(values, self.length)
+
+    @property
+    def window(self) -> int:
+        return self.length - 1
+
+
+@dataclass(frozen=True)
+class Momentum(Feature):
+    lookback_days: int = 20
+    skip: int = 0
+
+    def inputs(self) -> Tuple[Feature, ...]:
+        return (Field("close"),)
+
+    def compute(self, close: np.ndarray) -> np.ndarray:
+        return momentum_scores(close, self.lookback_days, self.skip)
+
+    @property
+    def window(self) -> int:
+        return self.lookback_days
+
+
+@dataclass(frozen=True)
+class Volatility(Feature):
+    """Rolling standard deviation (ddof=1) of daily returns, annualised."""
+
+    length: int = 20
+    annual_periods: int = 252
+
+    def inputs(self) -> Tuple[Feature, ...]:
+        return (Returns(1),)
+
+    def compute(self, returns: np.ndarray) -> np.ndarray:
+        mean = rolling_mean(returns, self.length)
+        squares = rolling_mean(returns * returns, self.length)
+        variance = np.clip(squares - mean * mean, 0, None) * self.length / (self.length - 1)
+        return np.sqrt(variance * self.annual_periods)
+
+    @property
+    def window(self) -> int:
+        return self.length - 1
+
+
+class FeaturePlan:
+    """Deduplicated, dependency-ordered computation graph of the features several strategies request."""
+
+    def __init__(self, features: Iterable[Feature]) -> None:
+        self.requested = list(features)
+        self.order: List[Feature] = []
+        seen = set()
+
+        def visit(feature: Feature) -> None:
+            if feature in seen:
+                return
+            seen.add(feature)
+            for dependency in feature.inputs():
+                visit(dependency)
+            self.order.append(feature)
+
+        for feature in self.requested:
+            visit(feature)
+
+    @property
+    def fields(self) -> List[str]:
+        return [f.name for f in self.order if isinstance(f, Field)]
+
+    @property
+    def lookback(self) -> int:
+        return max((f.lookback for f in self.order), default=0)
+
+    def compute(self, load: FieldLoader) -> Dict[Feature, np.ndarray]:
+        """Arrays of every planned feature; ``load(field)`` returns the raw dates × symbols field."""
+        arrays: Dict[Feature, np.ndarray] = {}
+        for feature in self.order:
+            if isinstance(feature, Field):
+                arrays[feature] = np.asarray(load(feature.name), dtype=np.float64)
+            else:
+                arrays[feature] = feature.compute(*(arrays[f] for f in feature.inputs()))
+        logger.debug("Computed %s features for %s requests", len(self.order), len(self.requested))
+        return arrays
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.data.panel import Panel
+from core.data.xsection import DateRange
+from core.portfolio.allocator import cap_weights
+from core.signals.features import Feature, FeaturePlan, FieldLoader
+from core.signals.schema import LONG, SHORT, SIGNAL_COLUMNS, TAG_CAPPED, TAG_CONFLICT, TAG_SINGLE_SOURCE
+from core.strategies.base import BaseStrategy
+from core.strategies.momentum import CrossSectionalMomentumStrategy, MovingAverageCrossStrategy
+
+logger = logging.getLogger(__name__)
+
+
+def default_strategies() -> List[BaseStrategy]:
+    """Strategy set used by the CLI and the MCP ``get_signals`` tool."""
+    return [
+        MovingAverageCrossStrategy(5, 20),
+        MovingAverageCrossStrategy(10, 60, name="ma_cross_10_60"),
+        CrossSectionalMomentumStrategy(20, skip=1, vol_window=20),
+    ]
+
+
+@dataclass
+class GeneratorConfig:
+    # 综合分数绝对值低于该值时不出信号
+    min_score: float = 0.2
+    allow_short: bool = False
+    # 每个方向的目标权重合计
+    gross: float = 1.0
+    max_weight: float = 0.05
+    # 每个方向最多输出的标的数（按 |score| 取前 N，0 不限）
+    max_positions: int = 50
+
+    def __post_init__(self) -> None:
+        if not 0 <= self.min_score <= 1:
+            raise ValueError("min_score 需在 [0, 1] 内")
+        if not 0 < self.max_weight <= 1:
+            raise ValueError("max_weight 需在 (0, 1] 内")
+        if self.gross <= 0 or self.max_positions < 0:
+            raise ValueError("gross 必须为正，max_positions 不能为负")
+
+
+class SignalGenerator:
+    """Combines several strategies' signals over one shared feature computation.
+
+    The union of every strategy's declared features is planned once
+    (``FeaturePlan`` dedups equal specs and their dependencies, e.g. two
+    strategies asking for ``SMA(20)`` or for returns share one array), so
+    adding a strategy costs its own signal plus any features nobody else
+    requested. The combined score of a symbol is the strategy-weighted mean
+    of the signals that have a view on it.
+    """
+
+    def __init__(self, strategies: Sequence[BaseStrategy], config: Optional[GeneratorConfig] = None) -> None:
+        if not strategies:
+            raise ValueError("至少需要一个策略")
+        names = [s.name for s in strategies]
+        duplicated = sorted({n for n in names if names.count(n) > 1})
+        if duplicated:
+            raise ValueError(f"策略名称重复: {duplicated}")
+        self.strategies = list(strategies)
+        self.config = config or GeneratorConfig()
+        self.plan = FeaturePlan(f for s in self.strategies for f in s.features())
+
+    def signals(self, load: FieldLoader) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """Per-strategy signal matrices and the combined score over the rows ``load`` returns."""
+        features = self.plan.compute(load)
+        per_strategy = {s.name: self._strategy_signal(s, features) for s in self.strategies}
+        shape = next(iter(per_strategy.values())).shape
+        total = np.zeros(shape)
+        weight = np.zeros(shape)
+        for strategy in self.strategies:
+            signal = per_strategy[strategy.name]
+            has_view = np.isfinite(signal)
+            total += np.where(has_view, signal, 0.0) * strategy.weight
+            weight += has_view * strategy.weight
+        combined = np.divide(total, weight, out=np.full(total.shape, np.nan), where=weight > 0)
+        return per_strategy, combined
+
+    def history(
+        self, panel: Panel, dates: Optional[DateRange] = None, symbols: Optional[Sequence[str]] = None
+    ) -> np.ndarray:
+        """Combined score matrix over a panel slice (e.g. ``scores`` for ``PortfolioAllocator.allocate_panel``).
+
+        History before the slice is included in the feature computation so
+        the first rows are as defined as in a longer run.
+        """
+        rows = panel.date_slice(dates)
+        start = max(0, rows.start - self.plan.lookback)
+        _, combined = self.signals(self._loader(panel, slice(start, rows.stop), symbols))
+        return combined[rows.start - start :]
+
+    def generate(
+        self,
+        panel: Panel,
+        trade_date: Optional[int] = None,
+        symbols: Optional[Sequence[str]] = None,
+        names: Optional[Mapping[str, str]] = None,
+    ) -> pd.DataFrame:
+        """Combined signals of one trade date (YYYYMMDD, default: the panel's latest), ``SIGNAL_COLUMNS`` rows.
+
+        Only the ``plan.lookback`` rows before the date are read from the panel.
+        """
+        end = len(panel.dates) - 1 if trade_date is None else int(np.searchsorted(panel.dates, trade_date, "right")) - 1
+        if end < 0:
+            raise ValueError(f"panel 中没有 {trade_date} 及之前的交易日")
+        start = max(0, end - self.plan.lookback)
+        per_strategy, combined = self.signals(self._loader(panel, slice(start, end + 1), symbols))
+        universe = list(symbols) if symbols is not None else panel.symbols
+        latest = {name: signal[-1] for name, signal in per_strategy.items()}
+        return self.select(int(panel.dates[end]), universe, latest, combined[-1], names)
+
+    def select(
+        self,
+        trade_date: int,
+        symbols: Sequence[str],
+        per_strategy: Mapping[str, np.ndarray],
+        combined: np.ndarray,
+        names: Optional[Mapping[str, str]] = None,
+    ) -> pd.DataFrame:
+        """Turn one row of combined scores into sided, weighted signals with contributors and risk tags."""
+        cfg = self.config
+        parts = []
+        sides = [(LONG, 1.0)] + ([(SHORT, -1.0)] if cfg.allow_short else [])
+        for side, sign in sides:
+            strength = np.where(np.isfinite(combined), combined * sign, -np.inf)
+            candidates = np.flatnonzero(strength >= max(cfg.min_score, 1e-12))
+            if cfg.max_positions and len(candidates) > cfg.max_positions:
+                top = np.argpartition(-strength[candidates], cfg.max_positions - 1)[: cfg.max_positions]
+                candidates = candidates[top]
+            if len(candidates) == 0:
+                continue
+            raw = strength[candidates] / strength[candidates].sum()
+            weights = cap_weights(raw[None, :], cfg.max_weight / cfg.gross)[0] * cfg.gross
+            views = np.stack([per_strategy[s.name][candidates] for s in self.strategies])
+            agree = np.isfinite(views) & (views * sign > 0)
+            oppose = np.isfinite(views) & (views * sign < 0)
+            strategies = [
+                [s.name for s, hit in zip(self.strategies, agree[:, i]) if hit] for i in range(len(candidates))
+            ]
+            tags = []
+            for i in range(len(candidates)):
+                row = []
+                if oppose[:, i].any():
+                    row.append(TAG_CONFLICT)
+                if agree[:, i].sum() == 1:
+                    row.append(TAG_SINGLE_SOURCE)
+                if weights[i] >= cfg.max_weight - 1e-12:
+                    row.append(TAG_CAPPED)
+                tags.append(row)
+            picked = [symbols[i] for i in candidates]
+            parts.append(
+                pd.DataFrame(
+                    {
+                        "trade_date": trade_date,
+                        "symbol": picked,
+                        "name": [(names or {}).get(s, "") for s in picked],
+                        "side": side,
+                        "score": combined[candidates],
+                        "target_weight": weights,
+                        "strategies": strategies,
+                        "risk_tags": tags,
+                    }
+                )
+            )
+        if not parts:
+            return pd.DataFrame(columns=SIGNAL_COLUMNS)
+        frame = pd.concat(parts, ignore_index=True)
+        return frame.sort_values(["side", "target_weight"], ascending=[True, False], ignore_index=True)
+
+    def _strategy_signal(self, strategy: BaseStrategy, features: Mapping[Feature, np.ndarray]) -> np.ndarray:
+        signal = np.asarray(strategy.signal(features), dtype=np.float64)
+        return np.clip(signal, -1, 1)
+
+    @staticmethod
+    def _loader(panel: Panel, rows: slice, symbols: Optional[Sequence[str]]) -> FieldLoader:
+        columns = panel.symbol_positions(symbols) if symbols is not None else None
+
+        def load(name: str) -> np.ndarray:
+            values = panel.field(name)[rows]
+            return values[:, columns] if columns is not None else values
+
+        return load
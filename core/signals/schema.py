@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from typing import Iterable, List
+
+import pandas as pd
+
+LONG = "long"
+SHORT = "short"
+SIDES = (LONG, SHORT)
+
+# 综合信号的标准列（一行一个标的）
+SIGNAL_COLUMNS = ["trade_date", "symbol", "name", "side", "score", "target_weight", "strategies", "risk_tags"]
+
+# 风险标签
+TAG_CONFLICT = "conflict"  # 有策略给出相反方向
+TAG_SINGLE_SOURCE = "single_source"  # 只有一个策略支持
+TAG_CAPPED = "weight_capped"  # 目标权重触及单票上限
+
+
+@dataclass
+class Signal:
+    """One combined signal: side and target weight of a symbol plus the strategies behind it."""
+
+    trade_date: int
+    symbol: str
+    side: str
+    score: float
+    target_weight: float
+    strategies: List[str] = field(default_factory=list)
+    risk_tags: List[str] = field(default_factory=list)
+    name: str = ""
+
+    def __post_init__(self) -> None:
+        if self.side not in SIDES:
+            raise ValueError(f"side 只支持 {SIDES}: {self.side}")
+
+    def to_dict(self) -> dict:
+        return {column: asdict(self)[column] for column in SIGNAL_COLUMNS}
+
+
+def signals_frame(signals: Iterable[Signal]) -> pd.DataFrame:
+    return pd.DataFrame([s.to_dict() for s in signals], columns=SIGNAL_COLUMNS)
+
+
+def frame_signals(frame: pd.DataFrame) -> List[Signal]:
+    """Inverse of ``signals_frame``."""
+    return [Signal(**{column: row[column] for column in SIGNAL_COLUMNS}) for row in frame.to_dict(orient="records")]
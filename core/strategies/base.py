@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Mapping, Optional, Sequence
+
+import numpy as np
+
+from core.signals.features import Feature
+
+
+class BaseStrategy(ABC):
+    """A strategy that declares its features and maps them to a signal matrix.
+
+    Strategies never load data or compute features themselves: the
+    ``SignalGenerator`` plans the union of every strategy's ``features()``,
+    computes each distinct feature once over the panel and hands the shared
+    arrays to ``signal``. The returned dates × symbols matrix holds values in
+    ``[-1, 1]`` (sign = side, magnitude = conviction); NaN means no view.
+    """
+
+    name: str = "strategy"
+
+    def __init__(self, name: Optional[str] = None, weight: float = 1.0) -> None:
+        if weight <= 0:
+            raise ValueError("weight 必须为正")
+        self.name = name or self.name
+        self.weight = weight
+
+    @abstractmethod
+    def features(self) -> Sequence[Feature]:
+        """Features this strategy reads in ``signal``."""
+
+    @abstractmethod
+    def signal(self, features: Mapping[Feature, np.ndarray]) -> np.ndarray:
+        """Signal matrix aligned with the feature arrays."""
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name={self.name!r}, weight={self.weight})"
+
+
+def cross_sectional_rank(values: np.ndarray) -> np.ndarray:
+    """Per-row rank of finite values scaled to ``[-1, 1]`` (NaN stays NaN; a single name gets 0)."""
+    finite = np.isfinite(values)
+    order = np.argsort(np.where(finite, values, np.inf), axis=1, kind="stable")
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, order, np.arange(values.shape[1], dtype=np.float64)[None, :], axis=1)
+    counts = finite.sum(axis=1, keepdims=True)
+    scale = np.divide(2.0, counts - 1, out=np.zeros(counts.shape), where=counts > 1)
+    ranks *= scale
+    ranks -= np.where(counts > 1, 1.0, 0.0)
+    ranks[~finite] = np.nan
+    return ranks
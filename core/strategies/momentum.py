@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import Mapping, Optional, Sequence
 
 import numpy as np
 import pandas as pd
 
+from core.backtest.metrics import cagr, span_days
+from core.signals.features import SMA, Feature, Momentum, Volatility
+from core.strategies.base import BaseStrategy, cross_sectional_rank
+
 
 @dataclass
 class MomentumConfig:
@@ -37,15 +41,13 @@ class SimpleMomentumBacktester:
     def performance(self) -> dict:
         df = self.prepare_features()
         total_return = (1 + df["strategy_returns"]).prod() - 1
-        days = (df["timestamp"].iloc[-1] - df["timestamp"].iloc[0]).days or 1
-        annual_factor = self.config.annual_trading_days / days * len(df)
-        cagr = (1 + total_return) ** (annual_factor) - 1
+        days = span_days(df["timestamp"].iloc[0], df["timestamp"].iloc[-1])
         volatility = df["strategy_returns"].std() * (self.config.annual_trading_days ** 0.5)
         sharpe = (df["strategy_returns"].mean() * self.config.annual_trading_days) / (volatility + 1e-8)
         max_drawdown = self._max_drawdown(df["strategy_returns"])
         return {
             "total_return": total_return,
-            "cagr": cagr,
+            "cagr": cagr(total_return, days),
             "sharpe": sharpe,
             "max_drawdown": max_drawdown,
             "signal_count": int(df.shape[0]),
@@ -57,3 +59,45 @@ class SimpleMomentumBacktester:
         rolling_max = cumulative.cummax()
         drawdowns = (cumulative - rolling_max) / rolling_max
         return drawdowns.min()
+
+
+class MovingAverageCrossStrategy(BaseStrategy):
+    """Panel version of ``SimpleMomentumBacktester``'s signal: +1 while the short MA is above the long MA, else -1."""
+
+    name = "ma_cross"
+
+    def __init__(self, short_window: int = 5, long_window: int = 20, **kwargs) -> None:
+        if short_window >= long_window:
+            raise ValueError("short_window must be smaller than long_window")
+        super().__init__(**kwargs)
+        self.short = SMA(short_window)
+        self.long = SMA(long_window)
+
+    def features(self) -> Sequence[Feature]:
+        return [self.short, self.long]
+
+    def signal(self, features: Mapping[Feature, np.ndarray]) -> np.ndarray:
+        short, long = features[self.short], features[self.long]
+        # 均线未成形时无观点（内存版回测在此处给出 -1）
+        return np.where(np.isfinite(short) & np.isfinite(long), np.where(short > long, 1.0, -1.0), np.nan)
+
+
+class CrossSectionalMomentumStrategy(BaseStrategy):
+    """Cross-sectional rank of trailing return, optionally divided by volatility (risk-adjusted momentum)."""
+
+    name = "xs_momentum"
+
+    def __init__(self, lookback: int = 20, skip: int = 0, vol_window: Optional[int] = None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.momentum = Momentum(lookback, skip)
+        self.volatility = Volatility(vol_window) if vol_window else None
+
+    def features(self) -> Sequence[Feature]:
+        return [self.momentum] + ([self.volatility] if self.volatility else [])
+
+    def signal(self, features: Mapping[Feature, np.ndarray]) -> np.ndarray:
+        score = features[self.momentum]
+        if self.volatility is not None:
+            vol = features[self.volatility]
+            score = np.divide(score, vol, out=np.full(score.shape, np.nan), where=vol > 0)
+        return cross_sectional_rank(score)
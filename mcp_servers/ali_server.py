@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import sys
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from mcp.server.fastmcp import FastMCP
 from mcp.types import TextContent
@@ -12,7 +12,9 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from core.backtest.significance import SignificanceTester
 from core.data.loaders import CSVPriceLoader
+from core.profiling import profiled
 from core.strategies.momentum import MomentumConfig, SimpleMomentumBacktester
 
 mcp = FastMCP("ali-momentum")
@@ -23,13 +25,27 @@ def _format_pct(value: float) -> str:
 
 
 @mcp.tool()
-def ali_momentum(short_window: int = 5, long_window: int = 20, csv_path: str = "data/ali.csv") -> List[TextContent]:
-    """Run simple moving-average momentum backtest on Ali CSV."""
+@profiled()
+def ali_momentum(
+    short_window: int = 5,
+    long_window: int = 20,
+    csv_path: str = "data/ali.csv",
+    bootstrap: int = 0,
+    block: Optional[int] = None,
+    sidecar_dir: Optional[str] = None,
+) -> List[TextContent]:
+    """Run simple moving-average momentum backtest on Ali CSV.
+
+    ``bootstrap`` > 0 adds block-bootstrap confidence intervals and a
+    random-sign p-value for the metrics (``block`` defaults to n^(1/3)).
+    The parsed CSV is cached in a Parquet sidecar in ``sidecar_dir``
+    (default: next to the CSV), so repeated calls skip parsing.
+    """
     csv_file = Path(csv_path)
     if not csv_file.exists():
         raise FileNotFoundError(f"CSV not found: {csv_file}")
 
-    loader = CSVPriceLoader(str(csv_file))
+    loader = CSVPriceLoader(str(csv_file), sidecar=True, sidecar_dir=sidecar_dir)
     df = loader.load()
 
     config = MomentumConfig(short_window=short_window, long_window=long_window)
@@ -49,6 +65,9 @@ def ali_momentum(short_window: int = 5, long_window: int = 20, csv_path: str = "
         f"Max drawdown: {_format_pct(perf['max_drawdown'])}",
         f"Signal count: {perf['signal_count']}",
     ]
+    if bootstrap > 0:
+        report = SignificanceTester.from_backtester(backtester).report(samples=bootstrap, block=block)
+        summary_lines += ["-- Significance --", report.describe()]
     return [TextContent(type="text", text="\n".join(summary_lines))]
 
 
@@ -4,8 +4,9 @@ import argparse
 import logging
 import os
 import sys
+import threading
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import pandas as pd
 from mcp.server.fastmcp import FastMCP
@@ -16,29 +17,60 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from core.data.config import build_provider_config, load_raw_config
+from core.data.config import build_provider_config, build_store, load_raw_config
 from core.data.fetcher import FetchResult, MarketFetcher
+from core.data.gaps import GapScanner
+from core.data.journal import BackfillJournal
+from core.data.quality import ISSUE_COLUMNS, load_report, report_generated_at
+from core.data.query import QueryEngine
 from core.data.providers.joinquant import JoinQuantProvider
 from core.data.securities import SecuritiesCache
-from core.data.storage import LocalParquetStore
+from core.data.sessions import freq_minutes
+from core.profiling import enable_profiling, profiled
 
 logger = logging.getLogger(__name__)
 
 # Default host/port can be overridden via args or ENV
 DEFAULT_HOST = os.getenv("HOST", "0.0.0.0")
 DEFAULT_PORT = int(os.getenv("PORT", "50001"))
+# 配置未设置 storage.cache_mb 时服务进程使用的分区缓存上限（MB）
+DEFAULT_CACHE_MB = int(os.getenv("QUANT_CACHE_MB", "512"))
+# sql_query 单次调用的行数/耗时上限（调用方参数只能更小）
+SQL_MAX_ROWS = int(os.getenv("QUANT_SQL_MAX_ROWS", "1000"))
+SQL_TIMEOUT_SECONDS = float(os.getenv("QUANT_SQL_TIMEOUT", "30"))
 
 # Instantiate MCP server (host/port may be overwritten in main before run)
 mcp = FastMCP("data-service", host=DEFAULT_HOST, port=DEFAULT_PORT)
 
 
+_fetchers: Dict[Tuple[str, int], MarketFetcher] = {}
+_fetchers_lock = threading.Lock()
+_cache_mb = DEFAULT_CACHE_MB
+
+
 def get_fetcher(config_path: Path) -> MarketFetcher:
-    raw_cfg = load_raw_config(config_path)
-    provider_name = raw_cfg.get("default_provider", "joinquant")
-    provider_cfg = build_provider_config(raw_cfg, provider_name)
-    provider = JoinQuantProvider(provider_cfg)
-    store = LocalParquetStore(provider_cfg.base_dir)
-    return MarketFetcher(provider=provider, store=store)
+    """Fetcher for a config file, reused across tool calls.
+
+    Keeping it alive keeps the provider session and the store's partition
+    cache warm; editing the config file (new mtime) builds a fresh one.
+    """
+    key = (str(config_path.resolve()), config_path.stat().st_mtime_ns)
+    with _fetchers_lock:
+        fetcher = _fetchers.get(key)
+        if fetcher is None:
+            raw_cfg = load_raw_config(config_path)
+            storage = dict(raw_cfg.get("storage") or {})
+            storage["cache_mb"] = storage.get("cache_mb") or _cache_mb
+            raw_cfg["storage"] = storage
+            provider_name = raw_cfg.get("default_provider", "joinquant")
+            provider_cfg = build_provider_config(raw_cfg, provider_name)
+            provider = JoinQuantProvider(provider_cfg)
+            store = build_store(raw_cfg, provider_cfg)
+            fetcher = MarketFetcher(provider=provider, store=store)
+            for stale in [k for k in _fetchers if k[0] == key[0]]:
+                del _fetchers[stale]
+            _fetchers[key] = fetcher
+        return fetcher
 
 
 def _parse_ts(value: str) -> pd.Timestamp:
@@ -85,6 +117,7 @@ def _get_index_constituents(provider, index_symbol: str) -> List[str]:
 
 
 @mcp.tool()
+@profiled()
 def fetch_prices(
     symbols: List[str],
     start: str,
@@ -93,8 +126,9 @@ def fetch_prices(
     full_refresh: bool = False,
     config_path: str = "config/data.yaml",
     log_level: str = "INFO",
+    topup: bool = False,
 ) -> List[TextContent]:
-    """拉取远端行情并落盘本地 Parquet（默认按缺口补齐）。"""
+    """拉取远端行情并落盘本地 Parquet（默认按缺口补齐；分钟线 topup=True 时只补当日尾部）。"""
     logging.basicConfig(level=log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
     fetcher = get_fetcher(Path(config_path))
     start_ts = _parse_ts(start)
@@ -118,11 +152,13 @@ def fetch_prices(
         end_ts,
         freq=freq,
         use_missing_ranges=not full_refresh,
+        topup=topup,
     )
     return [TextContent(type="text", text=_result_log(results))]
 
 
 @mcp.tool()
+@profiled()
 def fetch_universe_prices(
     start: str,
     end: str,
@@ -135,11 +171,31 @@ def fetch_universe_prices(
     use_cache: bool = True,
     refresh: bool = False,
     index_symbol: Optional[str] = None,
+    run_id: Optional[str] = None,
+    retry_failed: bool = False,
 ) -> List[TextContent]:
-    """拉取指定类型标的（自动获取列表，默认前 50 个）行情并落盘。"""
+    """拉取指定类型标的（自动获取列表，默认前 50 个）行情并落盘；指定 run_id 可断点续跑。"""
     logging.basicConfig(level=log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
     fetcher = get_fetcher(Path(config_path))
     provider = fetcher.provider
+    journal = BackfillJournal(fetcher.store.base_dir, run_id) if run_id else None
+    if journal is not None and journal.exists():
+        plan = journal.plan
+        symbols = journal.pending(failed_only=retry_failed)
+        logger.info("Resuming run %s (%s), %s symbols left", run_id, journal.progress().describe(), len(symbols))
+        results = fetcher.fetch_symbols(
+            symbols,
+            pd.Timestamp(plan["start"]),
+            pd.Timestamp(plan["end"]),
+            freq=plan["freq"],
+            use_missing_ranges=bool(plan.get("use_missing_ranges", True)),
+            journal=journal,
+        )
+        text = _result_log(results) + f"\nRun {run_id}: {journal.progress().describe()}"
+        return [TextContent(type="text", text=text)]
+    if retry_failed:
+        raise ValueError("retry_failed 需要已存在的 run_id")
+
     if index_symbol:
         symbols = _get_index_constituents(provider, index_symbol)
         if not symbols:
@@ -164,17 +220,24 @@ def fetch_universe_prices(
     )
     start_ts = _parse_ts(start)
     end_ts = _parse_ts(end)
+    if journal is not None:
+        journal.create(symbols, start_ts, end_ts, freq, use_missing_ranges=not full_refresh)
     results = fetcher.fetch_symbols(
         symbols,
         start_ts,
         end_ts,
         freq=freq,
         use_missing_ranges=not full_refresh,
+        journal=journal,
     )
-    return [TextContent(type="text", text=_result_log(results))]
+    text = _result_log(results)
+    if journal is not None:
+        text += f"\nRun {run_id}: {journal.progress().describe()}"
+    return [TextContent(type="text", text=text)]
 
 
 @mcp.tool()
+@profiled()
 def list_securities(
     types: Optional[List[str]] = None,
     limit: int = 50,
@@ -203,6 +266,7 @@ def list_securities(
 
 
 @mcp.tool()
+@profiled()
 def check_cache(
     symbol: str,
     freq: str = "1d",
@@ -233,12 +297,26 @@ def check_cache(
     nan_counts = df.isna().sum().to_dict()
 
     missing_lines: List[str] = []
+    if freq_minutes(freq) is not None:
+        coverage = fetcher.coverage(symbol, freq).summary()
+        coverage = coverage[
+            (coverage["trade_date"] >= fetcher.schedule.trade_dates([min_ts])[0])
+            & (coverage["trade_date"] <= fetcher.schedule.trade_dates([max_ts])[0])
+        ]
+        counts = coverage["status"].value_counts().to_dict()
+        missing_lines.append(
+            f"Coverage ({len(coverage)} days, {fetcher.schedule.expected_bars(freq)} bars/day): "
+            f"complete={counts.get('complete', 0)} partial={counts.get('partial', 0)} empty={counts.get('empty', 0)}"
+        )
+        for row in coverage[coverage["status"] != "complete"].head(20).itertuples():
+            missing_lines.append(f"- {row.trade_date.date()} {row.status} bars={row.bars}{' (final)' if row.final else ''}")
     if freq in ("1d", "d", "day", "daily"):
-        missing = list(LocalParquetStore.missing_ranges(df, min_ts, max_ts, freq="1d"))
+        scanner = GapScanner(store, fetcher.trade_days(min_ts, max_ts), fetcher.schedule)
+        missing = scanner.gaps(symbol, "1d", start=min_ts, end=max_ts)
         if missing:
-            missing_lines.append("Missing ranges:")
-            for s, e in missing:
-                missing_lines.append(f"- {s.date()} -> {e.date()}")
+            missing_lines.append(f"Missing trading days ({sum(g.trade_days for g in missing)} in {len(missing)} ranges):")
+            for gap in missing[:50]:
+                missing_lines.append(f"- {gap.start.date()} -> {gap.end.date()} ({gap.trade_days} days)")
 
     summary_lines = [
         f"Cache stats for {symbol} freq={freq}",
@@ -247,10 +325,116 @@ def check_cache(
         f"NaN counts: {nan_counts}",
     ]
     summary_lines.extend(missing_lines)
+    cache_stats = store.cache_stats()
+    if cache_stats is not None:
+        summary_lines.append(f"Partition cache: {cache_stats.describe()}")
     return [TextContent(type="text", text="\n".join(summary_lines))]
 
 
 @mcp.tool()
+@profiled()
+def gap_report(
+    symbols: Optional[List[str]] = None,
+    freq: str = "1d",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    limit: int = 100,
+    config_path: str = "config/data.yaml",
+) -> List[TextContent]:
+    """按交易日历/交易时段检测本地缓存缺口（不含周末、节假日、午休），可一次扫描多个或全部标的。"""
+    fetcher = get_fetcher(Path(config_path))
+    store = fetcher.store
+    symbols = [s.strip() for s in symbols if s.strip()] if symbols else store.symbols(freq)
+    if not symbols:
+        return [TextContent(type="text", text=f"No cached symbols for freq={freq}")]
+    # 只用已缓存的交易日历（与 scripts/gap_report.py 一致），报告不访问数据源
+    trade_days = fetcher.calendar_cache.cached()
+    if trade_days.empty:
+        return [TextContent(type="text", text="No cached trading calendar; run a fetch first")]
+    scanner = GapScanner(store, trade_days, fetcher.schedule)
+    report = scanner.scan(symbols, freq, start=start, end=end)
+    failed = report[report["error"] != ""]
+    report = report[report["error"] == ""]
+    failed_lines = [f"Failed symbols ({len(failed)}):"] if len(failed) else []
+    failed_lines.extend(f"- {row.symbol}: {row.error}" for row in failed.head(limit).itertuples())
+    if report.empty:
+        lines = [f"No gaps in {len(symbols) - len(failed)} symbols freq={freq}", *failed_lines]
+        return [TextContent(type="text", text="\n".join(lines))]
+    per_symbol = report.groupby("symbol").agg(gaps=("bars", "size"), trade_days=("trade_days", "sum"), bars=("bars", "sum"))
+    lines = [
+        f"Gap report freq={freq}: symbols scanned={len(symbols)} with gaps={len(per_symbol)} failed={len(failed)} "
+        f"ranges={len(report)} missing bars={int(report['bars'].sum())}",
+        *failed_lines,
+        "Worst symbols:",
+    ]
+    for sym, row in per_symbol.sort_values("bars", ascending=False).head(20).iterrows():
+        lines.append(f"- {sym}: ranges={row.gaps} trade_days={row.trade_days} bars={row.bars}")
+    lines.append(f"Ranges (first {limit}):")
+    for row in report.head(limit).itertuples():
+        lines.append(f"- {row.symbol} {row.start} -> {row.end} days={row.trade_days} bars={row.bars}")
+    return [TextContent(type="text", text="\n".join(lines))]
+
+
+@mcp.tool()
+@profiled()
+def quality_report(
+    symbol: Optional[str] = None,
+    freq: Optional[str] = None,
+    check: Optional[str] = None,
+    limit: int = 50,
+    config_path: str = "config/data.yaml",
+) -> List[TextContent]:
+    """查询最近一次全库质量扫描结果（scripts/quality_scan.py 生成），可按标的/频率/检查项过滤。"""
+    fetcher = get_fetcher(Path(config_path))
+    base_dir = fetcher.store.base_dir
+    report = load_report(base_dir)
+    if report.empty:
+        return [TextContent(type="text", text="No quality report yet; run scripts/quality_scan.py")]
+    if check and check not in ISSUE_COLUMNS:
+        raise ValueError(f"check 只支持 {ISSUE_COLUMNS}")
+    if symbol:
+        report = report[report["symbol"] == symbol]
+    if freq:
+        report = report[report["freq"] == freq]
+    column = check or "issues"
+    flagged = report[(report[column] > 0) | (report["error"] != "")].sort_values(column, ascending=False)
+    lines = [
+        f"Quality report generated_at={report_generated_at(base_dir)}: rows={len(report)} flagged={len(flagged)}",
+        "Totals: " + " ".join(f"{name}={int(report[name].sum())}" for name in ISSUE_COLUMNS),
+    ]
+    for row in flagged.head(limit).itertuples():
+        detail = " ".join(f"{name}={getattr(row, name)}" for name in ISSUE_COLUMNS if getattr(row, name))
+        lines.append(
+            f"- {row.symbol} {row.freq} rows={row.rows} {row.first} -> {row.last}: {detail}"
+            + (f" max_jump={row.max_jump:.2%}" if row.jumps else "")
+            + (f" error={row.error}" if row.error else "")
+        )
+    return [TextContent(type="text", text="\n".join(lines))]
+
+
+@mcp.tool()
+@profiled()
+def sql_query(
+    query: str,
+    max_rows: int = 200,
+    timeout_seconds: float = SQL_TIMEOUT_SECONDS,
+    config_path: str = "config/data.yaml",
+) -> List[TextContent]:
+    """对本地存储执行只读 SQL（DuckDB），表为 bars_<freq>（如 bars_1d、bars_1m）与 xsection_1d。"""
+    fetcher = get_fetcher(Path(config_path))
+    engine = QueryEngine(fetcher.store)
+    max_rows = max(1, min(max_rows, SQL_MAX_ROWS))
+    timeout_seconds = max(0.1, min(timeout_seconds, SQL_TIMEOUT_SECONDS))
+    result = engine.sql(query, max_rows=max_rows, timeout=timeout_seconds)
+    df = result.to_frame()
+    header = f"Rows: {len(df)}{' (truncated at max_rows)' if result.truncated else ''} elapsed={result.elapsed:.3f}s"
+    if df.empty:
+        return [TextContent(type="text", text=f"{header}\nColumns: {', '.join(df.columns)}")]
+    return [TextContent(type="text", text=f"{header}\n{df.to_string(index=False)}")]
+
+
+@mcp.tool()
+@profiled()
 def list_cached_symbols(
     freq: str = "1d",
     limit: int = 50,
@@ -287,12 +471,26 @@ def parse_args() -> argparse.Namespace:
         choices=["stdio", "sse", "streamable-http"],
         help="Transport for MCP server",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile each tool call into logs/profile (or set QUANT_PROFILE=1)",
+    )
+    parser.add_argument(
+        "--cache-mb",
+        type=int,
+        default=DEFAULT_CACHE_MB,
+        help="Partition cache size in MB when storage.cache_mb is unset (0 disables; or set QUANT_CACHE_MB)",
+    )
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = parse_args()
     logging.basicConfig(level="INFO", format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.profile:
+        enable_profiling()
+    _cache_mb = args.cache_mb
     # Override host/port before starting server (used by SSE/HTTP transports)
     mcp.settings.host = args.host
     mcp.settings.port = args.port
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from mcp.server.fastmcp import FastMCP
+from mcp.types import TextContent
+
+# Ensure project root on sys.path
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.config import build_provider_config, build_store, load_raw_config
+from core.data.panel import PanelCache
+from core.data.storage import LocalParquetStore
+from core.profiling import enable_profiling, profiled
+from core.risk.exposure import RiskConfig, RiskModel
+from core.risk.health import HealthConfig, StrategyHealthChecker, list_strategies, record_returns
+from core.signals.generator import GeneratorConfig, SignalGenerator, default_strategies
+
+logger = logging.getLogger(__name__)
+
+# Default host/port can be overridden via args or ENV
+DEFAULT_HOST = os.getenv("HOST", "0.0.0.0")
+DEFAULT_PORT = int(os.getenv("PORT", "50002"))
+# 健康度维护的滚动窗口（交易日，逗号分隔）；修改后需删除 _health/ 下的旧状态
+HEALTH_WINDOWS = tuple(int(w) for w in os.getenv("QUANT_HEALTH_WINDOWS", "20,60").split(",") if w.strip())
+
+# Instantiate MCP server (host/port may be overwritten in main before run)
+mcp = FastMCP("strategy-service", host=DEFAULT_HOST, port=DEFAULT_PORT)
+
+
+_stores: Dict[Tuple[str, int], LocalParquetStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(config_path: Path) -> LocalParquetStore:
+    """Store for a config file, reused across tool calls (rebuilt when the file changes)."""
+    key = (str(config_path.resolve()), config_path.stat().st_mtime_ns)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            raw_cfg = load_raw_config(config_path)
+            provider_cfg = build_provider_config(raw_cfg, raw_cfg.get("default_provider", "joinquant"))
+            store = build_store(raw_cfg, provider_cfg)
+            for stale in [k for k in _stores if k[0] == key[0]]:
+                del _stores[stale]
+            _stores[key] = store
+        return store
+
+
+def _health_config() -> HealthConfig:
+    return HealthConfig(windows=HEALTH_WINDOWS)
+
+
+def _format_health(frame: pd.DataFrame, limit: int) -> str:
+    columns = ["symbol", "observations", "sharpe", "window_return", "drawdown", "max_drawdown", "turnover",
+               "status_suggestion", "reasons"]
+    return frame[columns].head(limit).to_string(index=False, float_format=lambda v: f"{v:.4f}")
+
+
+@mcp.tool()
+@profiled()
+def get_signals(
+    trade_date: Optional[str] = None,
+    symbols: Optional[List[str]] = None,
+    min_score: float = 0.2,
+    max_positions: int = 50,
+    max_weight: float = 0.05,
+    allow_short: bool = False,
+    config_path: str = "config/data.yaml",
+) -> List[TextContent]:
+    """多策略综合信号（默认 panel 最新交易日）：标的、方向、综合分数、目标权重、贡献策略与风险标签。"""
+    store = get_store(Path(config_path))
+    panel = PanelCache(store).ensure()
+    config = GeneratorConfig(
+        min_score=min_score, allow_short=allow_short, max_weight=max_weight, max_positions=max_positions
+    )
+    generator = SignalGenerator(default_strategies(), config)
+    date = int(pd.Timestamp(trade_date).strftime("%Y%m%d")) if trade_date else None
+    signals = generator.generate(panel, date, symbols)
+    header = f"Strategies: {', '.join(s.name for s in generator.strategies)}; signals={len(signals)}"
+    if signals.empty:
+        return [TextContent(type="text", text=f"{header}\nNo signals")]
+    return [TextContent(type="text", text=f"{header}\n{signals.to_string(index=False)}")]
+
+
+@mcp.tool()
+@profiled()
+def record_strategy_returns(
+    strategy_id: str,
+    trade_date: str,
+    returns: Dict[str, float],
+    turnover: Optional[Dict[str, float]] = None,
+    config_path: str = "config/data.yaml",
+) -> List[TextContent]:
+    """记录策略某交易日的收益（{symbol: return}，组合整体用 "*"），增量更新各滚动窗口的健康度。"""
+    store = get_store(Path(config_path))
+    date = int(pd.Timestamp(trade_date).strftime("%Y%m%d"))
+    checker = record_returns(store.base_dir, strategy_id, date, returns, turnover, _health_config())
+    counts = checker.report()["status_suggestion"].value_counts().to_dict()
+    text = f"{strategy_id}: recorded {len(returns)} series for {date} (updates={checker.updates}) status={counts}"
+    return [TextContent(type="text", text=text)]
+
+
+@mcp.tool()
+@profiled()
+def get_strategy_health(
+    strategy_id: str,
+    window_days: Optional[int] = None,
+    symbols: Optional[List[str]] = None,
+    status: Optional[str] = None,
+    limit: int = 50,
+    config_path: str = "config/data.yaml",
+) -> List[TextContent]:
+    """策略滚动窗口健康度：Sharpe、窗口收益、自窗口高点回撤、换手与 status_suggestion（keep/reduce/suspend）。"""
+    store = get_store(Path(config_path))
+    checker = StrategyHealthChecker.open(store.base_dir, strategy_id, _health_config())
+    if checker.last_date is None:
+        return [TextContent(type="text", text=f"No health state for {strategy_id}; call record_strategy_returns first")]
+    frame = checker.report(window_days, symbols)
+    if status:
+        frame = frame[frame["status_suggestion"] == status]
+    # 问题最严重的排在前面
+    severity = {"suspend": 0, "reduce": 1, "insufficient": 2, "keep": 3}
+    frame = frame.assign(severity=frame["status_suggestion"].map(severity)).sort_values(["severity", "sharpe"])
+    header = (
+        f"{strategy_id} as of {checker.last_date} window={frame['window'].iloc[0] if len(frame) else window_days} "
+        f"series={len(frame)} status={frame['status_suggestion'].value_counts().to_dict()}"
+    )
+    if frame.empty:
+        return [TextContent(type="text", text=header)]
+    return [TextContent(type="text", text=f"{header}\n{_format_health(frame, limit)}")]
+
+
+@mcp.tool()
+@profiled()
+def strategy_health_overview(
+    window_days: Optional[int] = None,
+    config_path: str = "config/data.yaml",
+) -> List[TextContent]:
+    """列出全部已监控策略的最新日期与各状态的序列数。"""
+    store = get_store(Path(config_path))
+    rows = []
+    for strategy_id in list_strategies(store.base_dir):
+        checker = StrategyHealthChecker.open(store.base_dir, strategy_id, _health_config())
+        frame = checker.report(window_days)
+        counts = frame["status_suggestion"].value_counts()
+        rows.append({"strategy": strategy_id, "as_of": checker.last_date, "series": len(frame), **counts.to_dict()})
+    if not rows:
+        return [TextContent(type="text", text="No monitored strategies")]
+    overview = pd.DataFrame(rows).fillna(0)
+    return [TextContent(type="text", text=overview.to_string(index=False))]
+
+
+@mcp.tool()
+@profiled()
+def basket_risk(
+    weights: Dict[str, float],
+    threshold: float = 0.6,
+    halflife: float = 60.0,
+    config_path: str = "config/data.yaml",
+) -> List[TextContent]:
+    """组合风险：EWMA 协方差下的年化波动率、最大风险贡献标的与高相关簇（需先运行 scripts/update_risk.py）。"""
+    store = get_store(Path(config_path))
+    report = RiskModel(store, RiskConfig(halflife=halflife)).exposure().basket_report(weights, threshold=threshold)
+    lines = [
+        f"As of {report['as_of']}: volatility={report['volatility']:.2%} gross_weight={report['gross_weight']:.4f}",
+        "-- Top contributors --",
+        pd.DataFrame(report["top_contributors"]).to_string(index=False, float_format=lambda v: f"{v:.4f}"),
+    ]
+    if report["clusters"]:
+        lines.append("-- Correlated clusters --")
+        lines += [", ".join(cluster) for cluster in report["clusters"]]
+    if report["unavailable"]:
+        lines.append(f"Unavailable (no risk estimate): {', '.join(report['unavailable'])}")
+    return [TextContent(type="text", text="\n".join(lines))]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="MCP strategy service")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="MCP server port")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="MCP server host")
+    parser.add_argument(
+        "--transport",
+        default="sse",
+        choices=["stdio", "sse", "streamable-http"],
+        help="Transport for MCP server",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile each tool call into logs/profile (or set QUANT_PROFILE=1)",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level="INFO", format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.profile:
+        enable_profiling()
+    # Override host/port before starting server (used by SSE/HTTP transports)
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    logger.info("Starting MCP strategy-service on %s:%s via %s", args.host, args.port, args.transport)
+    mcp.run(transport=args.transport)
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Ensure project root is on sys.path when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.backtest.streaming import backtest_symbols
+from core.data.config import build_provider_config, build_storage_config, load_raw_config
+from core.data.storage import DEFAULT_STREAM_BATCH_ROWS, LocalParquetStore
+from core.profiling import enable_profiling, profile_run
+from core.strategies.momentum import MomentumConfig
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="按分区流式读取本地存储，对全历史（如分钟线）运行均线动量回测，内存占用与历史长度无关")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
+    parser.add_argument("--base-dir", type=Path, help="存储目录（默认取 default_provider 的 base_dir）")
+    parser.add_argument("--freq", default="1m", help="频率，默认 1m")
+    parser.add_argument("--symbols", help="标的，逗号分隔（默认该频率下全部已存储标的）")
+    parser.add_argument("--start", help="起始时间（默认全部历史；之前的 bar 只用于均线预热）")
+    parser.add_argument("--end", help="结束时间（默认全部历史）")
+    parser.add_argument("--short", type=int, default=5, help="Short moving average window")
+    parser.add_argument("--long", type=int, default=20, help="Long moving average window")
+    parser.add_argument("--annual-bars", type=int, default=252, help="年化 bar 数，默认 252（分钟线可用 252*240）")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_STREAM_BATCH_ROWS, help="每批读取行数")
+    parser.add_argument("--workers", type=int, default=4, help="并发标的数，默认 4")
+    parser.add_argument("--output", type=Path, help="结果写出为 CSV")
+    parser.add_argument("--log-level", default="INFO", help="日志级别，默认 INFO")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
+    return parser.parse_args()
+
+
+def run(args: argparse.Namespace) -> None:
+    raw_cfg = load_raw_config(args.config)
+    provider_cfg = build_provider_config(raw_cfg, raw_cfg.get("default_provider", "joinquant"))
+    store = LocalParquetStore(
+        args.base_dir or provider_cfg.base_dir, timezone=provider_cfg.timezone, options=build_storage_config(raw_cfg)
+    )
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()] if args.symbols else store.symbols(args.freq)
+    config = MomentumConfig(short_window=args.short, long_window=args.long, annual_trading_days=args.annual_bars)
+    start = pd.Timestamp(args.start, tz=provider_cfg.timezone) if args.start else None
+    end = pd.Timestamp(args.end, tz=provider_cfg.timezone) if args.end else None
+
+    started = time.perf_counter()
+    report = backtest_symbols(
+        store, symbols, args.freq, config, start=start, end=end, workers=args.workers, batch_rows=args.batch_rows
+    )
+    elapsed = time.perf_counter() - started
+    print(f"Backtested {len(symbols)} symbols freq={args.freq} short/long={args.short}/{args.long} in {elapsed:.1f}s")
+    print(report.to_string(index=False))
+    if args.output:
+        report.to_csv(args.output, index=False)
+        print(f"Wrote {len(report)} rows to {args.output}")
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.profile:
+        enable_profiling()
+    with profile_run("backtest_streaming"):
+        run(args)
+
+
+if __name__ == "__main__":
+    pd.options.display.float_format = "{:.4f}".format
+    main()
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.config import build_provider_config, build_storage_config, load_raw_config
+from core.data.storage import LocalParquetStore
+from core.profiling import enable_profiling, profile_run
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="由按标的分区的日线重建 _xsection 按月截面文件（可与拉取任务并行）")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
+    parser.add_argument("--base-dir", type=Path, help="存储目录（默认取 default_provider 的 base_dir）")
+    parser.add_argument("--years", help="只重建指定年份，逗号分隔（默认全部）")
+    parser.add_argument("--workers", type=int, default=8, help="并发读取分区数，默认 8")
+    parser.add_argument("--log-level", default="INFO", help="日志级别，默认 INFO")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
+    return parser.parse_args()
+
+
+def run(args: argparse.Namespace) -> None:
+    raw_cfg = load_raw_config(args.config)
+    provider_cfg = build_provider_config(raw_cfg, raw_cfg.get("default_provider", "joinquant"))
+    store = LocalParquetStore(
+        args.base_dir or provider_cfg.base_dir, timezone=provider_cfg.timezone, options=build_storage_config(raw_cfg)
+    )
+    years = [int(y) for y in args.years.split(",") if y.strip()] if args.years else None
+    rows = store.xsection.rebuild(years=years, workers=args.workers)
+    print(f"Mirrored rows={rows} months={len(store.xsection.months())} into {store.xsection.root}")
+    if not store.options.cross_section:
+        print("注意：storage.cross_section 未开启，后续写入不会同步截面文件，load_cross_section 仍按标的读取")
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.profile:
+        enable_profiling()
+    with profile_run("build_cross_section"):
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
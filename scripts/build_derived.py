@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Ensure project root is on sys.path when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.config import build_provider_config, build_store, load_raw_config
+from core.profiling import enable_profiling, profile_run
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="由基础频率全量重建派生频率（5m/1w 等），用于存量数据或修改 storage.derived 后")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
+    parser.add_argument("--base-freq", default="1m", help="基础频率，默认 1m")
+    parser.add_argument("--targets", help="派生频率，逗号分隔（默认取 storage.derived 中该基础频率的配置）")
+    parser.add_argument("--symbols", help="只处理指定标的，逗号分隔（默认全部）")
+    parser.add_argument("--workers", type=int, default=4, help="并发标的数，默认 4")
+    parser.add_argument("--log-level", default="INFO", help="日志级别，默认 INFO")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
+    return parser.parse_args()
+
+
+def run(args: argparse.Namespace) -> int:
+    raw_cfg = load_raw_config(args.config)
+    provider_cfg = build_provider_config(raw_cfg, raw_cfg.get("default_provider", "joinquant"))
+    store = build_store(raw_cfg, provider_cfg)
+    targets = (
+        [t.strip() for t in args.targets.split(",") if t.strip()]
+        if args.targets
+        else store.options.derived.get(args.base_freq, [])
+    )
+    if not targets:
+        print(f"No derived freqs for {args.base_freq}（配置 storage.derived 或传入 --targets）")
+        return 1
+    symbols = (
+        [s.strip() for s in args.symbols.split(",") if s.strip()] if args.symbols else store.symbols(args.base_freq)
+    )
+
+    def work(symbol: str):
+        try:
+            return symbol, store.rebuild_derived(symbol, args.base_freq, targets), None
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Failed to rebuild derived bars for %s", symbol)
+            return symbol, {}, str(exc)
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for idx, (symbol, rows, error) in enumerate(pool.map(work, symbols), 1):
+            failures += bool(error)
+            detail = " ".join(f"{freq}={n}" for freq, n in rows.items())
+            print(f"[{idx}/{len(symbols)}] {symbol} {detail or 'error: ' + str(error)}")
+    print(f"Rebuilt {','.join(targets)} from {args.base_freq} for {len(symbols) - failures}/{len(symbols)} symbols")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.profile:
+        enable_profiling()
+    with profile_run("build_derived"):
+        code = run(args)
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
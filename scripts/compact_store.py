@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.config import build_provider_config, build_storage_config, load_raw_config
+from core.data.maintenance import DEFAULT_TMP_AGE_SECONDS, StoreCompactor
+from core.data.storage import LocalParquetStore
+from core.profiling import enable_profiling, profile_run
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="存储压实：分区排序去重、重设 row group、清理临时文件与空目录（可与读写并行）")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
+    parser.add_argument("--base-dir", type=Path, help="存储目录（默认取 default_provider 的 base_dir）")
+    parser.add_argument("--full", action="store_true", help="处理全部分区（默认只处理上次运行后有变化的分区）")
+    parser.add_argument("--symbols", help="只处理指定标的，逗号分隔")
+    parser.add_argument("--freq", help="只处理指定频率")
+    parser.add_argument("--row-group-size", type=int, help="每个 row group 的行数（默认取 storage.row_group_size 或 131072）")
+    parser.add_argument(
+        "--tmp-age-minutes",
+        type=float,
+        default=DEFAULT_TMP_AGE_SECONDS / 60,
+        help="早于该时长的 .tmp 临时文件视为崩溃残留并删除",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="并发分区数，默认 4")
+    parser.add_argument("--dry-run", action="store_true", help="只校验与统计，不改写文件")
+    parser.add_argument("--log-level", default="INFO", help="日志级别，默认 INFO")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
+    return parser.parse_args()
+
+
+def run(args: argparse.Namespace) -> int:
+    raw_cfg = load_raw_config(args.config)
+    provider_cfg = build_provider_config(raw_cfg, raw_cfg.get("default_provider", "joinquant"))
+    store = LocalParquetStore(
+        args.base_dir or provider_cfg.base_dir, timezone=provider_cfg.timezone, options=build_storage_config(raw_cfg)
+    )
+    compactor = StoreCompactor(store, row_group_size=args.row_group_size, tmp_age_seconds=args.tmp_age_minutes * 60)
+    symbols = {s.strip() for s in args.symbols.split(",") if s.strip()} if args.symbols else None
+    report = compactor.run(
+        full=args.full, dry_run=args.dry_run, symbols=symbols, freq=args.freq, workers=args.workers
+    )
+    print(("[dry-run] " if args.dry_run else "") + report.describe())
+    for key, error in report.failures.items():
+        print(f"- failed {key}: {error}")
+    return 1 if report.failures else 0
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.profile:
+        enable_profiling()
+    with profile_run("compact_store"):
+        code = run(args)
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
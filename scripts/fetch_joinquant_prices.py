@@ -6,10 +6,9 @@ from pathlib import Path
 import logging
 import pandas as pd
 
-from core.data.config import build_provider_config, load_raw_config
+from core.data.config import build_provider_config, build_store, load_raw_config
 from core.data.fetcher import MarketFetcher
 from core.data.providers.joinquant import JoinQuantProvider
-from core.data.storage import LocalParquetStore
 
 
 def parse_args() -> argparse.Namespace:
@@ -34,7 +33,7 @@ def main() -> None:
     provider_cfg = build_provider_config(raw_cfg, provider_name)
 
     provider = JoinQuantProvider(provider_cfg)
-    store = LocalParquetStore(provider_cfg.base_dir)
+    store = build_store(raw_cfg, provider_cfg)
     fetcher = MarketFetcher(provider, store)
 
     symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
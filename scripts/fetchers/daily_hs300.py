@@ -14,10 +14,10 @@ ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from core.data.config import build_provider_config, load_raw_config
+from core.data.config import build_provider_config, build_store, load_raw_config
 from core.data.fetcher import MarketFetcher
 from core.data.providers.joinquant import JoinQuantProvider
-from core.data.storage import LocalParquetStore
+from core.profiling import enable_profiling, profile_run
 
 
 def parse_args() -> argparse.Namespace:
@@ -27,6 +27,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
     parser.add_argument("--log-level", default="INFO", help="日志级别")
     parser.add_argument("--limit", type=int, default=300, help="截取前 N 个成份，默认 300")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
     return parser.parse_args()
 
 
@@ -51,15 +52,12 @@ def get_index_constituents(provider: JoinQuantProvider, index_symbol: str, targe
     return symbols[:limit] if limit else symbols
 
 
-def main() -> None:
-    args = parse_args()
-    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
-
+def run(args: argparse.Namespace) -> None:
     raw_cfg = load_raw_config(args.config)
     provider_name = raw_cfg.get("default_provider", "joinquant")
     provider_cfg = build_provider_config(raw_cfg, provider_name)
     provider = JoinQuantProvider(provider_cfg)
-    store = LocalParquetStore(provider_cfg.base_dir)
+    store = build_store(raw_cfg, provider_cfg)
     fetcher = MarketFetcher(provider=provider, store=store)
 
     target_date = get_target_date(args.date)
@@ -85,5 +83,14 @@ def main() -> None:
         )
 
 
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.profile:
+        enable_profiling()
+    with profile_run("daily_hs300"):
+        run(args)
+
+
 if __name__ == "__main__":
     main()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import argparse
 import datetime as dt
 import logging
 import sys
@@ -12,11 +13,11 @@ ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from core.data.config import build_provider_config, load_raw_config
+from core.data.config import build_provider_config, build_store, load_raw_config
 from core.data.fetcher import MarketFetcher
 from core.data.providers.joinquant import JoinQuantProvider
 from core.data.securities import SecuritiesCache
-from core.data.storage import LocalParquetStore
+from core.profiling import enable_profiling, profile_run
 
 
 def get_all_stock_symbols(cfg_path: Path, use_cache: bool = True, refresh: bool = False) -> list[str]:
@@ -45,7 +46,7 @@ def run_daily(cfg_path: Path, target_date: pd.Timestamp, log_level: str = "INFO"
     provider_name = load_raw_config(cfg_path).get("default_provider", "joinquant")
     provider_cfg = build_provider_config(load_raw_config(cfg_path), provider_name)
     provider = JoinQuantProvider(provider_cfg)
-    store = LocalParquetStore(provider_cfg.base_dir)
+    store = build_store(load_raw_config(cfg_path), provider_cfg)
     fetcher = MarketFetcher(provider=provider, store=store)
 
     start = target_date.normalize()
@@ -63,11 +64,21 @@ def run_daily(cfg_path: Path, target_date: pd.Timestamp, log_level: str = "INFO"
         )
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="每日拉取上一交易日全市场日线")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
+    return parser.parse_args()
+
+
 def main() -> None:
+    args = parse_args()
+    if args.profile:
+        enable_profiling()
     cfg_path = Path("config/data.yaml")
     today = pd.Timestamp(dt.date.today(), tz="UTC")
     target_date = today - pd.Timedelta(days=1)
-    run_daily(cfg_path, target_date)
+    with profile_run("daily_job"):
+        run_daily(cfg_path, target_date)
 
 
 if __name__ == "__main__":
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import argparse
 import sys
+import time
 from pathlib import Path
 from typing import List
 
@@ -13,26 +14,32 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from core.data.config import build_provider_config, load_raw_config
+from core.data.config import build_provider_config, build_store, load_raw_config
 from core.data.fetcher import MarketFetcher
-from core.data.providers.joinquant import JoinQuantProvider
-from core.data.storage import LocalParquetStore
+from core.data.journal import BackfillJournal
+from core.data.providers import create_provider
+from core.profiling import enable_profiling, profile_run
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="全市场/单标的行情拉取（聚宽），落盘 Parquet。")
-    parser.add_argument("--start", required=True, help="开始日期，例如 2020-01-01")
-    parser.add_argument("--end", required=True, help="结束日期，例如 2024-12-31")
+    parser.add_argument("--start", help="开始日期，例如 2020-01-01（恢复已有 run 时可省略）")
+    parser.add_argument("--end", help="结束日期，例如 2024-12-31（恢复已有 run 时可省略）")
     parser.add_argument("--freq", default="1d", help="频率：1d 或 1m")
     parser.add_argument("--symbols", help="指定标的列表，逗号分隔；若与 --all 同时指定，则以 --symbols 为准")
     parser.add_argument("--all", action="store_true", help="是否拉取全市场（通过 provider.list_securities）")
     parser.add_argument("--types", default="stock", help="全市场类型列表，逗号分隔，例如 stock,etf")
     parser.add_argument("--limit", type=int, help="限制标的数量（调试用）")
     parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
-    parser.add_argument("--chunk-days", type=int, default=366, help="日线分片天数")
-    parser.add_argument("--chunk-minutes", type=int, default=3 * 24 * 60, help="分钟线分片分钟数")
+    parser.add_argument("--chunk-days", type=int, default=None, help="日线分片天数上限（默认按 provider limits 自适应）")
+    parser.add_argument("--chunk-minutes", type=int, default=None, help="分钟线分片分钟数上限（默认按 provider limits 自适应）")
     parser.add_argument("--full-refresh", action="store_true", help="忽略缺口，直接按区间全量拉取")
+    parser.add_argument("--topup", action="store_true", help="分钟线盘中补齐：部分覆盖的交易日只从最后一根 bar 之后拉取")
+    parser.add_argument("--run-id", help="回补任务 ID：记录进度到 <base_dir>/_runs/<run-id>.jsonl，重复执行同一 ID 即断点续跑")
+    parser.add_argument("--retry-failed", action="store_true", help="配合 --run-id，仅重试该任务中失败的标的")
+    parser.add_argument("--status", action="store_true", help="配合 --run-id，仅打印任务进度/失败列表后退出")
     parser.add_argument("--log-level", default="INFO", help="日志级别，默认 INFO")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
     return parser.parse_args()
 
 
@@ -40,8 +47,8 @@ def build_fetcher(args: argparse.Namespace) -> MarketFetcher:
     raw_cfg = load_raw_config(args.config)
     provider_name = raw_cfg.get("default_provider", "joinquant")
     provider_cfg = build_provider_config(raw_cfg, provider_name)
-    provider = JoinQuantProvider(provider_cfg)
-    store = LocalParquetStore(provider_cfg.base_dir)
+    provider = create_provider(provider_name, provider_cfg)
+    store = build_store(raw_cfg, provider_cfg)
     return MarketFetcher(
         provider=provider,
         store=store,
@@ -63,30 +70,83 @@ def resolve_symbols(fetcher: MarketFetcher, args: argparse.Namespace) -> List[st
     raise ValueError("请指定 --symbols 或 --all")
 
 
+def print_status(journal: BackfillJournal) -> None:
+    if not journal.exists():
+        print(f"Run {journal.run_id} not found at {journal.path}")
+        return
+    plan = journal.plan
+    print(f"Run {journal.run_id}: freq={plan['freq']} start={plan['start']} end={plan['end']}")
+    print(journal.progress().describe())
+    for sym, error in journal.failures().items():
+        print(f"- failed {sym}: {error}")
+
+
+def run(args: argparse.Namespace) -> None:
+    if args.status:
+        if not args.run_id:
+            raise ValueError("--status 需要同时指定 --run-id")
+        raw_cfg = load_raw_config(args.config)
+        provider_cfg = build_provider_config(raw_cfg, raw_cfg.get("default_provider", "joinquant"))
+        print_status(BackfillJournal(provider_cfg.base_dir, args.run_id))
+        return
+
+    fetcher = build_fetcher(args)
+    journal = BackfillJournal(fetcher.store.base_dir, args.run_id) if args.run_id else None
+    if journal is not None and journal.exists():
+        # 断点续跑：区间/频率以首次运行记录的计划为准，只跑未完成（或失败）的标的
+        plan = journal.plan
+        start_ts = pd.Timestamp(plan["start"])
+        end_ts = pd.Timestamp(plan["end"])
+        freq = plan["freq"]
+        use_missing = bool(plan.get("use_missing_ranges", True))
+        symbols = journal.pending(failed_only=args.retry_failed)
+        print(f"Resuming run {journal.run_id}: {journal.progress().describe()}")
+    else:
+        if args.retry_failed:
+            raise ValueError("--retry-failed 需要已存在的 --run-id")
+        if not args.start or not args.end:
+            raise ValueError("请指定 --start 和 --end")
+        symbols = resolve_symbols(fetcher, args)
+        start_ts = pd.Timestamp(args.start)
+        end_ts = pd.Timestamp(args.end)
+        freq = args.freq
+        use_missing = not args.full_refresh
+        if journal is not None:
+            journal.create(symbols, start_ts, end_ts, freq, use_missing_ranges=use_missing)
+
+    print(f"Total symbols: {len(symbols)}; freq={freq}; start={start_ts.date()} end={end_ts.date()}")
+    # 日线截面文件整批写一次
+    with fetcher.store.batch():
+        for idx, sym in enumerate(symbols, 1):
+            started = time.monotonic()
+            result = fetcher.fetch_symbol(
+                sym, start_ts, end_ts, freq=freq, use_missing_ranges=use_missing, topup=args.topup
+            )
+            status = "ok"
+            if result.skipped:
+                status = "skipped"
+            if result.error:
+                status = f"error: {result.error}"
+            eta = ""
+            if journal is not None:
+                journal.record(result, time.monotonic() - started)
+                eta = f" [{journal.progress().describe()}]"
+            print(
+                f"[{idx}/{len(symbols)}] {sym} -> rows={result.fetched_rows} "
+                f"missing_ranges={result.missing_ranges} status={status}{eta}"
+            )
+
+
 def main() -> None:
     args = parse_args()
     logging.basicConfig(
         level=args.log_level.upper(),
         format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
     )
-    fetcher = build_fetcher(args)
-    symbols = resolve_symbols(fetcher, args)
-    start_ts = pd.Timestamp(args.start)
-    end_ts = pd.Timestamp(args.end)
-    use_missing = not args.full_refresh
-
-    print(f"Total symbols: {len(symbols)}; freq={args.freq}; start={start_ts.date()} end={end_ts.date()}")
-    for idx, sym in enumerate(symbols, 1):
-        result = fetcher.fetch_symbol(sym, start_ts, end_ts, freq=args.freq, use_missing_ranges=use_missing)
-        status = "ok"
-        if result.skipped:
-            status = "skipped"
-        if result.error:
-            status = f"error: {result.error}"
-        print(
-            f"[{idx}/{len(symbols)}] {sym} -> rows={result.fetched_rows} "
-            f"missing_ranges={result.missing_ranges} status={status}"
-        )
+    if args.profile:
+        enable_profiling()
+    with profile_run("fetch_market"):
+        run(args)
 
 
 if __name__ == "__main__":
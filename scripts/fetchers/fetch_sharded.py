@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.config import build_provider_config, load_raw_config
+from core.data.sharding import DEFAULT_SHARD_SIZE, LEASE_SECONDS, ShardedRun, ShardWorker, default_worker_id
+from core.profiling import enable_profiling, profile_run
+from scripts.fetchers.fetch_market import build_fetcher, resolve_symbols
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="多节点分片回补：worker 通过共享目录下的租约文件认领标的分片。")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径（各节点可用不同账号）")
+    parser.add_argument("--run-id", required=True, help="分片任务 ID，数据位于 <base_dir>/_runs/<run-id>/")
+    parser.add_argument("--lease-seconds", type=float, default=LEASE_SECONDS, help="租约有效期（秒），超时未续约即可被接管")
+    parser.add_argument("--log-level", default="INFO", help="日志级别，默认 INFO")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    plan = sub.add_parser("plan", help="创建分片任务（只需在一个节点执行一次）")
+    plan.add_argument("--start", required=True, help="开始日期，例如 2020-01-01")
+    plan.add_argument("--end", required=True, help="结束日期，例如 2024-12-31")
+    plan.add_argument("--freq", default="1d", help="频率：1d 或 1m")
+    plan.add_argument("--symbols", help="指定标的列表，逗号分隔；若与 --all 同时指定，则以 --symbols 为准")
+    plan.add_argument("--all", action="store_true", help="是否拉取全市场（通过 provider.list_securities）")
+    plan.add_argument("--types", default="stock", help="全市场类型列表，逗号分隔，例如 stock,etf")
+    plan.add_argument("--limit", type=int, help="限制标的数量（调试用）")
+    plan.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="每个分片的标的数")
+    plan.add_argument("--full-refresh", action="store_true", help="忽略缺口，直接按区间全量拉取")
+
+    work = sub.add_parser("work", help="启动 worker：循环认领分片直到没有可认领的分片")
+    work.add_argument("--worker-id", default=None, help="worker 标识，默认 <hostname>-<pid>")
+    work.add_argument("--retry-failed", action="store_true", help="同时重新认领已完成但含失败标的的分片")
+    work.add_argument("--topup", action="store_true", help="分钟线盘中补齐：部分覆盖的交易日只从最后一根 bar 之后拉取")
+    work.add_argument("--chunk-days", type=int, default=None, help="日线分片天数上限（默认按 provider limits 自适应）")
+    work.add_argument("--chunk-minutes", type=int, default=None, help="分钟线分片分钟数上限（默认按 provider limits 自适应）")
+    work.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
+
+    sub.add_parser("status", help="协调视图：汇总所有分片的进度、持有者与租约状态")
+    return parser.parse_args()
+
+
+def open_run(args: argparse.Namespace) -> ShardedRun:
+    raw_cfg = load_raw_config(args.config)
+    provider_cfg = build_provider_config(raw_cfg, raw_cfg.get("default_provider", "joinquant"))
+    return ShardedRun(provider_cfg.base_dir, args.run_id, lease_seconds=args.lease_seconds)
+
+
+def plan_run(args: argparse.Namespace) -> None:
+    args.chunk_days = args.chunk_minutes = None
+    fetcher = build_fetcher(args)
+    run = ShardedRun(fetcher.store.base_dir, args.run_id, lease_seconds=args.lease_seconds)
+    symbols = resolve_symbols(fetcher, args)
+    manifest = run.create(
+        symbols,
+        pd.Timestamp(args.start),
+        pd.Timestamp(args.end),
+        args.freq,
+        use_missing_ranges=not args.full_refresh,
+        shard_size=args.shard_size,
+    )
+    print(f"Created run {run.run_id}: {manifest['total']} symbols in {len(manifest['shards'])} shards at {run.root}")
+
+
+def work_run(args: argparse.Namespace) -> None:
+    fetcher = build_fetcher(args)
+    run = ShardedRun(fetcher.store.base_dir, args.run_id, lease_seconds=args.lease_seconds)
+    worker_id = args.worker_id or default_worker_id()
+
+    def report(shard: str, result) -> None:
+        status = "ok"
+        if result.skipped:
+            status = "skipped"
+        if result.error:
+            status = f"error: {result.error}"
+        print(f"[{worker_id} {shard}] {result.symbol} -> rows={result.fetched_rows} status={status}")
+
+    worker = ShardWorker(
+        run, fetcher, worker_id=worker_id, topup=args.topup, retry_failed=args.retry_failed, on_result=report
+    )
+    with profile_run(f"fetch_sharded-{worker_id}"):
+        completed = worker.run_until_done()
+    print(f"Worker {worker_id} finished: completed {completed} shards; {run.progress().describe()}")
+
+
+def print_status(run: ShardedRun) -> None:
+    if not run.exists():
+        print(f"Run {run.run_id} not found at {run.root}")
+        return
+    plan = run.plan
+    progress = run.progress()
+    print(f"Run {run.run_id}: freq={plan['freq']} start={plan['start']} end={plan['end']}")
+    print(progress.describe())
+    for shard in progress.shards:
+        owner = f" worker={shard.worker}" if shard.worker else ""
+        expiry = f" expires_in={shard.expires_in}s" if shard.expires_in is not None else ""
+        print(
+            f"- {shard.shard}: {shard.state} done={shard.done}/{shard.symbols} failed={shard.failed}{owner}{expiry}"
+        )
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+    )
+    if args.command == "plan":
+        plan_run(args)
+    elif args.command == "work":
+        if args.profile:
+            enable_profiling()
+        work_run(args)
+    else:
+        print_status(open_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.config import build_provider_config, build_storage_config, load_raw_config
+from core.data.fetcher import MarketFetcher
+from core.data.providers import create_provider
+from core.data.storage import LocalParquetStore
+from core.profiling import enable_profiling, profile_run
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="用 replay provider 压测 MarketFetcher（并发数/分片大小）")
+    parser.add_argument("--start", required=True, help="开始日期，例如 2020-01-01")
+    parser.add_argument("--end", required=True, help="结束日期，例如 2024-12-31")
+    parser.add_argument("--freq", default="1d", help="频率：1d 或 1m")
+    parser.add_argument("--symbols", type=int, default=50, help="压测标的数量（取 list_securities 前 N 个）")
+    parser.add_argument("--workers", default="1,4,8", help="并发线程数列表，逗号分隔")
+    parser.add_argument("--chunk-days", type=int, default=None, help="日线分片天数上限（默认按 provider limits 自适应）")
+    parser.add_argument("--chunk-minutes", type=int, default=None, help="分钟线分片分钟数上限（默认按 provider limits 自适应）")
+    parser.add_argument("--provider", default="replay", help="config 中的 provider 名称，默认 replay")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
+    parser.add_argument("--log-level", default="WARNING", help="日志级别，默认 WARNING")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
+    return parser.parse_args()
+
+
+def run_round(args: argparse.Namespace, workers: int) -> str:
+    raw_cfg = load_raw_config(args.config)
+    provider_cfg = build_provider_config(raw_cfg, args.provider)
+    provider = create_provider(args.provider, provider_cfg)
+    start_ts = pd.Timestamp(args.start)
+    end_ts = pd.Timestamp(args.end)
+
+    with tempfile.TemporaryDirectory(prefix="replay-bench-") as tmp:
+        fetcher = MarketFetcher(
+            provider=provider,
+            store=LocalParquetStore(Path(tmp), timezone=provider_cfg.timezone, options=build_storage_config(raw_cfg)),
+            chunk_days=args.chunk_days,
+            chunk_minutes=args.chunk_minutes,
+        )
+        symbols: List[str] = provider.list_securities(types=["stock"])["symbol"].tolist()[: args.symbols]
+        # 预热交易日历，避免多线程同时写日历缓存
+        fetcher._get_trade_days(fetcher._to_utc(start_ts), fetcher._to_utc(end_ts))
+
+        started = time.perf_counter()
+        with fetcher.store.batch(), ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(
+                pool.map(lambda sym: fetcher.fetch_symbol(sym, start_ts, end_ts, freq=args.freq), symbols)
+            )
+        elapsed = time.perf_counter() - started
+
+    rows = sum(r.fetched_rows for r in results)
+    failed = sum(1 for r in results if r.error)
+    stats_text = ""
+    if hasattr(provider, "stats"):
+        stats_text = " ".join(f"{k}={v:g}" for k, v in provider.stats.as_dict().items())
+    return (
+        f"workers={workers} symbols={len(symbols)} elapsed={elapsed:.2f}s "
+        f"symbols/s={len(symbols) / elapsed:.2f} rows/s={rows / elapsed:.0f} failed={failed} {stats_text}"
+    )
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    worker_counts = [int(w) for w in args.workers.split(",") if w.strip()]
+    print(f"Replay bench freq={args.freq} start={args.start} end={args.end} chunk_days={args.chunk_days or 'adaptive'}")
+    if args.profile:
+        enable_profiling()
+    for workers in worker_counts:
+        with profile_run(f"replay_bench-w{workers}"):
+            print(run_round(args, workers))
+
+
+if __name__ == "__main__":
+    main()
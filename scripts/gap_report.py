@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Ensure project root is on sys.path when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.calendar import TradingCalendarCache
+from core.data.config import build_provider_config, build_storage_config, load_raw_config
+from core.data.gaps import GapScanner
+from core.data.sessions import SessionSchedule
+from core.data.storage import LocalParquetStore
+from core.profiling import enable_profiling, profile_run
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="按交易日历/交易时段扫描本地存储缺口（离线，使用已缓存的交易日历）")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
+    parser.add_argument("--base-dir", type=Path, help="存储目录（默认取 default_provider 的 base_dir）")
+    parser.add_argument("--freq", default="1d", help="频率，默认 1d")
+    parser.add_argument("--symbols", help="只扫描指定标的，逗号分隔（默认全部）")
+    parser.add_argument("--start", help="起始日期（默认各标的首个已存储交易日）")
+    parser.add_argument("--end", help="结束日期（默认各标的最后已存储交易日）")
+    parser.add_argument("--workers", type=int, default=8, help="并发标的数，默认 8")
+    parser.add_argument("--output", type=Path, help="缺口明细写出为 CSV")
+    parser.add_argument("--log-level", default="INFO", help="日志级别，默认 INFO")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
+    return parser.parse_args()
+
+
+def run(args: argparse.Namespace) -> None:
+    raw_cfg = load_raw_config(args.config)
+    provider_name = raw_cfg.get("default_provider", "joinquant")
+    provider_cfg = build_provider_config(raw_cfg, provider_name)
+    base_dir = args.base_dir or provider_cfg.base_dir
+    store = LocalParquetStore(base_dir, timezone=provider_cfg.timezone, options=build_storage_config(raw_cfg))
+    trade_days = TradingCalendarCache(base_dir, provider_name).cached()
+    if trade_days.empty:
+        raise RuntimeError(f"未找到已缓存的交易日历（{base_dir}/_calendar），请先运行一次拉取任务")
+    scanner = GapScanner(store, trade_days, SessionSchedule.from_config(provider_cfg))
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()] if args.symbols else store.symbols(args.freq)
+
+    started = time.perf_counter()
+    report = scanner.scan(symbols, args.freq, start=args.start, end=args.end, workers=args.workers)
+    elapsed = time.perf_counter() - started
+    failed = report[report["error"] != ""]
+    gaps = report[report["error"] == ""]
+    print(
+        f"Scanned {len(symbols)} symbols freq={args.freq} in {elapsed:.1f}s: "
+        f"symbols_with_gaps={gaps['symbol'].nunique()} ranges={len(gaps)} missing_bars={int(gaps['bars'].sum())} "
+        f"failed={len(failed)}"
+    )
+    if not gaps.empty:
+        worst = gaps.groupby("symbol")["bars"].sum().sort_values(ascending=False).head(20)
+        for symbol, bars in worst.items():
+            print(f"- {symbol}: missing_bars={bars}")
+    for row in failed.itertuples():
+        print(f"! {row.symbol}: scan failed: {row.error}")
+    if args.output:
+        report.to_csv(args.output, index=False)
+        print(f"Wrote {len(gaps)} ranges and {len(failed)} failed symbols to {args.output}")
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.profile:
+        enable_profiling()
+    with profile_run("gap_report"):
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
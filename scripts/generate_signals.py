@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Ensure project root is on sys.path when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.config import build_provider_config, build_storage_config, load_raw_config
+from core.data.panel import PanelCache
+from core.data.storage import LocalParquetStore
+from core.profiling import enable_profiling, profile_run
+from core.signals.generator import GeneratorConfig, SignalGenerator, default_strategies
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="多策略综合信号：共享特征计算后输出标的、方向、目标权重与贡献策略")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
+    parser.add_argument("--base-dir", type=Path, help="存储目录（默认取 default_provider 的 base_dir）")
+    parser.add_argument("--trade-date", type=int, help="信号日期 YYYYMMDD（默认 panel 最新交易日）")
+    parser.add_argument("--symbols", help="限定标的，逗号分隔（默认 panel 全部标的）")
+    parser.add_argument("--min-score", type=float, default=0.2, help="综合分数绝对值下限，默认 0.2")
+    parser.add_argument("--max-positions", type=int, default=50, help="每个方向最多输出的标的数，默认 50")
+    parser.add_argument("--max-weight", type=float, default=0.05, help="单票目标权重上限，默认 0.05")
+    parser.add_argument("--allow-short", action="store_true", help="同时输出空头信号")
+    parser.add_argument("--output", type=Path, help="信号写出为 CSV")
+    parser.add_argument("--log-level", default="INFO", help="日志级别，默认 INFO")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
+    return parser.parse_args()
+
+
+def run(args: argparse.Namespace) -> None:
+    raw_cfg = load_raw_config(args.config)
+    provider_cfg = build_provider_config(raw_cfg, raw_cfg.get("default_provider", "joinquant"))
+    store = LocalParquetStore(
+        args.base_dir or provider_cfg.base_dir, timezone=provider_cfg.timezone, options=build_storage_config(raw_cfg)
+    )
+    panel = PanelCache(store).ensure()
+    config = GeneratorConfig(
+        min_score=args.min_score,
+        allow_short=args.allow_short,
+        max_weight=args.max_weight,
+        max_positions=args.max_positions,
+    )
+    generator = SignalGenerator(default_strategies(), config)
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()] if args.symbols else None
+
+    started = time.perf_counter()
+    signals = generator.generate(panel, args.trade_date, symbols)
+    elapsed = time.perf_counter() - started
+    print(
+        f"Strategies: {', '.join(s.name for s in generator.strategies)}; features: {len(generator.plan.order)} "
+        f"(requested {len(generator.plan.requested)}); lookback={generator.plan.lookback} in {elapsed:.2f}s"
+    )
+    print(signals.to_string(index=False) if not signals.empty else "No signals")
+    if args.output:
+        signals.to_csv(args.output, index=False)
+        print(f"Wrote {len(signals)} rows to {args.output}")
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.profile:
+        enable_profiling()
+    with profile_run("generate_signals"):
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
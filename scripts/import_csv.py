@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Ensure project root is on sys.path when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.config import build_provider_config, build_storage_config, load_raw_config
+from core.data.loaders import DEFAULT_BLOCK_SIZE, CSVPriceLoader
+from core.data.schema import PRICE_SCHEMA
+from core.data.sessions import SessionSchedule
+from core.data.storage import LocalParquetStore
+from core.profiling import enable_profiling, profile_run
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="将目录下的供应商 CSV 批量导入本地 Parquet 存储（并行、分块流式读取）")
+    parser.add_argument("source", type=Path, help="CSV 目录（或单个文件）")
+    parser.add_argument("--pattern", default="*.csv", help="文件匹配模式，默认 *.csv（递归）")
+    parser.add_argument("--freq", default="1d", help="写入的频率，默认 1d")
+    parser.add_argument("--symbol-column", default="code", help="标的代码所在列，默认 code")
+    parser.add_argument("--symbol-from-filename", action="store_true", help="以文件名（不含扩展名）作为标的代码")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
+    parser.add_argument("--base-dir", type=Path, help="存储目录（默认取 default_provider 的 base_dir）")
+    parser.add_argument("--workers", type=int, default=8, help="并发文件数，默认 8")
+    parser.add_argument("--block-mb", type=int, default=DEFAULT_BLOCK_SIZE >> 20, help="每次读取的块大小（MB）")
+    parser.add_argument("--log-level", default="INFO", help="日志级别，默认 INFO")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
+    return parser.parse_args()
+
+
+def split_symbols(table: pa.Table, column: str) -> Iterator[Tuple[str, pa.Table]]:
+    values = table.column(column).cast(pa.string())
+    for symbol in pc.unique(values).to_pylist():
+        if symbol:
+            yield symbol, table.filter(pc.equal(values, symbol))
+
+
+def import_file(store: LocalParquetStore, path: Path, args: argparse.Namespace) -> int:
+    loader = CSVPriceLoader(str(path), sidecar=False, block_size=args.block_mb << 20)
+    rows = 0
+    for chunk in loader.iter_tables():
+        # 只落盘规范列，供应商附加列（名称、估值等）不入库
+        keep = [name for name in PRICE_SCHEMA.names if name in chunk.column_names and name != "symbol"]
+        if args.symbol_from_filename:
+            parts = [(path.stem, chunk)]
+        elif args.symbol_column in chunk.column_names:
+            parts = split_symbols(chunk, args.symbol_column)
+        else:
+            raise ValueError(f"{path}: 缺少标的列 {args.symbol_column}（或使用 --symbol-from-filename）")
+        for symbol, part in parts:
+            store.upsert(symbol, args.freq, part.select(keep))
+            rows += part.num_rows
+    return rows
+
+
+def run(args: argparse.Namespace) -> int:
+    raw_cfg = load_raw_config(args.config)
+    provider_cfg = build_provider_config(raw_cfg, raw_cfg.get("default_provider", "joinquant"))
+    store = LocalParquetStore(
+        args.base_dir or provider_cfg.base_dir,
+        timezone=provider_cfg.timezone,
+        options=build_storage_config(raw_cfg),
+        schedule=SessionSchedule.from_config(provider_cfg),
+    )
+    files = [args.source] if args.source.is_file() else sorted(args.source.rglob(args.pattern))
+    if not files:
+        print(f"No files matching {args.pattern} under {args.source}")
+        return 1
+
+    def work(path: Path):
+        try:
+            return path, import_file(store, path, args), None
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Failed to import %s", path)
+            return path, 0, str(exc)
+
+    total = 0
+    failures = []
+    # 日线截面文件在整批结束时合并写一次
+    with store.batch(), ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for idx, (path, rows, error) in enumerate(pool.map(work, files), 1):
+            if error:
+                failures.append((path, error))
+            total += rows
+            print(f"[{idx}/{len(files)}] {path} -> rows={rows} status={'error: ' + error if error else 'ok'}")
+    print(f"Imported files={len(files) - len(failures)}/{len(files)} rows={total} freq={args.freq} into {store.base_dir}")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.profile:
+        enable_profiling()
+    with profile_run("import_csv"):
+        code = run(args)
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
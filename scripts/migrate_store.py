@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Ensure project root is on sys.path when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.config import build_provider_config, build_storage_config, load_raw_config
+from core.data.schema import SCHEMA_VERSION
+from core.data.storage import LocalParquetStore
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=f"将本地 Parquet 存储升级到 v{SCHEMA_VERSION} 规范格式（原地、原子替换）")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
+    parser.add_argument("--base-dir", type=Path, help="存储目录（默认取 default_provider 的 base_dir）")
+    parser.add_argument("--symbols", help="只迁移指定标的，逗号分隔")
+    parser.add_argument("--workers", type=int, default=4, help="并发分区数，默认 4")
+    parser.add_argument("--dry-run", action="store_true", help="只读取、转换并校验行数，不写回")
+    parser.add_argument(
+        "--relayout", action="store_true", help="已是当前版本的分区也按 config 中 storage 选项重写（修改压缩/精度后使用）"
+    )
+    parser.add_argument("--log-level", default="INFO", help="日志级别，默认 INFO")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    raw_cfg = load_raw_config(args.config)
+    provider_cfg = build_provider_config(raw_cfg, raw_cfg.get("default_provider", "joinquant"))
+    store = LocalParquetStore(
+        args.base_dir or provider_cfg.base_dir, timezone=provider_cfg.timezone, options=build_storage_config(raw_cfg)
+    )
+    only = {s.strip() for s in args.symbols.split(",") if s.strip()} if args.symbols else None
+    partitions = [p for p in store.iter_partitions() if only is None or p[0] in only]
+
+    def upgrade(part):
+        symbol, freq, year, path = part
+        try:
+            return part, store.upgrade_partition(symbol, freq, year, dry_run=args.dry_run, force=args.relayout), None
+        except Exception as exc:  # noqa: BLE001
+            logging.getLogger(__name__).exception("Failed to migrate %s", path)
+            return part, None, str(exc)
+
+    migrated = current = rows = 0
+    failures = []
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for (symbol, freq, year, path), result, error in pool.map(upgrade, partitions):
+            if error:
+                failures.append((path, error))
+            elif result is None:
+                current += 1
+            else:
+                migrated += 1
+                rows += result
+    action = "would migrate" if args.dry_run else "migrated"
+    print(
+        f"Partitions: {len(partitions)}; {action}={migrated} rows={rows} "
+        f"already_v{SCHEMA_VERSION}={current} failed={len(failures)}"
+    )
+    for path, error in failures:
+        print(f"- {path}: {error}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from core.backtest.significance import SignificanceTester
 from core.data.loaders import CSVPriceLoader
 from core.strategies.momentum import MomentumConfig, SimpleMomentumBacktester
 
@@ -20,6 +21,10 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--csv", type=Path, default=Path("data/ali.csv"), help="Path to price CSV")
     parser.add_argument("--short", type=int, default=5, help="Short moving average window")
     parser.add_argument("--long", type=int, default=20, help="Long moving average window")
+    parser.add_argument("--bootstrap", type=int, default=0, help="Block-bootstrap resamples for confidence intervals (0 = off)")
+    parser.add_argument("--seed", type=int, help="Random seed for the resamples")
+    parser.add_argument("--sidecar-dir", type=Path, help="Directory for the parsed-CSV Parquet sidecar (default: next to the CSV)")
+    parser.add_argument("--no-sidecar", action="store_true", help="Always parse the CSV, without reading or writing a sidecar")
     return parser.parse_args()
 
 
@@ -28,7 +33,8 @@ def main() -> None:
     if not args.csv.exists():
         raise FileNotFoundError(f"CSV not found: {args.csv}")
 
-    loader = CSVPriceLoader(str(args.csv))
+    # 重复运行同一 CSV 时直接读取 Parquet sidecar，不再逐行解析
+    loader = CSVPriceLoader(str(args.csv), sidecar=not args.no_sidecar, sidecar_dir=args.sidecar_dir)
     df = loader.load()
 
     config = MomentumConfig(short_window=args.short, long_window=args.long)
@@ -45,6 +51,9 @@ def main() -> None:
     print(f"Sharpe (naive): {perf['sharpe']:.2f}")
     print(f"Max drawdown: {perf['max_drawdown']:.2%}")
     print(f"Signal count: {perf['signal_count']}")
+    if args.bootstrap > 0:
+        print("-- Significance --")
+        print(SignificanceTester.from_backtester(backtester, seed=args.seed).report(samples=args.bootstrap).describe())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.profiling import profile_dir, summarize
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="汇总 --profile 生成的 cProfile/tracemalloc 结果")
+    parser.add_argument("paths", nargs="*", type=Path, help=".prof 文件或目录（默认 logs/profile）")
+    parser.add_argument("--latest", type=int, default=1, help="目录模式下展示最近 N 个结果，默认 1")
+    parser.add_argument("--name", help="只看指定名称（脚本名/工具名）的结果")
+    parser.add_argument("--top", type=int, default=20, help="展示前 N 个函数/分配点")
+    parser.add_argument("--sort", default="cumulative", help="pstats 排序键：cumulative/tottime/ncalls")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    files = []
+    for path in args.paths or [profile_dir()]:
+        if path.is_dir():
+            pattern = f"{args.name}-*.prof" if args.name else "*.prof"
+            found = sorted(path.glob(pattern), key=lambda p: p.stat().st_mtime)
+            files.extend(found[-args.latest :] if args.latest else found)
+        elif path.exists():
+            files.append(path)
+    if not files:
+        print("No profile files found")
+        return
+    for prof in files:
+        print(summarize(prof, top=args.top, sort=args.sort))
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Ensure project root is on sys.path when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.calendar import TradingCalendarCache
+from core.data.config import build_provider_config, build_storage_config, load_raw_config
+from core.data.quality import ISSUE_COLUMNS, QualityConfig, QualityScanner
+from core.data.sessions import SessionSchedule
+from core.data.storage import LocalParquetStore
+from core.profiling import enable_profiling, profile_run
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="全库数据质量扫描（多进程），结果写入 <base_dir>/_quality/report.parquet")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
+    parser.add_argument("--base-dir", type=Path, help="存储目录（默认取 default_provider 的 base_dir）")
+    parser.add_argument("--freq", help="只扫描指定频率，逗号分隔（默认全部）")
+    parser.add_argument("--symbols", help="只扫描指定标的，逗号分隔（默认全部）")
+    parser.add_argument("--workers", type=int, default=4, help="进程数，默认 4")
+    parser.add_argument("--jump-threshold", type=float, default=QualityConfig.jump_threshold, help="日线跳变阈值")
+    parser.add_argument(
+        "--intraday-jump-threshold", type=float, default=QualityConfig.intraday_jump_threshold, help="分钟线跳变阈值"
+    )
+    parser.add_argument("--top", type=int, default=20, help="输出问题最多的前 N 个标的")
+    parser.add_argument("--log-level", default="INFO", help="日志级别，默认 INFO")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
+    return parser.parse_args()
+
+
+def run(args: argparse.Namespace) -> None:
+    raw_cfg = load_raw_config(args.config)
+    provider_name = raw_cfg.get("default_provider", "joinquant")
+    provider_cfg = build_provider_config(raw_cfg, provider_name)
+    base_dir = args.base_dir or provider_cfg.base_dir
+    store = LocalParquetStore(base_dir, timezone=provider_cfg.timezone, options=build_storage_config(raw_cfg))
+    trade_days = TradingCalendarCache(base_dir, provider_name).cached()
+    if trade_days.empty:
+        raise RuntimeError(f"未找到已缓存的交易日历（{base_dir}/_calendar），请先运行一次拉取任务")
+    scanner = QualityScanner(
+        store,
+        trade_days,
+        SessionSchedule.from_config(provider_cfg),
+        QualityConfig(jump_threshold=args.jump_threshold, intraday_jump_threshold=args.intraday_jump_threshold),
+    )
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()] if args.symbols else None
+    freqs = [f.strip() for f in args.freq.split(",") if f.strip()] if args.freq else None
+
+    started = time.perf_counter()
+    report = scanner.run(symbols=symbols, freqs=freqs, workers=args.workers)
+    elapsed = time.perf_counter() - started
+    scanned = report if symbols is None and freqs is None else report[
+        (report["symbol"].isin(symbols) if symbols else True) & (report["freq"].isin(freqs) if freqs else True)
+    ]
+    flagged = scanned[(scanned["issues"] > 0) | (scanned["error"] != "")]
+    print(f"Scanned {len(scanned)} symbol/freq in {elapsed:.1f}s; flagged={len(flagged)} -> {scanner.report_path}")
+    print("Totals: " + " ".join(f"{name}={int(scanned[name].sum())}" for name in ISSUE_COLUMNS))
+    for row in flagged.sort_values("issues", ascending=False).head(args.top).itertuples():
+        detail = " ".join(f"{name}={getattr(row, name)}" for name in ISSUE_COLUMNS if getattr(row, name))
+        print(f"- {row.symbol} {row.freq}: {detail}{' error=' + row.error if row.error else ''}")
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.profile:
+        enable_profiling()
+    with profile_run("quality_scan"):
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
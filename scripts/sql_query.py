@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.config import build_provider_config, build_storage_config, load_raw_config
+from core.data.query import DEFAULT_MAX_ROWS, DEFAULT_TIMEOUT_SECONDS, QueryEngine
+from core.data.storage import LocalParquetStore
+from core.profiling import enable_profiling, profile_run
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="对本地存储执行只读 SQL（DuckDB），表为 bars_<freq> 与 xsection_1d")
+    parser.add_argument("query", help="单条 SELECT 语句；传 - 从标准输入读取")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
+    parser.add_argument("--base-dir", type=Path, help="存储目录（默认取 default_provider 的 base_dir）")
+    parser.add_argument("--max-rows", type=int, default=DEFAULT_MAX_ROWS, help=f"最多返回行数，默认 {DEFAULT_MAX_ROWS}")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS, help="超时秒数，默认 30")
+    parser.add_argument("--threads", type=int, help="DuckDB 线程数（默认全部核心）")
+    parser.add_argument("--output", type=Path, help="结果写出为 CSV（默认打印）")
+    parser.add_argument("--log-level", default="INFO", help="日志级别，默认 INFO")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
+    return parser.parse_args()
+
+
+def run(args: argparse.Namespace) -> None:
+    raw_cfg = load_raw_config(args.config)
+    provider_cfg = build_provider_config(raw_cfg, raw_cfg.get("default_provider", "joinquant"))
+    store = LocalParquetStore(
+        args.base_dir or provider_cfg.base_dir, timezone=provider_cfg.timezone, options=build_storage_config(raw_cfg)
+    )
+    engine = QueryEngine(store, threads=args.threads)
+    query = sys.stdin.read() if args.query == "-" else args.query
+    result = engine.sql(query, max_rows=args.max_rows, timeout=args.timeout)
+    df = result.to_frame()
+    if args.output:
+        df.to_csv(args.output, index=False)
+        print(f"Wrote {len(df)} rows to {args.output}")
+    else:
+        print(df.to_string(index=False))
+    print(f"Rows: {len(df)}{' (truncated at --max-rows)' if result.truncated else ''} elapsed={result.elapsed:.3f}s")
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.profile:
+        enable_profiling()
+    with profile_run("sql_query"):
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
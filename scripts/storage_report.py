@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Ensure project root is on sys.path when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.config import build_provider_config, build_storage_config, load_raw_config
+from core.data.storage import LocalParquetStore
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="统计存储每行字节数：当前文件 vs 按 config 中 storage 选项重写后的估算")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
+    parser.add_argument("--base-dir", type=Path, help="存储目录（默认取 default_provider 的 base_dir）")
+    parser.add_argument("--symbols", help="只统计指定标的，逗号分隔")
+    parser.add_argument("--freq", help="只统计指定频率")
+    parser.add_argument("--sample", type=int, default=50, help="每个频率重编码估算的分区数，默认 50（0 表示全部）")
+    return parser.parse_args()
+
+
+def encoded_size(store: LocalParquetStore, symbol: str, path: Path) -> int:
+    table = store._read_partition(path, symbol)
+    sink = pa.BufferOutputStream()
+    pq.write_table(store.encode(table), sink, **store.options.write_kwargs())
+    return sink.getvalue().size
+
+
+def main() -> None:
+    args = parse_args()
+    raw_cfg = load_raw_config(args.config)
+    provider_cfg = build_provider_config(raw_cfg, raw_cfg.get("default_provider", "joinquant"))
+    store = LocalParquetStore(
+        args.base_dir or provider_cfg.base_dir, timezone=provider_cfg.timezone, options=build_storage_config(raw_cfg)
+    )
+    only = {s.strip() for s in args.symbols.split(",") if s.strip()} if args.symbols else None
+
+    stats = defaultdict(lambda: {"files": 0, "rows": 0, "bytes": 0, "sample_rows": 0, "sample_bytes": 0, "after": 0})
+    for symbol, freq, year, path in store.iter_partitions():
+        if (only is not None and symbol not in only) or (args.freq and freq != args.freq):
+            continue
+        entry = stats[freq]
+        rows = pq.ParquetFile(path).metadata.num_rows
+        size = path.stat().st_size
+        entry["files"] += 1
+        entry["rows"] += rows
+        entry["bytes"] += size
+        if args.sample <= 0 or entry["files"] <= args.sample:
+            entry["sample_rows"] += rows
+            entry["sample_bytes"] += size
+            entry["after"] += encoded_size(store, symbol, path)
+
+    if not stats:
+        print("No partitions found")
+        return
+    opts = store.options
+    print(
+        f"Options: compression={opts.compression} level={opts.compression_level} dictionary={opts.dictionary} "
+        f"drop_partition_columns={opts.drop_partition_columns} price_dtype={opts.price_dtype}"
+    )
+    print(f"{'freq':<6} {'files':>7} {'rows':>14} {'MiB':>10} {'B/row':>8} {'B/row after':>12} {'ratio':>7}")
+    for freq, e in sorted(stats.items()):
+        before = e["bytes"] / e["rows"] if e["rows"] else 0.0
+        sample_before = e["sample_bytes"] / e["sample_rows"] if e["sample_rows"] else 0.0
+        after = e["after"] / e["sample_rows"] if e["sample_rows"] else 0.0
+        ratio = after / sample_before if sample_before else 0.0
+        print(
+            f"{freq:<6} {e['files']:>7} {e['rows']:>14} {e['bytes'] / 2**20:>10.1f} "
+            f"{before:>8.2f} {after:>12.2f} {ratio:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Ensure project root is on sys.path when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.config import build_provider_config, load_raw_config
+from core.data.schema import trade_date_ints
+from core.profiling import enable_profiling, profile_run
+from core.risk.health import PORTFOLIO, HealthConfig, StrategyHealthChecker
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="从收益 CSV 增量更新策略滚动健康度（_health/<strategy>.npz）并输出报告")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
+    parser.add_argument("--base-dir", type=Path, help="存储目录（默认取 default_provider 的 base_dir）")
+    parser.add_argument("--strategy", required=True, help="策略 ID")
+    parser.add_argument("--input", type=Path, help="收益 CSV：trade_date,[symbol],<return-column>,[turnover]；已记录的日期自动跳过")
+    parser.add_argument("--return-column", default="return", help="收益列名，默认 return（topk_portfolio 输出用 net_return）")
+    parser.add_argument("--windows", default="20,60", help="滚动窗口（交易日），逗号分隔，默认 20,60")
+    parser.add_argument("--window", type=int, help="报告使用的窗口，默认最长窗口")
+    parser.add_argument("--limit", type=int, default=50, help="最多输出行数，默认 50")
+    parser.add_argument("--log-level", default="INFO", help="日志级别，默认 INFO")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
+    return parser.parse_args()
+
+
+def run(args: argparse.Namespace) -> None:
+    raw_cfg = load_raw_config(args.config)
+    provider_cfg = build_provider_config(raw_cfg, raw_cfg.get("default_provider", "joinquant"))
+    config = HealthConfig(windows=tuple(int(w) for w in args.windows.split(",") if w.strip()))
+    checker = StrategyHealthChecker.open(args.base_dir or provider_cfg.base_dir, args.strategy, config)
+    if args.input:
+        df = pd.read_csv(args.input)
+        df["trade_date"] = trade_date_ints(pd.to_datetime(df["trade_date"].astype(str), utc=True))
+        df = df.rename(columns={args.return_column: "return"})
+        if "symbol" not in df:
+            df["symbol"] = PORTFOLIO
+        if checker.last_date is not None:
+            df = df[df["trade_date"] > checker.last_date]
+        columns = ["symbol", "return"] + (["turnover"] if "turnover" in df else [])
+        for trade_date, group in df.groupby("trade_date", sort=True):
+            checker.update(trade_date, group[columns])
+        checker.save()
+        print(f"{args.strategy}: recorded {df['trade_date'].nunique()} trade dates, as of {checker.last_date}")
+    report = checker.report(args.window)
+    print(report.drop(columns=["strategy"]).head(args.limit).to_string(index=False))
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.profile:
+        enable_profiling()
+    with profile_run("strategy_health"):
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
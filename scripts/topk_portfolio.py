@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root is on sys.path when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.config import build_provider_config, build_storage_config, load_raw_config
+from core.data.panel import PanelCache
+from core.data.storage import LocalParquetStore
+from core.portfolio.allocator import AllocatorConfig, PortfolioAllocator, momentum_scores
+from core.profiling import enable_profiling, profile_run
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="全市场截面动量 top-K 组合回测（基于日线 panel 缓存，全部交易日向量化计算）")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
+    parser.add_argument("--base-dir", type=Path, help="存储目录（默认取 default_provider 的 base_dir）")
+    parser.add_argument("--start", help="起始日期（默认 panel 全部日期）")
+    parser.add_argument("--end", help="结束日期")
+    parser.add_argument("--lookback", type=int, default=20, help="动量回看交易日数，默认 20")
+    parser.add_argument("--skip", type=int, default=0, help="跳过最近 N 日（如 1 避开短期反转），默认 0")
+    parser.add_argument("--top-k", type=int, default=50, help="持仓数，默认 50")
+    parser.add_argument("--max-weight", type=float, default=0.05, help="单票权重上限，默认 0.05")
+    parser.add_argument("--weighting", default="equal", choices=["equal", "score"], help="加权方式")
+    parser.add_argument("--rebalance-every", type=int, default=1, help="每 N 个交易日调仓，默认 1")
+    parser.add_argument("--min-turnover", type=float, default=0.0, help="过去 20 日平均成交额下限（元），默认不过滤")
+    parser.add_argument("--cost-bps", type=float, default=0.0, help="单边交易成本（基点）")
+    parser.add_argument("--output", type=Path, help="逐日收益/净值/换手写出为 CSV")
+    parser.add_argument("--log-level", default="INFO", help="日志级别，默认 INFO")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
+    return parser.parse_args()
+
+
+def run(args: argparse.Namespace) -> None:
+    raw_cfg = load_raw_config(args.config)
+    provider_cfg = build_provider_config(raw_cfg, raw_cfg.get("default_provider", "joinquant"))
+    store = LocalParquetStore(
+        args.base_dir or provider_cfg.base_dir, timezone=provider_cfg.timezone, options=build_storage_config(raw_cfg)
+    )
+    panel = PanelCache(store).ensure()
+    dates = (args.start or int(panel.dates[0]), args.end or int(panel.dates[-1]))
+    config = AllocatorConfig(
+        top_k=args.top_k,
+        max_weight=args.max_weight,
+        weighting=args.weighting,
+        rebalance_every=args.rebalance_every,
+        min_turnover=args.min_turnover,
+        cost_bps=args.cost_bps,
+    )
+
+    started = time.perf_counter()
+    scores = momentum_scores(panel.values("close", dates), args.lookback, args.skip)
+    result = PortfolioAllocator(config).allocate_panel(panel, scores, dates)
+    elapsed = time.perf_counter() - started
+    frame = result.frame()
+    net = frame["net_return"].to_numpy()
+    equity = frame["equity"].to_numpy()
+    drawdown = (equity / np.maximum.accumulate(equity) - 1).min()
+    print(
+        f"Top-{config.top_k} momentum({args.lookback}) dates={len(frame)} symbols={len(result.symbols)} "
+        f"rebalances={len(result.rebalance_rows)} in {elapsed:.2f}s"
+    )
+    print(
+        f"Total return: {equity[-1] - 1:.2%}  Sharpe: {net.mean() / (net.std(ddof=1) + 1e-12) * 252 ** 0.5:.2f}  "
+        f"Max drawdown: {drawdown:.2%}  Avg turnover: {result.turnover.mean():.2%}"
+    )
+    print("Latest holdings:")
+    print(result.holdings().head(20).to_string())
+    if args.output:
+        frame.to_csv(args.output, index_label="trade_date")
+        print(f"Wrote {len(frame)} rows to {args.output}")
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.profile:
+        enable_profiling()
+    with profile_run("topk_portfolio"):
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
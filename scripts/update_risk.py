@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.data.config import build_provider_config, build_storage_config, load_raw_config
+from core.data.storage import LocalParquetStore
+from core.profiling import enable_profiling, profile_run
+from core.risk.exposure import RiskConfig, RiskModel
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="增量更新 EWMA 协方差风险模型（_risk/<name>/），可附带查询组合风险")
+    parser.add_argument("--config", type=Path, default=Path("config/data.yaml"), help="配置文件路径")
+    parser.add_argument("--base-dir", type=Path, help="存储目录（默认取 default_provider 的 base_dir）")
+    parser.add_argument("--halflife", type=float, default=60.0, help="EWMA 半衰期（交易日），默认 60")
+    parser.add_argument("--min-periods", type=int, default=20, help="单个标的最少有效收益数，默认 20")
+    parser.add_argument("--rebuild", action="store_true", help="忽略已有状态，按 panel 全历史重算（数据回补后使用）")
+    parser.add_argument("--skip-update", action="store_true", help="不更新，只查询当前状态")
+    parser.add_argument("--basket", help="查询组合风险：逗号分隔 symbol[:weight]，未给权重时等权")
+    parser.add_argument("--threshold", type=float, default=0.6, help="相关性聚类阈值，默认 0.6")
+    parser.add_argument("--log-level", default="INFO", help="日志级别，默认 INFO")
+    parser.add_argument("--profile", action="store_true", help="采集 cProfile/内存峰值到 logs/profile（也可设 QUANT_PROFILE=1）")
+    return parser.parse_args()
+
+
+def parse_basket(text: str) -> dict:
+    items = [item.strip() for item in text.split(",") if item.strip()]
+    weights = {}
+    for item in items:
+        symbol, _, weight = item.partition(":")
+        weights[symbol.strip()] = float(weight) if weight else 1.0 / len(items)
+    return weights
+
+
+def run(args: argparse.Namespace) -> None:
+    raw_cfg = load_raw_config(args.config)
+    provider_cfg = build_provider_config(raw_cfg, raw_cfg.get("default_provider", "joinquant"))
+    store = LocalParquetStore(
+        args.base_dir or provider_cfg.base_dir, timezone=provider_cfg.timezone, options=build_storage_config(raw_cfg)
+    )
+    model = RiskModel(store, RiskConfig(halflife=args.halflife, min_periods=args.min_periods))
+    if not args.skip_update:
+        state = model.update(rebuild=args.rebuild)
+        print(f"Risk model {model.name}: as_of={state.last_date} symbols={len(state.symbols)} days={state.days}")
+    if args.basket:
+        report = model.exposure().basket_report(parse_basket(args.basket), threshold=args.threshold)
+        print(json.dumps(report, ensure_ascii=False, indent=2, default=float))
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.profile:
+        enable_profiling()
+    with profile_run("update_risk"):
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
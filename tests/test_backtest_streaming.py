@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.backtest.streaming import StreamingMomentumBacktester, backtest_symbols
+from core.data.sessions import SessionSchedule
+from core.data.storage import LocalParquetStore
+from core.strategies.momentum import MomentumConfig, SimpleMomentumBacktester
+
+SYMBOL = "600000.XSHG"
+CONFIG = MomentumConfig(short_window=5, long_window=20, annual_trading_days=252 * 240)
+
+
+def minute_bars(start: str, days: int, seed: int = 0) -> pd.DataFrame:
+    schedule = SessionSchedule()
+    trade_days = pd.bdate_range(start, periods=days)
+    local = (trade_days.values[:, None] + schedule.bar_offsets("1m").values[None, :]).ravel()
+    timestamps = pd.DatetimeIndex(local).tz_localize(schedule.timezone).tz_convert("UTC")
+    rng = np.random.default_rng(seed)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.002, len(timestamps))))
+    return pd.DataFrame(
+        {
+            "symbol": SYMBOL,
+            "timestamp": timestamps,
+            "open": close,
+            "high": close,
+            "low": close,
+            "close": close,
+            "volume": 100,
+            "turnover": close * 100,
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def stored(tmp_path_factory):
+    # 跨年：流式读取要跨越年分区边界
+    frame = minute_bars("2023-12-20", 12)
+    store = LocalParquetStore(tmp_path_factory.mktemp("store"))
+    store.upsert(SYMBOL, "1m", frame)
+    return store, frame
+
+
+def in_memory(frame: pd.DataFrame) -> dict:
+    return SimpleMomentumBacktester(frame[["timestamp", "close"]].reset_index(drop=True), CONFIG).performance()
+
+
+@pytest.mark.parametrize("batch_rows", [37, 500, 1000, 10**6])
+def test_streaming_matches_in_memory(stored, batch_rows):
+    store, frame = stored
+    streamed = StreamingMomentumBacktester(store, SYMBOL, "1m", CONFIG, batch_rows=batch_rows).performance()
+    expected = in_memory(frame)
+    assert streamed.keys() == expected.keys()
+    for name, value in expected.items():
+        assert streamed[name] == pytest.approx(value, rel=1e-9, abs=1e-12), name
+    assert np.isfinite(streamed["cagr"])
+
+
+class WindowedBacktester(SimpleMomentumBacktester):
+    """In-memory reference: features over the full history, metrics over ``[start, end]`` only."""
+
+    def __init__(self, data, config, start, end):
+        super().__init__(data, config)
+        self.start, self.end = start.tz_localize("UTC"), end.tz_localize("UTC")
+
+    def prepare_features(self):
+        df = super().prepare_features()
+        return df[(df["timestamp"] >= self.start) & (df["timestamp"] <= self.end)]
+
+
+@pytest.mark.parametrize(
+    "start, end",
+    [
+        (pd.Timestamp("2023-12-27"), pd.Timestamp("2024-01-03 12:00")),
+        # 窗口从 2024 年第一根 bar 开始：预热行来自上一年分区
+        (pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-02 12:00")),
+        # 窗口早于全部数据：没有预热行
+        (pd.Timestamp("2023-01-01"), pd.Timestamp("2023-12-21")),
+    ],
+)
+def test_streaming_window_matches_in_memory_with_warmup(stored, start, end):
+    store, frame = stored
+    streamed = StreamingMomentumBacktester(store, SYMBOL, "1m", CONFIG, start, end, batch_rows=300).performance()
+    reference = WindowedBacktester(frame[["timestamp", "close"]].reset_index(drop=True), CONFIG, start, end)
+    expected = reference.performance()
+    for name, value in expected.items():
+        assert streamed[name] == pytest.approx(value, rel=1e-9, abs=1e-12), name
+
+
+def test_window_skips_partitions_and_row_groups_outside_it(tmp_path, monkeypatch):
+    import core.data.tables as tables
+
+    store = LocalParquetStore(tmp_path)
+    frame = minute_bars("2023-12-20", 12)
+    store.upsert(SYMBOL, "1m", frame)
+    store.compact_partition(SYMBOL, "1m", 2024, row_group_size=240)
+    opened, groups = [], []
+    read_batches, row_groups = tables.read_batches, tables._row_groups_in_window
+
+    def spy_read(path, *args, **kwargs):
+        opened.append(path.parent.name)
+        return read_batches(path, *args, **kwargs)
+
+    def spy_groups(parquet, start, end):
+        selected = row_groups(parquet, start, end)
+        groups.append((parquet.metadata.num_row_groups, selected))
+        return selected
+
+    monkeypatch.setattr("core.data.storage.read_batches", spy_read)
+    monkeypatch.setattr(tables, "_row_groups_in_window", spy_groups)
+    start, end = pd.Timestamp("2024-01-03"), pd.Timestamp("2024-01-03 23:59")
+    tester = StreamingMomentumBacktester(store, SYMBOL, "1m", CONFIG, start, end, batch_rows=100)
+    assert tester.run().count == 240
+    # 预热行取自 2024-01-02，2023 年分区不打开；每天一个行组，只读窗口及预热涉及的行组
+    assert set(opened) == {"year=2024"}
+    assert groups and all(len(selected) < total for total, selected in groups)
+
+
+def test_short_minute_span_does_not_overflow(tmp_path):
+    store = LocalParquetStore(tmp_path)
+    frame = minute_bars("2024-03-01", 1, seed=3)
+    frame["close"] = np.linspace(10, 30, len(frame))  # 一天内大幅上涨
+    store.upsert(SYMBOL, "1m", frame)
+    report = backtest_symbols(store, [SYMBOL], "1m", CONFIG, workers=1)
+    assert report.loc[0, "error"] == ""
+    assert not np.isnan(report.loc[0, "cagr"])
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from core.data.coverage import CoverageIndex
+from core.data.fetcher import MarketFetcher
+from core.data.provider import LimitsConfig, ProviderConfig, RetryConfig, ThrottleConfig
+from core.data.providers.replay import ReplayProvider
+from core.data.sessions import SessionSchedule
+from core.data.storage import LocalParquetStore
+
+SYMBOL = "SIM000001.XSHE"
+START = pd.Timestamp("2024-01-02")
+END = pd.Timestamp("2024-01-22")  # 15 个交易日，1m 共 3600 根 bar
+BARS_PER_DAY = 240
+
+
+def make_fetcher(base_dir, row_limit: int, max_rows_per_call: int = 0) -> MarketFetcher:
+    config = ProviderConfig(
+        base_dir=base_dir / "replay",
+        throttle=ThrottleConfig(max_per_minute=0),
+        retry=RetryConfig(max_attempts=1, backoff_seconds=0.0),
+        limits=LimitsConfig(max_rows_per_call=max_rows_per_call),
+        options={"simulation": {"source": "synthetic", "synthetic_symbols": 2, "row_limit": row_limit}},
+    )
+    store = LocalParquetStore(base_dir / "store", timezone=config.timezone)
+    return MarketFetcher(ReplayProvider(config), store)
+
+
+def stored_bars(fetcher: MarketFetcher) -> int:
+    return len(fetcher.store.load(SYMBOL, "1m"))
+
+
+def test_silently_truncating_provider_is_completed_on_rerun(tmp_path):
+    # 行数上限未配置（0），provider 却每次只返回 500 行
+    fetcher = make_fetcher(tmp_path, row_limit=500)
+    for _ in range(5):
+        result = fetcher.fetch_symbol(SYMBOL, START, END, freq="1m")
+        assert result.error is None
+        if result.skipped:
+            break
+    assert stored_bars(fetcher) == 15 * BARS_PER_DAY
+    coverage = fetcher.coverage(SYMBOL, "1m")
+    assert coverage.incomplete_days(fetcher.trade_days(START, END)) == []
+
+
+def test_short_response_does_not_finalize_trailing_days(tmp_path):
+    schedule = SessionSchedule()
+    coverage = CoverageIndex(tmp_path, SYMBOL, "1m", schedule)
+    days = pd.DatetimeIndex(["2024-01-02", "2024-01-03", "2024-01-04"], tz="UTC")
+    offsets = schedule.bar_offsets("1m")
+    # 第一天完整、第二天只到上午 10:00
+    local = [days[0].tz_localize(None) + o for o in offsets]
+    local += [days[1].tz_localize(None) + o for o in offsets[:30]]
+    bars = pd.DatetimeIndex(local).tz_localize(schedule.timezone).tz_convert("UTC")
+    coverage.add(bars, fetched_days=list(days), now=pd.Timestamp("2024-02-01", tz="UTC"))
+
+    assert coverage.is_final(days[0])
+    assert not coverage.is_final(days[1])
+    assert not coverage.is_final(days[2])
+    assert coverage.incomplete_days(days) == list(days[1:])
+
+
+@pytest.mark.parametrize("bars", [[], None])
+def test_empty_response_does_not_finalize(tmp_path, bars):
+    coverage = CoverageIndex(tmp_path, SYMBOL, "1m", SessionSchedule())
+    day = pd.Timestamp("2024-01-02", tz="UTC")
+    timestamps = pd.DatetimeIndex([], tz="UTC") if bars is None else bars
+    coverage.add(timestamps, fetched_days=[day], now=pd.Timestamp("2024-02-01", tz="UTC"))
+    assert not coverage.is_final(day)
+    assert coverage.incomplete_days([day]) == [day]
+
+
+def test_suspended_day_inside_response_is_finalized(tmp_path):
+    schedule = SessionSchedule()
+    coverage = CoverageIndex(tmp_path, SYMBOL, "1m", schedule)
+    days = pd.DatetimeIndex(["2024-01-02", "2024-01-03", "2024-01-04"], tz="UTC")
+    offsets = schedule.bar_offsets("1m")
+    # 中间一天停牌，其后一天有完整数据：停牌日可以认定为 final
+    local = [d.tz_localize(None) + o for d in (days[0], days[2]) for o in offsets]
+    bars = pd.DatetimeIndex(local).tz_localize(schedule.timezone).tz_convert("UTC")
+    coverage.add(bars, fetched_days=list(days), now=pd.Timestamp("2024-02-01", tz="UTC"))
+    assert coverage.is_final(days[1])
+    assert coverage.incomplete_days(days) == []
+
+
+def test_short_response_is_refetched_within_the_same_run(tmp_path):
+    fetcher = make_fetcher(tmp_path, row_limit=500)
+    result = fetcher.fetch_symbol(SYMBOL, START, END, freq="1m")
+    assert result.error is None
+    assert stored_bars(fetcher) == 15 * BARS_PER_DAY
+    chunker = fetcher.chunker("1m")
+    assert chunker.stats.truncations > 0
+    assert chunker.next_size() * BARS_PER_DAY <= 500
+    rerun = fetcher.fetch_symbol(SYMBOL, START, END, freq="1m")
+    assert rerun.skipped and fetcher.provider.stats.truncated == chunker.stats.truncations
+
+
+def test_complete_responses_make_no_extra_requests(tmp_path):
+    fetcher = make_fetcher(tmp_path, row_limit=0)
+    result = fetcher.fetch_symbol(SYMBOL, START, END, freq="1m")
+    assert result.error is None and stored_bars(fetcher) == 15 * BARS_PER_DAY
+    assert result.missing_ranges == 5  # 未知上限时分钟线每片 3 个交易日
+    assert fetcher.chunker("1m").stats.truncations == 0
+
+    daily = make_fetcher(tmp_path / "daily", row_limit=0)
+    result = daily.fetch_symbol(SYMBOL, START, END, freq="1d")
+    assert result.error is None and result.missing_ranges == 1 and result.fetched_rows == 15
+
+
+def test_trailing_suspension_is_not_requested_again(tmp_path):
+    # fixtures 数据止于 2024-01-10（之后停牌/退市），请求区间到 01-22
+    synthetic = make_fetcher(tmp_path / "synthetic", row_limit=0).provider
+    frame = synthetic.get_price(SYMBOL, START.to_pydatetime(), pd.Timestamp("2024-01-10 15:00").to_pydatetime(), freq="1m")
+    fixtures = LocalParquetStore(tmp_path / "fixtures")
+    fixtures.upsert(SYMBOL, "1m", frame)
+
+    config = ProviderConfig(
+        base_dir=tmp_path / "replay",
+        throttle=ThrottleConfig(max_per_minute=0),
+        retry=RetryConfig(max_attempts=1, backoff_seconds=0.0),
+        options={"simulation": {"source": "fixtures", "fixtures_dir": str(tmp_path / "fixtures")}},
+    )
+    provider = ReplayProvider(config)
+    fetcher = MarketFetcher(provider, LocalParquetStore(tmp_path / "store", timezone=config.timezone))
+    first = fetcher.fetch_symbol(SYMBOL, START, END, freq="1m")
+    assert first.error is None and stored_bars(fetcher) == 7 * BARS_PER_DAY
+    calls = provider.stats.calls
+
+    second = fetcher.fetch_symbol(SYMBOL, START, END, freq="1m")
+    assert second.skipped
+    assert provider.stats.calls == calls
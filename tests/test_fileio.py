@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import gc
+import threading
+import time
+
+from core.data import fileio
+from core.data.fileio import file_lock
+
+
+def test_thread_locks_are_released_after_use(tmp_path):
+    for i in range(200):
+        with file_lock(tmp_path / f"part{i}.parquet"):
+            pass
+    gc.collect()
+    assert len(fileio._thread_locks) == 0
+
+
+def test_file_lock_serialises_threads(tmp_path):
+    target = tmp_path / "data.parquet"
+    inside = []
+    overlaps = []
+
+    def work() -> None:
+        for _ in range(20):
+            with file_lock(target):
+                inside.append(1)
+                if len(inside) > 1:
+                    overlaps.append(len(inside))
+                time.sleep(0.0005)
+                inside.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlaps == []
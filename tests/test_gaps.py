@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from core.data.gaps import GAP_COLUMNS, GapScanner
+from core.data.storage import LocalParquetStore
+
+DAYS = pd.bdate_range("2024-01-02", periods=10)
+
+
+def daily(symbol: str, days: pd.DatetimeIndex) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "symbol": symbol,
+            "timestamp": days.tz_localize("UTC"),
+            "open": 1.0,
+            "high": 1.0,
+            "low": 1.0,
+            "close": 1.0,
+            "volume": 100,
+            "turnover": 100.0,
+        }
+    )
+
+
+def test_scan_reports_failed_symbols(tmp_path):
+    store = LocalParquetStore(tmp_path)
+    store.upsert("000001.XSHE", "1d", daily("000001.XSHE", DAYS.delete([3, 4])))
+    store.upsert("000002.XSHE", "1d", daily("000002.XSHE", DAYS))
+    store.upsert("000003.XSHE", "1d", daily("000003.XSHE", DAYS))
+    for path in store.partitions("000003.XSHE", "1d"):
+        path.write_bytes(b"not a parquet file")
+
+    report = GapScanner(store, DAYS).scan(freq="1d", workers=2)
+    assert list(report.columns) == GAP_COLUMNS
+    gaps = report[report["error"] == ""]
+    assert gaps["symbol"].tolist() == ["000001.XSHE"]
+    assert gaps.iloc[0]["trade_days"] == 2
+    failed = report[report["error"] != ""]
+    assert failed["symbol"].tolist() == ["000003.XSHE"]
+    assert failed.iloc[0]["bars"] == 0
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from core.data.loaders import CSVPriceLoader
+
+HEADER = "code,name,time_key,open,close,high,low,volume,turnover\n"
+
+
+def write_csv(path, rows: int, dirty_row=None) -> None:
+    rng = np.random.default_rng(0)
+    times = pd.date_range("2020-01-01", periods=rows, freq="D")[::-1]
+    lines = [HEADER]
+    for i, ts in enumerate(times):
+        price = f"{10 + rng.random():.4f}"
+        volume = "n/a?" if i == dirty_row else str(int(rng.integers(1, 10**9)))
+        lines.append(f"HK.09988,ali,{ts:%Y-%m-%d %H:%M:%S},{price},{price},{price},{price},{volume},{rng.random() * 1e9:.1f}\n")
+    path.write_text("".join(lines), encoding="utf-8")
+
+
+def pandas_reference(path) -> pd.DataFrame:
+    df = pd.read_csv(path).rename(columns={"time_key": "timestamp"})
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+    for col in ["open", "close", "high", "low", "volume", "turnover"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df.sort_values("timestamp").reset_index(drop=True)
+
+
+def test_load_matches_pandas_and_keeps_integer_volume(tmp_path):
+    path = tmp_path / "prices.csv"
+    write_csv(path, 500)
+    loaded = CSVPriceLoader(str(path)).load_table()
+    assert loaded.schema.field("volume").type == pa.int64()
+    expected = pandas_reference(path)
+    pd.testing.assert_frame_equal(loaded.to_pandas(), expected, check_dtype=False)
+    assert loaded.to_pandas()["volume"].dtype == np.int64
+    # 默认不写 sidecar
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["prices.csv"]
+
+
+def test_sidecar_is_opt_in_and_written_to_sidecar_dir(tmp_path):
+    path = tmp_path / "prices.csv"
+    write_csv(path, 50)
+    cache = tmp_path / "cache"
+    loader = CSVPriceLoader(str(path), sidecar=True, sidecar_dir=cache)
+    first = loader.load_table()
+    assert loader.sidecar_path().exists() and loader.sidecar_path().parent == cache
+    assert loader.load_table().equals(first)
+
+
+def test_iter_tables_falls_back_on_dirty_values(tmp_path):
+    path = tmp_path / "prices.csv"
+    write_csv(path, 3000, dirty_row=2500)
+    loader = CSVPriceLoader(str(path), block_size=16 << 10)
+    blocks = list(loader.iter_tables())
+    assert len(blocks) > 2
+    streamed = pa.concat_tables(blocks).to_pandas().sort_values("timestamp").reset_index(drop=True)
+    loaded = loader.load_table().to_pandas()
+    pd.testing.assert_frame_equal(streamed, loaded)
+    assert loaded["volume"].isna().sum() == 1
+    pd.testing.assert_frame_equal(loaded, pandas_reference(path), check_dtype=False)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.portfolio.allocator import AllocatorConfig, PortfolioAllocator, cap_weights, momentum_scores
+
+T, N = 80, 25
+
+
+@pytest.fixture(scope="module")
+def market():
+    rng = np.random.default_rng(0)
+    close = np.cumprod(1 + rng.normal(0, 0.02, (T, N)), axis=0) * 10
+    close[rng.random((T, N)) < 0.03] = np.nan
+    volume = rng.integers(0, 5, (T, N)).astype(float)
+    turnover = rng.random((T, N)) * 100
+    dates = pd.bdate_range("2021-01-04", periods=T).strftime("%Y%m%d").astype(int).to_numpy()
+    return close, volume, turnover, dates
+
+
+def naive_cap(weights: np.ndarray, cap: float) -> np.ndarray:
+    weights = weights.copy()
+    while (weights > cap + 1e-12).any():
+        excess = np.clip(weights - cap, 0, None).sum()
+        weights = np.minimum(weights, cap)
+        room = (weights > 0) & (weights < cap)
+        if not room.any():
+            break
+        weights[room] += excess * weights[room] / weights[room].sum()
+    return weights
+
+
+def naive_allocation(config: AllocatorConfig, scores, close, volume, turnover):
+    """Day-by-day simulation with pandas rolling filters and explicit holdings."""
+    avg_turnover = pd.DataFrame(np.nan_to_num(turnover)).rolling(config.liquidity_window, min_periods=1).mean().to_numpy()
+    filled = pd.DataFrame(close).ffill().to_numpy()
+    positions = np.zeros(N)
+    cash = 1.0
+    gross, net, trades, targets = [0.0], [0.0], [], []
+    for t in range(T):
+        if t > 0:
+            before = cash + positions.sum()
+            ratio = filled[t] / filled[t - 1]
+            positions = positions * np.where(np.isfinite(ratio), ratio, 1.0)
+            day = (cash + positions.sum()) / before - 1
+            gross.append(day)
+            net.append(day)
+        if t % config.rebalance_every:
+            continue
+        ok = np.isfinite(close[t]) & (np.nan_to_num(volume[t]) > 0) & np.isfinite(scores[t])
+        if config.min_turnover > 0:
+            ok &= avg_turnover[t] >= config.min_turnover
+        candidates = [i for i in np.argsort(-np.where(ok, scores[t], -np.inf), kind="stable") if ok[i]][: config.top_k]
+        raw = np.zeros(N)
+        if candidates:
+            positive = np.clip(scores[t, candidates], 0, None)
+            if config.weighting == "score" and positive.sum() > 0:
+                raw[candidates] = positive / positive.sum()
+            else:
+                raw[candidates] = 1 / len(candidates)
+        target = naive_cap(raw, config.max_weight)
+        value = cash + positions.sum()
+        traded = np.abs(target - positions / value).sum()
+        trades.append(traded / 2)
+        net[-1] -= traded * config.cost_bps * 1e-4
+        positions, cash = target.copy(), 1 - target.sum()
+        targets.append(target)
+    return np.array(targets), np.array(gross), np.array(net), np.array(trades)
+
+
+def test_momentum_scores_match_pandas(market):
+    close = market[0]
+    expected = pd.DataFrame(close).shift(2) / pd.DataFrame(close).shift(10) - 1
+    np.testing.assert_allclose(momentum_scores(close, 10, skip=2), expected.to_numpy(), equal_nan=True)
+
+
+def test_cap_weights_matches_iterative_reference():
+    rng = np.random.default_rng(1)
+    raw = rng.random((50, 12)) ** 4
+    raw[rng.random(raw.shape) < 0.3] = 0
+    raw /= raw.sum(axis=1, keepdims=True)
+    capped = cap_weights(raw, 0.2)
+    expected = np.stack([naive_cap(row, 0.2) for row in raw])
+    np.testing.assert_allclose(capped, expected, atol=1e-12)
+    assert capped.max() <= 0.2 + 1e-12
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        AllocatorConfig(top_k=5, max_weight=0.3, weighting="score", rebalance_every=3, min_turnover=30, liquidity_window=4, cost_bps=10),
+        AllocatorConfig(top_k=8, max_weight=0.1, rebalance_every=1, cost_bps=5),
+        AllocatorConfig(top_k=3, max_weight=0.5, weighting="score", rebalance_every=7),
+    ],
+)
+def test_allocate_matches_daily_loop(market, config):
+    close, volume, turnover, dates = market
+    scores = momentum_scores(close, 5)
+    result = PortfolioAllocator(config).allocate(scores, close, dates, [f"S{i}" for i in range(N)], volume, turnover)
+    targets, gross, net, trades = naive_allocation(config, scores, close, volume, turnover)
+    np.testing.assert_allclose(result.weights, targets, atol=1e-12)
+    np.testing.assert_allclose(result.gross_returns, gross, atol=1e-12)
+    np.testing.assert_allclose(result.net_returns, net, atol=1e-12)
+    np.testing.assert_allclose(result.turnover, trades, atol=1e-12)
+    frame = result.frame()
+    assert frame["equity"].iloc[-1] == pytest.approx(np.prod(1 + net))
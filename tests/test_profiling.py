@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import core.profiling as profiling
+from core.profiling import profile_run
+
+
+def test_same_second_runs_write_separate_files(tmp_path, monkeypatch):
+    monkeypatch.setenv(profiling.DIR_ENV_VAR, str(tmp_path))
+
+    class FrozenClock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2024, 1, 2, 9, 30, 0, 123456)
+
+    # 同一时间戳（精确到微秒）的两次调用仍各自落盘
+    monkeypatch.setattr(profiling, "datetime", FrozenClock)
+    for _ in range(2):
+        with profile_run("tool", enabled=True):
+            sum(range(1000))
+    assert len(list(tmp_path.glob("tool-20240102-093000-123456-*.prof"))) == 2
+    assert len(list(tmp_path.glob("tool-*.mem.json"))) == 2
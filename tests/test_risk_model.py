@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.data.panel import PanelCache
+from core.data.storage import LocalParquetStore
+from core.risk.exposure import EWMAState, RiskConfig, RiskExposure, RiskModel
+
+CONFIG = RiskConfig(halflife=20, min_periods=20)
+
+
+def naive_ewma(returns: np.ndarray, decay: float):
+    """Row-by-row rank-one recursion with pairwise-complete observations."""
+    n = returns.shape[1]
+    mean_num, mean_den = np.zeros(n), np.zeros(n)
+    cov_num, cov_den = np.zeros((n, n)), np.zeros((n, n))
+    for row in returns:
+        observed = np.isfinite(row)
+        has_mean = observed & (mean_den > 0)
+        prior = np.divide(mean_num, mean_den, out=np.zeros(n), where=mean_den > 0)
+        d = np.where(has_mean, row - prior, 0.0)
+        cov_num = decay * cov_num + (1 - decay) * np.outer(d, d)
+        cov_den = decay * cov_den + (1 - decay) * np.outer(has_mean, has_mean)
+        mean_num = decay * mean_num + (1 - decay) * np.where(observed, row, 0.0)
+        mean_den = decay * mean_den + (1 - decay) * observed
+    return mean_num / mean_den, cov_num / cov_den
+
+
+@pytest.fixture(scope="module")
+def returns():
+    rng = np.random.default_rng(0)
+    factor = rng.normal(0, 0.01, (300, 1))
+    values = factor + rng.normal(0, 0.02, (300, 12))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[:60, 0] = np.nan  # 晚上市
+    return values
+
+
+def test_block_update_matches_rank_one_recursion(returns):
+    state = EWMAState.empty([f"S{i}" for i in range(returns.shape[1])])
+    for begin, end in [(0, 100), (100, 101), (101, 300)]:
+        state.update(returns[begin:end], CONFIG.decay)
+    mean, cov = naive_ewma(returns, CONFIG.decay)
+    np.testing.assert_allclose(state.mean(), mean, rtol=1e-12)
+    # cov_den 为 float32
+    np.testing.assert_allclose(state.covariance(np.arange(returns.shape[1]), 2), cov, rtol=1e-5)
+
+
+def test_mean_matches_pandas_ewm(returns):
+    state = EWMAState.empty([f"S{i}" for i in range(returns.shape[1])])
+    state.update(returns, CONFIG.decay)
+    expected = pd.DataFrame(returns).ewm(halflife=CONFIG.halflife, adjust=True, ignore_na=False).mean().iloc[-1]
+    np.testing.assert_allclose(state.mean(), expected.to_numpy(), rtol=1e-10)
+
+
+def test_portfolio_volatility_matches_dense_formula(returns):
+    state = EWMAState.empty([f"S{i}" for i in range(returns.shape[1])])
+    state.update(returns, CONFIG.decay)
+    exposure = RiskExposure(state, CONFIG)
+    symbols = [f"S{i}" for i in range(1, 8)]
+    weights = pd.Series(np.linspace(1, 2, len(symbols)), index=symbols)
+    weights /= weights.sum()
+    cov = exposure.covariance(symbols).to_numpy()
+    expected = float(np.sqrt(weights.to_numpy() @ cov @ weights.to_numpy()))
+    assert exposure.portfolio_volatility(weights.to_dict()) == pytest.approx(expected, rel=1e-10)
+    contributions = exposure.risk_contributions(weights.to_dict())["contribution"]
+    assert contributions.sum() == pytest.approx(expected, rel=1e-10)
+
+
+def daily_bars(symbols, dates, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i, symbol in enumerate(symbols):
+        close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+        frames.append(
+            pd.DataFrame(
+                {
+                    "symbol": symbol,
+                    "timestamp": dates.tz_localize("UTC"),
+                    "open": close,
+                    "high": close,
+                    "low": close,
+                    "close": close,
+                    "volume": 1000 + i,
+                    "turnover": close * 1000,
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_incremental_update_matches_rebuild(tmp_path):
+    store = LocalParquetStore(tmp_path)
+    dates = pd.bdate_range("2022-01-03", periods=180)
+    first, later = dates[:120], dates[120:]
+    symbols = ["000001.XSHE", "000002.XSHE", "600000.XSHG", "600036.XSHG"]
+    history = daily_bars(symbols, dates, seed=1)
+    for symbol, frame in history[history["timestamp"] <= first[-1].tz_localize("UTC")].groupby("symbol"):
+        store.upsert(symbol, "1d", frame)
+    model = RiskModel(store, CONFIG)
+    model.update(PanelCache(store).ensure())
+
+    for symbol, frame in history[history["timestamp"] > first[-1].tz_localize("UTC")].groupby("symbol"):
+        store.upsert(symbol, "1d", frame)
+    # 中途新增一个标的
+    store.upsert("300750.XSHE", "1d", daily_bars(["300750.XSHE"], later, seed=2))
+    panel = PanelCache(store).ensure()
+    incremental = model.update(panel)
+    rebuilt = RiskModel(store, CONFIG, name="rebuild").update(panel, rebuild=True)
+
+    assert incremental.last_date == rebuilt.last_date == int(later[-1].strftime("%Y%m%d"))
+    index = incremental.positions(rebuilt.symbols)
+    np.testing.assert_allclose(incremental.mean()[index], rebuilt.mean(), rtol=1e-12)
+    np.testing.assert_allclose(
+        incremental.covariance(index, 2), rebuilt.covariance(np.arange(len(rebuilt.symbols)), 2), rtol=1e-6, equal_nan=True
+    )
+    np.testing.assert_array_equal(np.asarray(incremental.counts)[index], rebuilt.counts)
+    reloaded = model.load()
+    np.testing.assert_allclose(np.asarray(reloaded.cov_num), incremental.cov_num)
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.backtest.significance import SignificanceTester, batch_metrics
+from core.strategies.momentum import SimpleMomentumBacktester
+
+
+def naive_metrics(returns: np.ndarray, annual_periods: int, days: float) -> dict:
+    series = pd.Series(returns)
+    equity = (1 + series).cumprod()
+    total_return = equity.iloc[-1] - 1
+    volatility = series.std() * annual_periods**0.5
+    return {
+        "sharpe": series.mean() * annual_periods / (volatility + 1e-8),
+        "cagr": (1 + total_return) ** (365.25 / days) - 1,
+        "max_drawdown": ((equity - equity.cummax()) / equity.cummax()).min(),
+    }
+
+
+def test_batch_metrics_match_per_row_reference():
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0.0005, 0.02, size=(7, 300))
+    metrics = batch_metrics(returns, 252, days=430.0)
+    for i, row in enumerate(returns):
+        expected = naive_metrics(row, 252, 430.0)
+        for name, value in expected.items():
+            assert metrics[name][i] == pytest.approx(value, rel=1e-10), name
+
+
+def test_bootstrap_cagr_interval_is_bounded():
+    # 约 5 年日线：年化按日历跨度，区间不应随收益条数爆炸
+    rng = np.random.default_rng(2)
+    returns = rng.normal(0.0002, 0.025, size=1300)
+    tester = SignificanceTester(returns, days=5 * 365.25, seed=0)
+    report = tester.report(samples=500)
+    total_return = np.prod(1 + returns) - 1
+    assert report.observed["cagr"] == pytest.approx((1 + total_return) ** 0.2 - 1)
+    low, high = report.intervals["cagr"]
+    assert -1 < low < report.observed["cagr"] < high < 1
+
+
+def test_observed_metrics_match_backtester_performance():
+    rng = np.random.default_rng(4)
+    frame = pd.DataFrame(
+        {
+            "timestamp": pd.date_range("2019-01-01", periods=800, freq="B", tz="UTC"),
+            "close": 50 * np.exp(np.cumsum(rng.normal(0, 0.02, 800))),
+        }
+    )
+    backtester = SimpleMomentumBacktester(frame)
+    performance = backtester.performance()
+    observed = SignificanceTester.from_backtester(backtester).observed()
+    for name, value in observed.items():
+        assert performance[name] == pytest.approx(value, rel=1e-10), name
+    assert -1 < performance["cagr"] < 1
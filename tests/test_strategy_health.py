@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.risk.health import HealthConfig, StrategyHealthChecker, record_returns
+
+T, K = 400, 6
+WINDOWS = (20, 60)
+SYMBOLS = [f"x{i}" for i in range(K)]
+DATES = [int(d.strftime("%Y%m%d")) for d in pd.bdate_range("2020-01-01", periods=T)]
+
+
+@pytest.fixture(scope="module")
+def history():
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0.0005, 0.02, (T, K))
+    returns[rng.random((T, K)) < 0.1] = np.nan
+    returns[:150, 5] = np.nan  # 晚出现的序列
+    turnover = rng.random((T, K))
+    return pd.DataFrame(returns, columns=SYMBOLS), pd.DataFrame(turnover, columns=SYMBOLS)
+
+
+def feed(checker: StrategyHealthChecker, returns: pd.DataFrame, turnover: pd.DataFrame, rows: range) -> None:
+    for t in rows:
+        keys = SYMBOLS if t >= 150 else SYMBOLS[:5]
+        checker.update(
+            DATES[t],
+            pd.DataFrame({"symbol": keys, "return": returns.iloc[t][keys].to_numpy(), "turnover": turnover.iloc[t][keys].to_numpy()}),
+        )
+
+
+def pandas_reference(returns: pd.DataFrame, turnover: pd.DataFrame, window: int, annual: int = 252) -> pd.DataFrame:
+    rolling = returns.rolling(window, min_periods=1)
+    count = rolling.count()
+    std = returns.rolling(window, min_periods=2).std()
+    volatility = std * annual**0.5
+    log_equity = np.log1p(returns.fillna(0)).cumsum()
+    equity = np.exp(log_equity)
+    return pd.DataFrame(
+        {
+            "observations": count.iloc[-1],
+            "sharpe": (rolling.mean() * annual / (volatility + 1e-8)).where(count >= 2).iloc[-1],
+            "volatility": volatility.where(count >= 2).iloc[-1],
+            "window_return": np.expm1(np.log1p(returns).rolling(window, min_periods=1).sum()).iloc[-1],
+            "drawdown": np.expm1(log_equity.iloc[-1] - log_equity.iloc[-window:].max()),
+            "turnover": turnover.iloc[-window:].mean(),
+            "max_drawdown": (equity / equity.cummax().clip(lower=1) - 1).min(),
+        }
+    )
+
+
+@pytest.mark.parametrize("stop", [37, 150, 211, 400])
+def test_rolling_metrics_match_pandas(history, stop):
+    returns, turnover = history
+    checker = StrategyHealthChecker("s1", HealthConfig(windows=WINDOWS))
+    feed(checker, returns, turnover, range(stop))
+    present = SYMBOLS if stop > 150 else SYMBOLS[:5]
+    for window in WINDOWS:
+        report = checker.report(window).set_index("symbol")
+        expected = pandas_reference(returns.iloc[:stop][present], turnover.iloc[:stop][present], window)
+        for column in expected.columns:
+            np.testing.assert_allclose(
+                report.loc[present, column].to_numpy(dtype=np.float64),
+                expected[column].to_numpy(dtype=np.float64),
+                rtol=1e-9,
+                atol=1e-12,
+                err_msg=f"{column} window={window} stop={stop}",
+            )
+
+
+def test_persisted_state_resumes_exactly(tmp_path, history):
+    returns, turnover = history
+    straight = StrategyHealthChecker("s1", HealthConfig(windows=WINDOWS))
+    feed(straight, returns, turnover, range(T))
+
+    resumed = StrategyHealthChecker.open(tmp_path, "s1", HealthConfig(windows=WINDOWS))
+    feed(resumed, returns, turnover, range(173))
+    resumed.save()
+    resumed = StrategyHealthChecker.open(tmp_path, "s1", HealthConfig(windows=WINDOWS))
+    feed(resumed, returns, turnover, range(173, T))
+    for window in WINDOWS:
+        pd.testing.assert_frame_equal(resumed.report(window), straight.report(window))
+
+
+def test_record_returns_rejects_stale_dates(tmp_path):
+    for t in range(3):
+        record_returns(tmp_path, "mom", DATES[t], {"PORTFOLIO": 0.01 * (t - 1)})
+    with pytest.raises(ValueError):
+        record_returns(tmp_path, "mom", DATES[1], {"PORTFOLIO": 0.0})
+    report = StrategyHealthChecker.open(tmp_path, "mom").report(20)
+    assert report.loc[0, "observations"] == 3
+    assert report.loc[0, "window_return"] == pytest.approx(0.99 * 1.0 * 1.01 - 1)